@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Book2Video AI Fan-out
+Chamadas de IA por cena em paralelo (texto, imagem e narração) com asyncio
+Limite de concorrência e token bucket por provedor, novas tentativas com jitter
+e conexões HTTP keep-alive reaproveitadas por provedor
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import ssl
+import threading
+import time
+import urllib.parse
+
+from memo_cache import memo_key
+
+# Provedores e limites padrão; base_url de cada um pode apontar para o stub local
+PROVIDERS = {
+    "text": {
+        "base_url": "https://api.openai.com",
+        "api_key_env": "OPENAI_API_KEY",
+        "auth_header": "Authorization",
+        "concurrency": 20,
+        "rate": 10.0,
+        "burst": 20,
+    },
+    "image": {
+        "base_url": "https://api.openai.com",
+        "api_key_env": "OPENAI_API_KEY",
+        "auth_header": "Authorization",
+        "concurrency": 20,
+        "rate": 5.0,
+        "burst": 20,
+    },
+    "voice": {
+        "base_url": "https://api.elevenlabs.io",
+        "api_key_env": "ELEVENLABS_API_KEY",
+        "auth_header": "xi-api-key",
+        "concurrency": 20,
+        "rate": 5.0,
+        "burst": 20,
+    },
+}
+TEXT_MODEL = "gpt-4o-mini"
+IMAGE_MODEL = "dall-e-3"
+IMAGE_SIZE = "1792x1024"
+VOICE_MODEL = "eleven_multilingual_v2"
+DEFAULT_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"
+
+# Preço estimado por chamada (texto, imagem) e por 1000 caracteres narrados
+PRICE_USD = {"text": 0.0003, "image": 0.08, "voice_per_1k_chars": 0.30}
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_RETRIES = 4
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 20.0
+RETRY_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+MAX_RESPONSE_BYTES = 64 * 1024 * 1024
+
+
+class AIProviderError(Exception):
+    """A provider call that failed for good (after retries, or not retryable)"""
+
+    def __init__(self, provider, message, status=None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status = status
+
+
+class _RetryableError(Exception):
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second, bursts of up to `burst`"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        # Um único event loop: não precisa de lock entre o cálculo e o consumo
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def penalize(self, seconds):
+        """Stop handing out tokens for `seconds` (the provider sent Retry-After)"""
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class ProviderClient:
+    """HTTP/1.1 client for one provider with a keep-alive connection pool"""
+
+    def __init__(self, name, base_url, concurrency, rate, burst, api_key=None,
+                 auth_header="Authorization", timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        url = urllib.parse.urlsplit(base_url)
+        self.name = name
+        self.host = url.hostname
+        self.tls = url.scheme == "https"
+        self.port = url.port or (443 if self.tls else 80)
+        self.base_path = url.path.rstrip("/")
+        self.api_key = api_key
+        self.auth_header = auth_header
+        self.timeout = timeout
+        self.retries = retries
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate, burst)
+        self._idle = []
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "connections_opened": 0,
+                      "calls": 0, "memo_hits": 0, "cost_usd": 0.0, "saved_usd": 0.0}
+
+    async def post_json(self, path, payload):
+        """POST a JSON body; returns the decoded JSON, or the raw bytes for other content types"""
+        body = json.dumps(payload).encode("utf-8")
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.semaphore:
+                    await self.bucket.acquire()
+                    status, headers, data = await asyncio.wait_for(
+                        self._exchange("POST", path, body), self.timeout)
+                self.stats["requests"] += 1
+                if status in RETRY_STATUSES:
+                    raise _RetryableError(f"HTTP {status}", status, _retry_after(headers))
+                if status >= 400:
+                    self.stats["failures"] += 1
+                    raise AIProviderError(self.name, f"HTTP {status}: {data[:200]!r}", status)
+                if headers.get("content-type", "").startswith("application/json"):
+                    return json.loads(data)
+                return data
+            except (_RetryableError, OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                if attempt == self.retries:
+                    self.stats["failures"] += 1
+                    raise AIProviderError(self.name, f"desistindo após {attempt + 1} tentativas: {e}",
+                                          getattr(e, "status", None)) from e
+                self.stats["retries"] += 1
+                # Full jitter: espera aleatória até o teto exponencial, nunca antes do Retry-After
+                delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+                retry_after = getattr(e, "retry_after", None)
+                if retry_after:
+                    self.bucket.penalize(retry_after)
+                    delay = max(delay, retry_after)
+                await asyncio.sleep(delay)
+
+    async def _exchange(self, method, path, body):
+        reader, writer, reused = await self._connection()
+        try:
+            try:
+                response = await self._roundtrip(reader, writer, method, path, body)
+            except (OSError, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                # Conexão ociosa fechada pelo servidor: tenta de novo numa nova, sem contar como retry
+                writer.close()
+                reader, writer, _ = await self._connection(fresh=True)
+                response = await self._roundtrip(reader, writer, method, path, body)
+        except BaseException:
+            writer.close()
+            raise
+        status, headers, data, keep_alive = response
+        if keep_alive:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+        return status, headers, data
+
+    async def _connection(self, fresh=False):
+        while self._idle and not fresh:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        context = ssl.create_default_context() if self.tls else None
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=context)
+        self.stats["connections_opened"] += 1
+        return reader, writer, False
+
+    async def _roundtrip(self, reader, writer, method, path, body):
+        lines = [
+            f"{method} {self.base_path}{path} HTTP/1.1",
+            f"Host: {self.host}" + (f":{self.port}" if self.port not in (80, 443) else ""),
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Connection: keep-alive",
+        ]
+        if self.api_key:
+            value = f"Bearer {self.api_key}" if self.auth_header == "Authorization" else self.api_key
+            lines.append(f"{self.auth_header}: {value}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        version, status = status_line.decode("latin-1").split(None, 2)[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            data = await _read_chunked(reader)
+        elif "content-length" in headers:
+            length = int(headers["content-length"])
+            if length > MAX_RESPONSE_BYTES:
+                raise AIProviderError(self.name, f"resposta grande demais ({length} bytes)")
+            data = await reader.readexactly(length)
+        else:
+            data = await reader.read(MAX_RESPONSE_BYTES)
+            keep_alive = False
+        return int(status), headers, data, keep_alive
+
+    def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+
+async def _read_chunked(reader):
+    parts = []
+    size = 0
+    while True:
+        line = await reader.readline()
+        length = int(line.split(b";", 1)[0].strip() or b"0", 16)
+        if length == 0:
+            # Trailers opcionais até a linha em branco
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            return b"".join(parts)
+        size += length
+        if size > MAX_RESPONSE_BYTES:
+            raise OSError("chunked response too large")
+        parts.append(await reader.readexactly(length))
+        await reader.readexactly(2)
+
+
+def _retry_after(headers):
+    try:
+        return float(headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+class FanOutExecutor:
+    """Runs the per-scene AI calls for a whole book concurrently
+
+    Each scene needs a visual description (text model), then an image from
+    that description, and, in parallel with both, its narration audio. All
+    scenes start together; the per-provider semaphores and token buckets
+    decide how many requests are really in flight, so with enough headroom
+    the wall-clock time is that of the slowest scene.
+    """
+
+    def __init__(self, base_url=None, concurrency=None, rate=None, voice_id=DEFAULT_VOICE_ID,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, output_dir=None, memo=None):
+        self.voice_id = voice_id
+        self.output_dir = output_dir
+        self.memo = memo
+        self.providers = {}
+        for name, config in PROVIDERS.items():
+            self.providers[name] = ProviderClient(
+                name,
+                base_url or config["base_url"],
+                concurrency or config["concurrency"],
+                rate or config["rate"],
+                max(config["burst"], concurrency or 0),
+                api_key=os.environ.get(config["api_key_env"]),
+                auth_header=config["auth_header"],
+                timeout=timeout,
+                retries=retries,
+            )
+
+    async def _call(self, provider_name, stage, model, prompt, params, path, body, extract, cost_usd):
+        """One provider call, memoized by (stage, model, prompt, params) when a memo cache is set"""
+        provider = self.providers[provider_name]
+        fetched = False
+
+        async def fetch():
+            nonlocal fetched
+            fetched = True
+            provider.stats["calls"] += 1
+            value = extract(await provider.post_json(path, body))
+            provider.stats["cost_usd"] += cost_usd
+            return value
+
+        if self.memo is None:
+            return await fetch()
+        value = await self.memo.aget_or_compute(memo_key(stage, model, prompt, params), fetch, cost_usd)
+        if not fetched:
+            provider.stats["memo_hits"] += 1
+            provider.stats["saved_usd"] += cost_usd
+        return value
+
+    async def describe(self, scene, visual_style):
+        narration = scene.get("narration", "")
+        tone = scene.get("emotional_tone", "")
+        return await self._call(
+            "text", "describe", TEXT_MODEL, narration, {"visual_style": visual_style, "tone": tone},
+            "/v1/chat/completions", {
+                "model": TEXT_MODEL,
+                "messages": [
+                    {"role": "system", "content": f"Descreva em uma frase uma ilustração no estilo {visual_style} "
+                                                  f"para o trecho narrado. Tom: {tone}."},
+                    {"role": "user", "content": narration},
+                ],
+            },
+            lambda response: response["choices"][0]["message"]["content"].strip(),
+            PRICE_USD["text"],
+        )
+
+    async def illustrate(self, description, visual_style):
+        prompt = f"{description} Estilo: {visual_style}."
+        return await self._call(
+            "image", "image", IMAGE_MODEL, prompt, {"size": IMAGE_SIZE},
+            "/v1/images/generations", {"model": IMAGE_MODEL, "prompt": prompt, "size": IMAGE_SIZE, "n": 1},
+            lambda response: response["data"][0]["url"],
+            PRICE_USD["image"],
+        )
+
+    async def narrate(self, scene):
+        # Mesmo texto com a mesma voz = o mesmo áudio, qualquer que seja o estilo visual
+        text = scene.get("narration", "")
+        return await self._call(
+            "voice", "tts", VOICE_MODEL, text, {"voice_id": self.voice_id},
+            f"/v1/text-to-speech/{self.voice_id}", {"text": text, "model_id": VOICE_MODEL},
+            bytes,
+            PRICE_USD["voice_per_1k_chars"] * len(text) / 1000,
+        )
+
+    async def run_scene(self, scene, visual_style):
+        async def visuals():
+            description = await self.describe(scene, visual_style)
+            return description, await self.illustrate(description, visual_style)
+
+        started = time.monotonic()
+        (description, image_url), audio = await asyncio.gather(visuals(), self.narrate(scene))
+        result = dict(scene, visual_description=description, image_url=image_url,
+                      audio_bytes=len(audio), audio_sha256=hashlib.sha256(audio).hexdigest())
+        if self.output_dir:
+            path = os.path.join(self.output_dir, f"scene_{scene['scene_number']:04d}.mp3")
+            with open(path, "wb") as f:
+                f.write(audio)
+            result["audio_path"] = path
+        result["ai_seconds"] = round(time.monotonic() - started, 3)
+        return result
+
+    async def run(self, scenes, visual_style="educational", on_scene=None):
+        """Enriched copies of `scenes`, in order; `on_scene(done, total)` after each one"""
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+        done = 0
+
+        async def tracked(scene):
+            nonlocal done
+            result = await self.run_scene(scene, visual_style)
+            done += 1
+            if on_scene:
+                on_scene(done, len(scenes))
+            return result
+
+        tasks = [asyncio.ensure_future(tracked(scene)) for scene in scenes]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            # Uma cena falhou de vez: não deixa as outras gastando cota
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            for provider in self.providers.values():
+                provider.close()
+
+    def stats(self):
+        return {name: dict(provider.stats, cost_usd=round(provider.stats["cost_usd"], 4),
+                           saved_usd=round(provider.stats["saved_usd"], 4))
+                for name, provider in self.providers.items()}
+
+
+def run_fanout(scenes, visual_style="educational", on_scene=None, **options):
+    """Synchronous entry point for the job workers: (scenes, provider stats)"""
+    async def main():
+        executor = FanOutExecutor(**options)
+        return await executor.run(scenes, visual_style, on_scene), executor.stats()
+
+    return asyncio.run(main())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Book2Video AI fan-out demo")
+    parser.add_argument("--url", default=None,
+                        help="URL base dos provedores (padrão: sobe o stub local numa porta livre)")
+    parser.add_argument("--scenes", type=int, default=20, help="número de cenas (padrão: 20)")
+    parser.add_argument("--concurrency", type=int, default=None, help="limite por provedor (padrão: 20)")
+    parser.add_argument("--latency", type=float, default=0.5, help="latência média do stub em s (padrão: 0.5)")
+    parser.add_argument("--fail-rate", type=float, default=0.05,
+                        help="fração de respostas 503 do stub (padrão: 0.05)")
+    args = parser.parse_args(argv)
+
+    base_url = args.url
+    if base_url is None:
+        import stub_ai_server
+        httpd = stub_ai_server.create_stub_server(("127.0.0.1", 0), latency=args.latency,
+                                                  fail_rate=args.fail_rate)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+        print(f"🧪 Stub de IA em {base_url} (latência ~{args.latency}s, {args.fail_rate:.0%} de 503)")
+
+    scenes = [{"scene_number": n, "narration": f"Cena {n}. O pequeno príncipe olhou as estrelas.",
+               "emotional_tone": "contemplativo"} for n in range(1, args.scenes + 1)]
+    started = time.monotonic()
+    results, stats = run_fanout(scenes, base_url=base_url, concurrency=args.concurrency)
+    elapsed = time.monotonic() - started
+    slowest = max(scene["ai_seconds"] for scene in results)
+    total = sum(scene["ai_seconds"] for scene in results)
+    print(f"🎬 {len(results)} cenas em {elapsed:.2f}s (cena mais lenta: {slowest:.2f}s, "
+          f"soma sequencial: {total:.2f}s)")
+    for name, counters in stats.items():
+        print(f"   {name:<6} {counters}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Book2Video Auth Tokens
+Tokens assinados com HMAC-SHA256: validados sem consultar o armazenamento
+Tabela de sessões para revogação e expiração por heap (sem varrer todas as sessões)
+"""
+
+import base64
+import hashlib
+import heapq
+import hmac
+import os
+import secrets
+import threading
+import time
+
+DEFAULT_SESSION_TTL = 24 * 3600
+SECRET_ENV = "BOOK2VIDEO_AUTH_SECRET"
+PASSWORD_ITERATIONS = 200000
+# O varredor acorda no máximo a cada N segundos (ou antes, se uma sessão vence antes)
+SWEEP_MAX_SLEEP = 60.0
+
+
+class AuthError(Exception):
+    """Token rejected; `reason` is safe to show to the client"""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+class TokenSigner:
+    """Issues and checks `sid.user_id.tier.expires.signature` tokens
+
+    The signature covers everything before it, so a valid token already
+    carries the session id, user and subscription tier: checking one costs
+    an HMAC over ~100 bytes and no storage access.
+    """
+
+    def __init__(self, secret):
+        if isinstance(secret, str):
+            secret = secret.encode("utf-8")
+        # HMAC com a chave já processada; copy() evita refazer isso a cada token
+        self._mac = hmac.new(secret, digestmod=hashlib.sha256)
+
+    def sign(self, payload):
+        mac = self._mac.copy()
+        mac.update(payload.encode("ascii"))
+        return _b64(mac.digest())
+
+    def issue(self, session_id, user_id, tier, expires):
+        payload = f"{session_id}.{user_id}.{tier}.{int(expires)}"
+        return f"{payload}.{self.sign(payload)}"
+
+    def verify(self, token, now=None):
+        """(session_id, user_id, tier, expires) of a valid token, else AuthError"""
+        payload, _, signature = token.rpartition(".")
+        parts = payload.split(".")
+        if len(parts) != 4:
+            raise AuthError("malformed token")
+        try:
+            if not hmac.compare_digest(self.sign(payload), signature):
+                raise AuthError("invalid signature")
+        except (UnicodeEncodeError, TypeError):
+            raise AuthError("malformed token")
+        session_id, user_id, tier, expires = parts
+        try:
+            expires = int(expires)
+        except ValueError:
+            raise AuthError("malformed token")
+        if expires <= (time.time() if now is None else now):
+            raise AuthError("token expired")
+        return session_id, user_id, tier, expires
+
+
+class SessionManager:
+    """Signed-token sessions with revocation and heap-based expiry
+
+    Sessions are written to the storage `sessions` table when created and
+    deleted on logout or expiry. Validating a request never reads that
+    table: the signature proves the token was issued here. Revocations are
+    kept in storage too, so a logout holds in every --workers process and
+    across restarts; each process caches them in a dict and reloads it only
+    when the storage's revocation version changes, which costs one small
+    read per authenticated request. Expiry uses a min-heap of (expires,
+    session id), so the sweeper only touches sessions that are actually due.
+    """
+
+    def __init__(self, store, signer, ttl_seconds=DEFAULT_SESSION_TTL):
+        self.store = store
+        self.signer = signer
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._expiry = []
+        self._revoked = {}
+        self._revocation_version = None
+        self._thread = None
+        self._stopping = False
+        self.counters = {"issued": 0, "authenticated": 0, "rejected": 0, "revoked": 0, "expired": 0}
+
+    def create(self, user):
+        """New session for `user`; returns (token, session)"""
+        now = time.time()
+        session = {
+            "session_id": secrets.token_urlsafe(16),
+            "user_id": user["id"],
+            "subscription_tier": user.get("subscription_tier") or "free",
+            "created_at": int(now),
+            "expires_at": int(now + self.ttl_seconds),
+        }
+        token = self.signer.issue(session["session_id"], session["user_id"],
+                                  session["subscription_tier"], session["expires_at"])
+        self.store.put_session(session["session_id"], session)
+        with self._lock:
+            heapq.heappush(self._expiry, (session["expires_at"], session["session_id"]))
+            self.counters["issued"] += 1
+            if self._expiry[0][1] == session["session_id"]:
+                self._wakeup.notify()
+        return token, session
+
+    def authenticate(self, token):
+        """(session_id, user_id, tier, expires) for a live token, else AuthError"""
+        try:
+            claims = self.signer.verify(token)
+            self._refresh_revocations()
+            # Leitura de dict sem lock: atômica no CPython
+            if claims[0] in self._revoked:
+                raise AuthError("session revoked")
+        except AuthError:
+            with self._lock:
+                self.counters["rejected"] += 1
+            raise
+        with self._lock:
+            self.counters["authenticated"] += 1
+        return claims
+
+    def _refresh_revocations(self):
+        version = self.store.revocation_version()
+        if version == self._revocation_version:
+            return
+        # Versão lida antes da lista: uma revogação no meio só causa mais uma recarga
+        revoked = self.store.revoked_sessions(time.time())
+        with self._lock:
+            self._revoked = revoked
+            self._revocation_version = version
+
+    def revoke(self, session_id, expires):
+        """Log a session out in every process sharing the storage"""
+        if not self.store.revoke_session(session_id, expires):
+            return False
+        with self._lock:
+            self._revoked[session_id] = expires
+            # Revogações também saem pelo heap quando o token venceria
+            heapq.heappush(self._expiry, (expires, session_id))
+            self.counters["revoked"] += 1
+        return True
+
+    def sweep(self, now=None):
+        """Drop sessions and revocations whose tokens have expired"""
+        now = time.time() if now is None else now
+        due = []
+        previous = None
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                entry = heapq.heappop(self._expiry)
+                # Sessão revogada aqui tem duas entradas iguais, que saem em sequência
+                if entry == previous:
+                    continue
+                previous = entry
+                if self._revoked.pop(entry[1], None) is None:
+                    due.append(entry[1])
+            # Revogações feitas por outros processos não estão no heap deste
+            for session_id in [sid for sid, expires in self._revoked.items() if expires <= now]:
+                del self._revoked[session_id]
+            self.counters["expired"] += len(due)
+        for session_id in due:
+            self.store.delete_session(session_id)
+        self.store.purge_revocations(now)
+        return len(due)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._stopping:
+                    return
+                delay = SWEEP_MAX_SLEEP
+                if self._expiry:
+                    delay = min(delay, max(self._expiry[0][0] - time.time(), 0))
+                if delay > 0:
+                    self._wakeup.wait(delay)
+                if self._stopping:
+                    return
+            self.sweep()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["expiry_heap_size"] = len(self._expiry)
+            stats["revoked_pending_expiry"] = len(self._revoked)
+        stats["ttl_seconds"] = self.ttl_seconds
+        return stats
+
+
+def hash_password(password, salt=None, iterations=PASSWORD_ITERATIONS):
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("ascii"), iterations)
+    return f"pbkdf2_sha256${iterations}${salt}${_b64(digest)}"
+
+
+def check_password(password, encoded):
+    try:
+        _, iterations, salt, _ = encoded.split("$")
+        expected = hash_password(password, salt, int(iterations))
+    except (AttributeError, ValueError):
+        return False
+    return hmac.compare_digest(expected, encoded)
+
+
+class AuthMixin:
+    """Authenticates the Bearer token once per routed request
+
+    Sets `self.auth` to the token claims (session_id, user_id, tier,
+    expires), or None for anonymous requests. A present but invalid token
+    gets 401; anonymous requests only do when `require_auth` is set and the
+    route handler is not in `auth_public`. The 401 still goes through the
+    rest of the run_route chain, so guessing tokens is rate limited too.
+    The handler provides `send_json_response(data, status, headers)`.
+    """
+
+    session_manager = None
+    require_auth = False
+    auth_public = frozenset()
+    auth = None
+
+    def run_route(self, method, params=None):
+        self.auth = None
+        header = self.headers.get("Authorization")
+        if header and self.session_manager is not None:
+            scheme, _, token = header.partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                super().run_route(self.send_unauthorized, {"reason": "expected a Bearer token"})
+                return
+            try:
+                self.auth = self.session_manager.authenticate(token.strip())
+            except AuthError as e:
+                super().run_route(self.send_unauthorized, {"reason": e.reason})
+                return
+        elif self.require_auth and getattr(method, "__name__", "") not in self.auth_public:
+            super().run_route(self.send_unauthorized, {"reason": "authentication required"})
+            return
+        super().run_route(method, params)
+
+    def send_unauthorized(self, reason):
+        challenge = 'Bearer realm="book2video"'
+        if self.headers.get("Authorization"):
+            challenge += f', error="invalid_token", error_description={quoted_string(reason)}'
+        self.send_json_response({"error": "Unauthorized", "reason": reason}, 401,
+                                headers={"WWW-Authenticate": challenge})
+
+
+def quoted_string(value):
+    """`value` as a quoted-string; RFC 6750 allows only printable ASCII without " and \\ in it"""
+    return '"' + "".join(char for char in str(value) if " " <= char <= "~" and char not in '"\\') + '"'
+
+
+def add_auth_arguments(parser):
+    parser.add_argument("--auth-secret", default=None,
+                        help=f"chave HMAC dos tokens (padrão: ${SECRET_ENV} ou uma chave aleatória por execução)")
+    parser.add_argument("--session-ttl-hours", type=float, default=DEFAULT_SESSION_TTL / 3600,
+                        help="validade dos tokens de sessão em horas (padrão: 24)")
+    parser.add_argument("--require-auth", action="store_true",
+                        help="exige token Bearer em todas as rotas exceto páginas, health e login")
+
+
+def auth_secret(args):
+    """Secret from the CLI or environment, else a random one (call before forking workers)"""
+    return args.auth_secret or os.environ.get(SECRET_ENV) or secrets.token_hex(32)
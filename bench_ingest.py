@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Book2Video Ingestion Benchmark
+Livros sintéticos de 10 KB a 500 MB: MB/s e pico de memória da ingestão em fluxo
+Uso: python bench_ingest.py [--sizes 10KB,1MB,10MB,100MB,500MB] [--format txt|epub]
+"""
+
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+import zipfile
+
+from ingest import analyze_book
+
+UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+WORDS = ("livro vídeo cena capítulo história noite chuva cidade rio menino princesa raposa "
+         "planeta viagem sonho tempo caminho janela silêncio estrela").split()
+
+
+def parse_size(text):
+    text = text.strip().upper()
+    for unit, factor in UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+
+def synthetic_paragraphs(rng):
+    """Endless paragraphs of 3-8 sentences with a chapter heading every ~40 paragraphs"""
+    chapter = 0
+    while True:
+        chapter += 1
+        yield f"CAPÍTULO {chapter}"
+        for _ in range(rng.randint(20, 60)):
+            sentences = []
+            for _ in range(rng.randint(3, 8)):
+                words = rng.choices(WORDS, k=rng.randint(6, 18))
+                sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+            yield " ".join(sentences)
+
+
+def write_txt(path, size, seed=42):
+    rng = random.Random(seed)
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for paragraph in synthetic_paragraphs(rng):
+            block = paragraph + "\n\n"
+            f.write(block)
+            written += len(block.encode("utf-8"))
+            if written >= size:
+                return
+
+
+def write_epub(path, size, seed=42, chapter_bytes=256 * 1024):
+    rng = random.Random(seed)
+    written = 0
+    chapters = []
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        paragraphs = synthetic_paragraphs(rng)
+        while written < size:
+            name = f"OEBPS/ch{len(chapters):05d}.xhtml"
+            chapters.append(name)
+            with zf.open(name, "w") as member:
+                member.write(b"<html><body>")
+                chapter_written = 0
+                while chapter_written < chapter_bytes and written < size:
+                    paragraph = next(paragraphs)
+                    tag = "h2" if paragraph.startswith("CAPÍTULO") else "p"
+                    data = f"<{tag}>{paragraph}</{tag}>\n".encode("utf-8")
+                    member.write(data)
+                    chapter_written += len(data)
+                    written += len(data)
+                member.write(b"</body></html>")
+        manifest = "".join(f'<item id="c{i}" href="{os.path.basename(n)}"/>' for i, n in enumerate(chapters))
+        spine = "".join(f'<itemref idref="c{i}"/>' for i in range(len(chapters)))
+        zf.writestr("META-INF/container.xml",
+                    '<container><rootfiles><rootfile full-path="OEBPS/content.opf"/></rootfiles></container>')
+        zf.writestr("OEBPS/content.opf",
+                    f"<package><manifest>{manifest}</manifest><spine>{spine}</spine></package>")
+
+
+def peak_rss_mb():
+    # ru_maxrss é em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Book2Video ingestion benchmark")
+    parser.add_argument("--sizes", default="10KB,1MB,10MB,100MB,500MB",
+                        help="tamanhos dos livros sintéticos (padrão: 10KB,1MB,10MB,100MB,500MB)")
+    parser.add_argument("--format", choices=("txt", "epub"), default="txt",
+                        help="formato dos livros gerados (padrão: txt)")
+    parser.add_argument("--dir", default=None, help="onde gerar os livros (padrão: diretório temporário)")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    writer = write_epub if args.format == "epub" else write_txt
+    print(f"{'tamanho':>10} {'palavras':>12} {'capítulos':>10} {'s':>8} {'MB/s':>8} {'pico RSS MB':>12}")
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f"book-{size}.{args.format}")
+            writer(path, size)
+            file_mb = os.path.getsize(path) / 1024 ** 2
+            started = time.perf_counter()
+            analysis = analyze_book(path)
+            elapsed = time.perf_counter() - started
+            os.remove(path)
+            print(f"{file_mb:>9.2f}M {analysis['word_count']:>12} {analysis['chapters_detected']:>10} "
+                  f"{elapsed:>8.2f} {file_mb / elapsed:>8.1f} {peak_rss_mb():>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Book2Video JSON Benchmark
+Compara bytes e microssegundos por endpoint: formato antigo vs serializador novo
+Uso: python bench_json.py [--projects 1000] [--repeat 2000]
+"""
+
+import argparse
+import json
+import timeit
+import uuid
+from datetime import datetime
+
+import json_codec
+from demo_server import DEMO_PROJECT_TEMPLATE
+
+
+def legacy_dumps(data):
+    """What send_json_response used to do on every request"""
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def sample_payloads(project_count):
+    now = datetime.now().isoformat()
+    health = {
+        "status": "healthy",
+        "timestamp": now,
+        "version": "1.0.0",
+        "environment": "demo",
+        "services": {"database": "healthy", "redis": "healthy", "openai": "demo_mode"},
+        "uptime_seconds": 3600,
+        "demo_mode": True,
+    }
+    stats = {
+        "total_users": 1247,
+        "total_projects": project_count,
+        "completed_projects": project_count // 2,
+        "success_rate": 95.7,
+        "system_status": "operational",
+        "version": "1.0.0",
+        "uptime": "running",
+        "demo_mode": True,
+        "processing_queue": 3,
+        "average_processing_time": 12.5,
+        "jobs": {"queued": 3, "running": 2, "completed": 40, "failed": 1,
+                 "workers": 2, "executor": "thread", "max_queue": 64},
+        "total_videos_generated": 42,
+        "ai_cost_savings": "78%",
+    }
+    projects = [
+        {"id": str(uuid.uuid4()), "title": f"Livro {i}", "status": "completed", "created_at": now}
+        for i in range(project_count)
+    ]
+    dynamic = {"id": str(uuid.uuid4()), "created_at": now}
+    return {
+        "/health": health,
+        "/stats": stats,
+        "/projects": projects,
+        "/projects/{id} (demo)": DEMO_PROJECT_TEMPLATE.to_dict(dynamic),
+    }, dynamic
+
+
+def measure(fn, repeat):
+    """Best-of-5 microseconds per call"""
+    number = max(1, repeat)
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Book2Video JSON serialization benchmark")
+    parser.add_argument("--projects", type=int, default=1000, help="projetos em /projects (padrão: 1000)")
+    parser.add_argument("--repeat", type=int, default=2000, help="iterações por medida (padrão: 2000)")
+    args = parser.parse_args(argv)
+
+    payloads, dynamic = sample_payloads(args.projects)
+    backends = json_codec.available_backends()
+
+    print(f"Backends disponíveis: {', '.join(backends)}")
+    header = f"{'endpoint':<24} {'backend':<16} {'bytes':>9} {'µs':>10} {'bytes -':>9} {'µs -':>10}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, data in payloads.items():
+        repeat = max(10, args.repeat // 50) if endpoint == "/projects" else args.repeat
+        base_bytes = len(legacy_dumps(data))
+        base_us = measure(lambda: legacy_dumps(data), repeat)
+        print(f"{endpoint:<24} {'legacy indent=2':<16} {base_bytes:>9} {base_us:>10.2f} {'':>9} {'':>10}")
+        rows = []
+        for name in backends:
+            json_codec.select_backend(name)
+            rows.append((name, lambda: json_codec.dumps(data)))
+        if endpoint.startswith("/projects/{id}"):
+            json_codec.select_backend(backends[0])
+            rows.append(("template", lambda: DEMO_PROJECT_TEMPLATE.render(dynamic)))
+        for name, fn in rows:
+            if name != "template":
+                json_codec.select_backend(name)
+            size = len(fn())
+            us = measure(fn, repeat)
+            print(f"{endpoint:<24} {name:<16} {size:>9} {us:>10.2f} "
+                  f"{base_bytes - size:>9} {base_us - us:>10.2f}")
+    json_codec.select_backend("auto")
+
+
+if __name__ == "__main__":
+    main()
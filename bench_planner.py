@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Book2Video Scene Planner Benchmark
+Partição e plano completo em Python puro vs NumPy, no mesmo livro sintético
+Uso: python bench_planner.py [--size 2MB] [--minutes 3,30,120] [--runs 7]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import scene_planner
+from bench_ingest import parse_size, write_txt
+from ingest import detect_format, iter_blocks
+from scene_planner import (UNITS_PER_SCENE, BookOutline, build_units, partition, plan_scenes,
+                           scene_count)
+
+
+def median_ms(runs, fn):
+    """Median milliseconds of `runs` calls, plus the last result"""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Book2Video scene planner benchmark")
+    parser.add_argument("--size", default="2MB", help="tamanho do livro sintético (padrão: 2MB)")
+    parser.add_argument("--minutes", default="3,30,120", help="durações alvo (padrão: 3,30,120)")
+    parser.add_argument("--runs", type=int, default=7, help="repetições por medida (padrão: 7)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.txt")
+        write_txt(path, parse_size(args.size))
+        outline = BookOutline.from_blocks(iter_blocks(path, detect_format(path)))
+    paths = [("Python puro", False)]
+    if scene_planner.np is not None:
+        paths.append(("NumPy", True))
+    else:
+        print("⚠️  NumPy não instalado: só o caminho em Python puro é medido")
+    print(f"📖 {outline.total_words} palavras, {len(outline.words)} parágrafos · mediana de {args.runs}")
+    print(f"{'minutos':>8}{'cenas':>7}  {'caminho':<12}{'partição ms':>13}{'plano ms':>11}")
+    for minutes in (float(m) for m in args.minutes.split(",")):
+        scenes = scene_count(minutes * 60)
+        _, unit_words, unit_bonus = build_units(outline, scenes * UNITS_PER_SCENE)
+        splits = []
+        for name, use_numpy in paths:
+            split_ms, split = median_ms(args.runs, lambda: partition(unit_words, unit_bonus, scenes, use_numpy))
+            plan_ms, _ = median_ms(args.runs, lambda: plan_scenes(outline, minutes, use_numpy=use_numpy))
+            splits.append(split)
+            print(f"{minutes:>8g}{scenes:>7}  {name:<12}{split_ms:>13.2f}{plan_ms:>11.2f}")
+        if any(split != splits[0] for split in splits):
+            print("❌ os caminhos escolheram cenas diferentes")
+    print(f"🧭 Padrão do partition(): {'NumPy' if scene_planner.np is not None else 'Python puro'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Book2Video Rate Limiter Benchmark
+Custo por requisição do token bucket com 1, 10 mil e 1 milhão de clientes ativos
+Uso: python bench_rate_limit.py [--keys 1,10000,1000000] [--repeat 200000]
+"""
+
+import argparse
+import timeit
+
+from rate_limit import RateLimiter
+
+
+def measure(fn, repeat):
+    """Best-of-5 nanoseconds per call"""
+    return min(timeit.repeat(fn, number=repeat, repeat=5)) / repeat * 1e9
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Book2Video rate limiter benchmark")
+    parser.add_argument("--keys", default="1,10000,1000000",
+                        help="clientes distintos alternando requisições (padrão: 1,10000,1000000)")
+    parser.add_argument("--repeat", type=int, default=200000, help="chamadas por medição (padrão: 200000)")
+    args = parser.parse_args(argv)
+
+    print(f"{'clientes':>10} {'ns/chamada':>12} {'chaves ativas':>14} {'limitadas':>10}")
+    for count in (int(value) for value in args.keys.split(",")):
+        limiter = RateLimiter(max_keys=max(count, 1) * 2)
+        keys = [f"ip:10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(count)]
+        for key in keys:
+            limiter.hit("general", key)
+        position = 0
+
+        def one_request():
+            nonlocal position
+            position = position + 1 if position + 1 < count else 0
+            limiter.hit("general", keys[position], "pro")
+
+        def no_limiter():
+            nonlocal position
+            position = position + 1 if position + 1 < count else 0
+            keys[position]
+
+        # Desconta o custo do próprio laço de medição
+        ns = measure(one_request, args.repeat) - measure(no_limiter, args.repeat)
+        stats = limiter.stats()
+        print(f"{count:>10} {ns:>12.0f} {stats['active_keys']:>14} {stats['limited']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Book2Video Records Benchmark
+Memória por milhão de projetos no MemoryStorage: dicts livres (antes) vs records com __slots__ (depois)
+Uso: python bench_records.py [--projects 20000] [--scenes 20]
+"""
+
+import argparse
+import gc
+import hashlib
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+from storage import MemoryStorage, bump_version, versioned
+
+
+class LegacyMemoryStorage(MemoryStorage):
+    """MemoryStorage as it kept projects before records.py: one free-form dict each"""
+
+    def add_project(self, project):
+        with self.lock:
+            if project["id"] in self.projects:
+                return False
+            self.projects[project["id"]] = versioned(project)
+            self.index.add(project["id"], datetime.fromisoformat(project["created_at"]).timestamp(),
+                           project["status"], project.get("owner_id"))
+            return True
+
+    def get_project(self, project_id):
+        with self.lock:
+            project = self.projects.get(project_id)
+            return dict(project) if project is not None else None
+
+    def update_project(self, project_id, updater):
+        with self.lock:
+            project = self.projects.get(project_id)
+            if project is None:
+                return None
+            before = dict(project)
+            if updater(project) is not False and bump_version(before, project):
+                self.index.update_status(project_id, project["status"])
+            return dict(project)
+
+
+def fresh(text):
+    # Strings vindas de requisições são objetos novos, não constantes compartilhadas
+    return "".join(list(text))
+
+
+def uploaded_project(i, legacy):
+    content = f"livro {i}".encode("utf-8")
+    return {
+        "id": str(uuid.uuid4()),
+        "title": f"Livro {i}",
+        "status": fresh("uploaded"),
+        "owner_id": fresh(f"user-{i % 1000}"),
+        "original_filename": f"livro-{i}.txt",
+        "content_type": fresh("text/plain"),
+        "file_size": 100000 + i,
+        "sha256": hashlib.sha256(content).hexdigest(),
+        "target_duration_minutes": 3,
+        "visual_style": fresh("educational"),
+        "created_at": datetime.now().isoformat() if legacy else time.time(),
+    }
+
+
+def job_result(i, scene_count):
+    scenes = [{
+        "scene_number": n,
+        "chapter": f"Capítulo {n // 5 + 1}",
+        "start_paragraph": n * 10,
+        "end_paragraph": n * 10 + 10,
+        "source_word_count": 1200,
+        "duration_seconds": 9.0,
+        "narration": f"Cena {n} do livro {i}. O pequeno príncipe olhou as estrelas.",
+        "narration_word_count": 12,
+        "emotional_tone": fresh("inspirador"),
+    } for n in range(1, scene_count + 1)]
+    return {
+        "processing_time_seconds": 12.5,
+        "stage_seconds": {"parse": 0.1, "ai": 10.2, "assemble": 2.2},
+        "total_duration_seconds": 9.0 * scene_count,
+        "cost_usd": 0.12,
+        "scenes_generated": scene_count,
+        "quality_rating": 9.1,
+        "book_analysis": {"title": f"Livro {i}", "word_count": 1250,
+                          "estimated_reading_time_minutes": 6, "chapters_detected": 3},
+        "scenes": scenes,
+    }
+
+
+def measure(storage_class, count, scene_count):
+    """Bytes per project held by the storage after upload and after completion"""
+    legacy = storage_class is LegacyMemoryStorage
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    store = storage_class()
+    ids = []
+    for i in range(count):
+        project = uploaded_project(i, legacy)
+        store.add_project(project)
+        ids.append(project["id"])
+    uploaded = tracemalloc.get_traced_memory()[0] - start
+
+    for i, project_id in enumerate(ids):
+        result = job_result(i, scene_count)
+
+        def complete(project):
+            project["job_id"] = f"job-{i}"
+            project["status"] = "completed"
+            project.update(result)
+            project["cache_hit"] = False
+
+        store.update_project(project_id, complete)
+        del result
+    gc.collect()
+    completed = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    # Sem o coletor no meio e na segunda passada: a primeira paga o fim do tracemalloc
+    gc.collect()
+    gc.disable()
+    sample = ids[:2000]
+    for _ in range(2):
+        started = time.perf_counter()
+        for project_id in sample:
+            store.get_project(project_id)
+        read_us = (time.perf_counter() - started) / len(sample) * 1e6
+    gc.enable()
+    # A lista de ids também foi contada; é igual nos dois lados
+    return uploaded / count, completed / count, read_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória dos projetos em MemoryStorage: antes vs depois")
+    parser.add_argument("--projects", type=int, default=20000, help="projetos criados por medição (padrão: 20000)")
+    parser.add_argument("--scenes", type=int, default=20, help="cenas por projeto concluído (padrão: 20)")
+    args = parser.parse_args()
+
+    print(f"📦 {args.projects} projetos, {args.scenes} cenas cada quando concluídos")
+    print(f"{'armazenamento':<22}{'enviado B/proj':>16}{'concluído B/proj':>18}{'GB/milhão (env/concl)':>24}"
+          f"{'get_project µs':>16}")
+    print("(get_project medido nos projetos concluídos)")
+    results = {}
+    for name, storage_class in (("dicts (antes)", LegacyMemoryStorage), ("records (depois)", MemoryStorage)):
+        uploaded, completed, read_us = measure(storage_class, args.projects, args.scenes)
+        results[name] = (uploaded, completed)
+        print(f"{name:<22}{uploaded:>16.0f}{completed:>18.0f}"
+              f"{uploaded * 1e6 / 1e9:>11.2f} / {completed * 1e6 / 1e9:<10.2f}{read_us:>16.1f}")
+    (before_up, before_done), (after_up, after_done) = results.values()
+    print(f"💾 Economia: {1 - after_up / before_up:.0%} por projeto enviado, "
+          f"{1 - after_done / before_done:.0%} por projeto concluído")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Book2Video Router Benchmark
+Custo de despacho: cadeia if/elif linear vs trie do router, com N rotas
+Uso: python bench_router.py [--routes 200] [--repeat 20000]
+"""
+
+import argparse
+import timeit
+
+from router import Router
+
+RESOURCES = ("projects", "jobs", "users", "books", "scenes", "videos", "assets", "reports",
+             "teams", "invoices")
+
+
+def build_routes(count):
+    """`count` routes shaped like the real API: listings, details and actions"""
+    routes = []
+    i = 0
+    while len(routes) < count:
+        resource = f"{RESOURCES[i % len(RESOURCES)]}{i // len(RESOURCES)}"
+        for method, pattern in (
+            ("GET", f"/{resource}"),
+            ("POST", f"/{resource}"),
+            ("GET", f"/{resource}/{{item_id}}"),
+            ("POST", f"/{resource}/{{item_id}}/process"),
+        ):
+            routes.append((method, pattern, f"handler_{len(routes)}"))
+        i += 1
+    return routes[:count]
+
+
+def legacy_chain(routes):
+    """What do_GET/do_POST did: test each route in order until one matches"""
+    checks = []
+    for method, pattern, handler in routes:
+        if "{" not in pattern:
+            checks.append((method, lambda path, p=pattern: path == p, handler))
+        elif pattern.endswith("/process"):
+            prefix = pattern.split("{")[0]
+            checks.append((method, lambda path, p=prefix: path.startswith(p) and path.endswith("/process"),
+                           handler))
+        else:
+            prefix = pattern.split("{")[0]
+            checks.append((method, lambda path, p=prefix: path.startswith(p) and path.count("/") == 2,
+                           handler))
+
+    def dispatch(method, path):
+        path = path.split("?")[0]
+        for route_method, matches, handler in checks:
+            if route_method == method and matches(path):
+                return handler, path.split("/")
+        return None, None
+
+    return dispatch
+
+
+def measure(fn, repeat):
+    """Best-of-5 nanoseconds per call"""
+    return min(timeit.repeat(fn, number=repeat, repeat=5)) / repeat * 1e9
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Book2Video router dispatch benchmark")
+    parser.add_argument("--routes", type=int, default=200, help="rotas na tabela (padrão: 200)")
+    parser.add_argument("--repeat", type=int, default=20000, help="despachos por medida (padrão: 20000)")
+    args = parser.parse_args(argv)
+
+    routes = build_routes(args.routes)
+    router = Router(routes)
+    legacy = legacy_chain(routes)
+    last_resource = routes[-1][1].split("/")[1]
+    cases = {
+        "primeira rota": ("GET", routes[0][1]),
+        "última estática": ("POST", f"/{last_resource}"),
+        "última c/ parâmetro": ("GET", f"/{last_resource}/abc123"),
+        "ação c/ parâmetro": ("POST", f"/{last_resource}/abc123/process"),
+        "inexistente": ("GET", "/nao/existe"),
+    }
+
+    print(f"Rotas: {len(routes)}")
+    header = f"{'caso':<22} {'if/elif ns':>12} {'router ns':>12} {'ganho':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, (method, path) in cases.items():
+        legacy_ns = measure(lambda: legacy(method, path), args.repeat)
+        router_ns = measure(lambda: router.resolve(method, path.split("?", 1)[0]), args.repeat)
+        print(f"{name:<22} {legacy_ns:>12.0f} {router_ns:>12.0f} {legacy_ns / router_ns:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
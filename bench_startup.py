@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Book2Video Startup Benchmark
+Tempo até a primeira resposta: do processo iniciado ao primeiro 200 em /health
+Mede também o import do demo_server e a primeira página HTML (montada sob demanda)
+Uso: python bench_startup.py [--runs 10] [--source DIR] [--server-args "--storage sqlite"]
+"""
+
+import argparse
+import os
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmark import free_port
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STARTUP_TIMEOUT = 30.0
+POLL_INTERVAL = 0.002
+VARIANTS = (("padrão", []), ("--api-only", ["--api-only"]))
+
+
+def get(port, path, timeout=5.0):
+    """Status code of one GET on a fresh connection; None while nothing listens"""
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=timeout) as sock:
+            sock.sendall(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode("ascii"))
+            response = b""
+            while b"\r\n" not in response:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    return None
+                response += chunk
+            while sock.recv(65536):
+                pass
+    except OSError:
+        return None
+    return int(response.split(b" ", 2)[1])
+
+
+def measure_start(source, args):
+    """(seconds to the first /health 200, seconds for the first GET /, status of GET /)"""
+    port = free_port()
+    with tempfile.TemporaryDirectory(prefix="b2v-startup-") as spool:
+        command = [sys.executable, os.path.join(source, "demo_server.py"), "--port", str(port),
+                   "--spool-dir", spool] + args
+        started = time.perf_counter()
+        process = subprocess.Popen(command, cwd=source, stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                if get(port, "/health") == 200:
+                    ready = time.perf_counter() - started
+                    break
+                if process.poll() is not None:
+                    raise RuntimeError(f"o servidor terminou ao iniciar: {shlex.join(command)}")
+                if time.perf_counter() - started > STARTUP_TIMEOUT:
+                    raise RuntimeError(f"o servidor não respondeu em {STARTUP_TIMEOUT:.0f}s")
+                time.sleep(POLL_INTERVAL)
+            page_started = time.perf_counter()
+            page_status = get(port, "/")
+            page = time.perf_counter() - page_started
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+    return ready, page, page_status
+
+
+def measure_import(source):
+    """Seconds to import demo_server in a fresh interpreter"""
+    code = ("import time; started = time.perf_counter(); import demo_server; "
+            "print(time.perf_counter() - started)")
+    output = subprocess.run([sys.executable, "-c", code], cwd=source, capture_output=True, text=True,
+                            check=True, timeout=STARTUP_TIMEOUT)
+    return float(output.stdout.strip())
+
+
+def describe(samples):
+    ms = sorted(sample * 1000 for sample in samples)
+    return f"{statistics.median(ms):>9.1f}{ms[0]:>9.1f}{ms[-1]:>9.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo até a primeira resposta do demo_server.py")
+    parser.add_argument("--runs", type=int, default=10, help="inícios medidos por variante (padrão: 10)")
+    parser.add_argument("--source", default=HERE,
+                        help="diretório com o demo_server.py a medir, ex.: um git worktree antigo (padrão: este)")
+    parser.add_argument("--server-args", default="",
+                        help="argumentos extras para o servidor, ex.: \"--storage sqlite\"")
+    args = parser.parse_args()
+    source = os.path.abspath(args.source)
+    extra = shlex.split(args.server_args)
+
+    print(f"⏱️  {args.runs} inícios por variante · {source}")
+    print(f"{'medida':<32}{'mediana':>9}{'mín':>9}{'máx':>9}  (ms)")
+    imports = [measure_import(source) for _ in range(args.runs)]
+    print(f"{'import demo_server':<32}{describe(imports)}")
+    for name, variant_args in VARIANTS:
+        try:
+            runs = [measure_start(source, variant_args + extra) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{name:<32}❌ {e}")
+            continue
+        print(f"{name + ': 1ª resposta /health':<32}{describe([ready for ready, _, _ in runs])}")
+        print(f"{name + f': 1º GET / ({runs[0][2]})':<32}{describe([page for _, page, _ in runs])}")
+
+
+if __name__ == "__main__":
+    main()
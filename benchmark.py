@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+Book2Video Load Benchmark
+Sobe o demo_server (ou o simple_demo) numa porta livre e dispara cargas mistas com um cliente asyncio
+Relata RPS e latência p50/p95/p99 por operação; salva/compara baselines em JSON
+Uso: python benchmark.py [--target demo|simple] [--workload mixed] [--concurrency 16] [--duration 10]
+                         [--save baseline.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TARGETS = {
+    "demo": os.path.join(HERE, "demo_server.py"),
+    "simple": os.path.join(HERE, "simple_demo.py"),
+}
+# Servidor sem limite de requisições e sem o tempo simulado de renderização
+DEFAULT_SERVER_ARGS = {
+    "demo": ["--no-rate-limit", "--render-seconds", "0"],
+    "simple": [],
+}
+# Pesos de cada operação por carga; "mixed" imita um cliente real da API
+WORKLOADS = {
+    "mixed": {"health": 15, "poll": 40, "list": 15, "upload": 10, "process": 10, "login": 6, "register": 4},
+    "read": {"health": 20, "poll": 60, "list": 20},
+    "health": {"health": 1},
+    "pages": {"home": 1},
+}
+# Operações que precisam das rotas do demo_server
+DEMO_ONLY = {"poll", "list", "upload", "process", "login", "register"}
+REQUEST_TIMEOUT = 30.0
+STARTUP_TIMEOUT = 30.0
+DEFAULT_TOLERANCE = 0.10
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Connection:
+    """One persistent HTTP/1.1 connection driven by asyncio streams"""
+
+    def __init__(self, host, port, keepalive=True):
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=b"", headers=None):
+        """(status, headers, body); a stale reused connection is retried once"""
+        reused = self.writer is not None
+        try:
+            return await self._roundtrip(method, path, body, headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            if not reused:
+                raise
+            return await self._roundtrip(method, path, body, headers)
+
+    async def _roundtrip(self, method, path, body, headers):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 f"Content-Length: {len(body)}"]
+        if not self.keepalive:
+            lines.append("Connection: close")
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by the server")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        if method == "HEAD" or status in (204, 304):
+            data = b""
+        elif "content-length" in response_headers:
+            data = await self.reader.readexactly(int(response_headers["content-length"]))
+        elif "chunked" in response_headers.get("transfer-encoding", "").lower():
+            data = await self._read_chunked()
+        else:
+            data = await self.reader.read()
+            response_headers["connection"] = "close"
+        if not self.keepalive or response_headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, response_headers, data
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                await self.reader.readline()
+                return b"".join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def synthetic_book(user, number):
+    """Small book with chapters; unique per upload so dedup does not short-circuit it"""
+    rng = random.Random(user * 100003 + number)
+    words = ("livro vídeo cena capítulo história noite chuva cidade rio menino princesa raposa "
+             "planeta viagem sonho tempo caminho janela silêncio estrela").split()
+    parts = []
+    for chapter in range(1, 4):
+        parts.append(f"CAPÍTULO {chapter}")
+        for _ in range(12):
+            parts.append(" ".join(rng.choices(words, k=rng.randint(40, 90))) + ".")
+    parts.append(f"Exemplar {user}-{number}.")
+    return "\n\n".join(parts).encode("utf-8")
+
+
+class VirtualUser:
+    """One simulated client: its own connection, account, token and projects"""
+
+    def __init__(self, index, connection, run_id):
+        self.index = index
+        self.connection = connection
+        self.email = f"bench-{run_id}-{index}@book2video.test"
+        self.password = f"senha-{run_id}-{index}"
+        self.headers = {}
+        self.projects = []
+        self.etags = {}
+        self.uploads = 0
+        self.registrations = 0
+        self.rng = random.Random(index)
+
+    async def call(self, method, path, body=b"", headers=None):
+        merged = dict(self.headers)
+        if body:
+            merged["Content-Type"] = "application/json" if body[:1] == b"{" else "text/plain; charset=utf-8"
+        merged.update(headers or {})
+        return await asyncio.wait_for(self.connection.request(method, path, body, merged), REQUEST_TIMEOUT)
+
+    async def setup(self):
+        """Account, token and one project, outside the measured window"""
+        await self.register()
+        await self.login()
+        await self.upload()
+
+    async def health(self):
+        return (await self.call("GET", "/health"))[0]
+
+    async def home(self):
+        return (await self.call("GET", "/", headers={"Accept-Encoding": "gzip"}))[0]
+
+    async def register(self):
+        # O servidor recusa email repetido (409): cada registro depois do primeiro usa outro
+        email = self.email
+        if self.registrations:
+            email = email.replace("@", f"+{self.registrations}@")
+        self.registrations += 1
+        body = json.dumps({"email": email, "password": self.password, "full_name": "Bench"})
+        return (await self.call("POST", "/auth/register", body.encode("utf-8")))[0]
+
+    async def login(self):
+        body = json.dumps({"email": self.email, "password": self.password}).encode("utf-8")
+        status, _, data = await self.call("POST", "/auth/login", body)
+        if status == 200:
+            self.headers["Authorization"] = "Bearer " + json.loads(data)["access_token"]
+        return status
+
+    async def upload(self):
+        self.uploads += 1
+        path = f"/projects/upload?filename=bench-{self.index}-{self.uploads}.txt&target_duration_minutes=1"
+        status, _, data = await self.call("POST", path, synthetic_book(self.index, self.uploads))
+        if status == 200:
+            self.projects.append(json.loads(data)["project_id"])
+        return status
+
+    async def process(self):
+        if not self.projects:
+            return await self.upload()
+        body = b'{"target_duration_minutes": 1}'
+        return (await self.call("POST", f"/projects/{self.rng.choice(self.projects)}/process", body))[0]
+
+    async def poll(self):
+        if not self.projects:
+            return await self.upload()
+        project_id = self.rng.choice(self.projects)
+        # Como um cliente que consulta o status: condicional com o último ETag
+        headers = {"If-None-Match": self.etags[project_id]} if project_id in self.etags else None
+        status, response_headers, _ = await self.call("GET", f"/projects/{project_id}", headers=headers)
+        if "etag" in response_headers:
+            self.etags[project_id] = response_headers["etag"]
+        return status
+
+    async def list(self):
+        return (await self.call("GET", "/projects?limit=20"))[0]
+
+
+class Recorder:
+    """Latencies and status codes of the requests started inside the measured window"""
+
+    def __init__(self, start, stop):
+        self.start = start
+        self.stop = stop
+        self.latencies = {}
+        self.statuses = {}
+        self.failures = {}
+
+    def add(self, operation, started, seconds, status):
+        if not self.start <= started < self.stop:
+            return
+        self.latencies.setdefault(operation, []).append(seconds)
+        counts = self.statuses.setdefault(operation, {})
+        counts[status] = counts.get(status, 0) + 1
+
+    def fail(self, operation, started, error):
+        if self.start <= started < self.stop:
+            errors = self.failures.setdefault(operation, {})
+            name = type(error).__name__
+            errors[name] = errors.get(name, 0) + 1
+
+    def summary(self, seconds):
+        operations = {}
+        for operation in sorted(set(self.latencies) | set(self.failures)):
+            operations[operation] = summarize(self.latencies.get(operation, []), self.statuses.get(operation, {}),
+                                              self.failures.get(operation, {}), seconds)
+        everything = [value for values in self.latencies.values() for value in values]
+        statuses = {}
+        for counts in self.statuses.values():
+            for status, count in counts.items():
+                statuses[status] = statuses.get(status, 0) + count
+        failures = {}
+        for errors in self.failures.values():
+            for name, count in errors.items():
+                failures[name] = failures.get(name, 0) + count
+        return summarize(everything, statuses, failures, seconds), operations
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def summarize(latencies, statuses, failures, seconds):
+    ordered = sorted(latencies)
+    errors = sum(count for status, count in statuses.items() if status >= 400) + sum(failures.values())
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / seconds, 2) if seconds else 0.0,
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else None,
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p95_ms": ms(percentile(ordered, 0.95)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "max_ms": ms(ordered[-1]) if ordered else None,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "failures": failures,
+    }
+
+
+async def run_load(host, port, workload, concurrency, duration, warmup, keepalive, seed):
+    """Drive `concurrency` virtual users for warmup + duration seconds; returns (totals, operations)"""
+    mix = WORKLOADS[workload] if isinstance(workload, str) else workload
+    operations = list(mix)
+    weights = [mix[name] for name in operations]
+    needs_account = any(name in DEMO_ONLY for name in operations)
+    run_id = f"{int(time.time())}{os.getpid()}"
+    users = [VirtualUser(i, Connection(host, port, keepalive), run_id) for i in range(concurrency)]
+    if needs_account:
+        await asyncio.gather(*(user.setup() for user in users))
+
+    rng = random.Random(seed)
+    measure_from = time.perf_counter() + warmup
+    recorder = Recorder(measure_from, measure_from + duration)
+
+    async def drive(user):
+        choices = random.Random(rng.random())
+        while True:
+            begin = time.perf_counter()
+            if begin >= recorder.stop:
+                return
+            operation = choices.choices(operations, weights)[0]
+            try:
+                status = await getattr(user, operation)()
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                user.connection.close()
+                recorder.fail(operation, begin, e)
+                continue
+            recorder.add(operation, begin, time.perf_counter() - begin, status)
+
+    try:
+        await asyncio.gather(*(drive(user) for user in users))
+    finally:
+        for user in users:
+            user.connection.close()
+    return recorder.summary(duration)
+
+
+class ServerProcess:
+    """demo_server.py / simple_demo.py in a child process on a free port"""
+
+    def __init__(self, target, extra_args=(), port=None):
+        self.target = target
+        self.port = port or free_port()
+        self.args = DEFAULT_SERVER_ARGS[target] + list(extra_args)
+        self.process = None
+        self.log = None
+        self.spool = None
+
+    def __enter__(self):
+        self.log = tempfile.TemporaryFile()
+        command = [sys.executable, TARGETS[self.target], "--port", str(self.port)]
+        if self.target == "demo":
+            # Uploads, cache e métricas do benchmark ficam num diretório descartável
+            self.spool = tempfile.TemporaryDirectory(prefix="b2v-bench-")
+            command += ["--spool-dir", self.spool.name]
+        self.process = subprocess.Popen(command + self.args, cwd=HERE, stdin=subprocess.DEVNULL,
+                                        stdout=subprocess.DEVNULL, stderr=self.log)
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"o servidor terminou ao iniciar:\n{self.log_tail()}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/health", timeout=1):
+                    return self
+            except (OSError, urllib.error.URLError):
+                time.sleep(0.1)
+        self.__exit__(None, None, None)
+        raise RuntimeError(f"o servidor não respondeu em {STARTUP_TIMEOUT:.0f}s:\n{self.log_tail()}")
+
+    def __exit__(self, *exc):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self.spool is not None:
+            self.spool.cleanup()
+        if self.log is not None:
+            self.log.close()
+
+    def log_tail(self, size=2000):
+        self.log.seek(0)
+        return self.log.read().decode("utf-8", "replace")[-size:]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(target="demo", workload="mixed", concurrency=16, duration=10.0, warmup=2.0,
+                  server_args=(), keepalive=True, seed=1):
+    """Boot the server, run the load and return the result document"""
+    mix = WORKLOADS[workload]
+    if target == "simple" and DEMO_ONLY & set(mix):
+        raise ValueError(f"a carga {workload!r} precisa do demo_server; use --workload health ou pages")
+    with ServerProcess(target, server_args) as server:
+        totals, operations = asyncio.run(run_load("127.0.0.1", server.port, workload, concurrency,
+                                                  duration, warmup, keepalive, seed))
+        args = server.args
+    return {
+        "benchmark": "book2video-load",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "target": target,
+        "server_args": args,
+        "workload": workload,
+        "mix": mix,
+        "concurrency": concurrency,
+        "duration_seconds": duration,
+        "warmup_seconds": warmup,
+        "keepalive": keepalive,
+        "totals": totals,
+        "operations": operations,
+    }
+
+
+def compare(result, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Rows of (name, metric, before, after, change, regressed) for totals and each operation"""
+    rows = []
+    pairs = [("total", baseline["totals"], result["totals"])]
+    pairs += [(name, baseline["operations"][name], stats)
+              for name, stats in result["operations"].items() if name in baseline["operations"]]
+    for name, before, after in pairs:
+        for metric, higher_is_better in (("rps", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False)):
+            old, new = before.get(metric), after.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = change < -tolerance if higher_is_better else change > tolerance
+            rows.append((name, metric, old, new, change, regressed))
+    return rows
+
+
+def print_result(result):
+    print(f"🎯 {result['target']} · carga {result['workload']} · {result['concurrency']} clientes · "
+          f"{result['duration_seconds']:g}s (commit {result['git_commit'] or '?'})")
+    print(f"{'operação':<10} {'reqs':>8} {'RPS':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'erros':>7}  status")
+    rows = list(result["operations"].items()) + [("TOTAL", result["totals"])]
+    for name, stats in rows:
+        def fmt(value):
+            return f"{value:>9.2f}" if value is not None else f"{'-':>9}"
+        statuses = " ".join(f"{code}×{count}" for code, count in stats["statuses"].items())
+        if stats["failures"]:
+            statuses += " " + " ".join(f"{error}×{count}" for error, count in stats["failures"].items())
+        print(f"{name:<10} {stats['requests']:>8} {stats['rps']:>9.1f} {fmt(stats['p50_ms'])} "
+              f"{fmt(stats['p95_ms'])} {fmt(stats['p99_ms'])} {stats['errors']:>7}  {statuses}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Book2Video load benchmark")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="demo",
+                        help="servidor a testar (padrão: demo)")
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), default="mixed",
+                        help="mistura de operações (padrão: mixed; o simple só tem health e pages)")
+    parser.add_argument("--concurrency", type=int, default=16, help="clientes simultâneos (padrão: 16)")
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos medidos (padrão: 10)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="segundos de aquecimento fora da medição (padrão: 2)")
+    parser.add_argument("--server-args", default="",
+                        help='argumentos extras do servidor, ex.: "--mode asyncio --workers 2"')
+    parser.add_argument("--no-keepalive", action="store_true",
+                        help="uma conexão por requisição (o simple sem --workers atende uma conexão por vez)")
+    parser.add_argument("--seed", type=int, default=1, help="semente da escolha de operações (padrão: 1)")
+    parser.add_argument("--save", metavar="ARQUIVO", help="grava o resultado em JSON (baseline)")
+    parser.add_argument("--compare", metavar="ARQUIVO", help="compara com um baseline salvo; sai com 1 se regredir")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="variação aceita antes de acusar regressão (padrão: 0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    try:
+        result = run_benchmark(args.target, args.workload, args.concurrency, args.duration, args.warmup,
+                               shlex.split(args.server_args), not args.no_keepalive, args.seed)
+    except (RuntimeError, ValueError) as e:
+        print(f"❌ {e}")
+        return 2
+    print_result(result)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"💾 Resultado salvo em {args.save}")
+    if not args.compare:
+        return 0
+
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if (baseline.get("target"), baseline.get("workload"), baseline.get("concurrency")) != \
+            (result["target"], result["workload"], result["concurrency"]):
+        print("⚠️  Baseline com alvo/carga/concorrência diferentes; a comparação é só indicativa")
+    rows = compare(result, baseline, args.tolerance)
+    print(f"📊 Comparado com {args.compare} (commit {baseline.get('git_commit') or '?'}):")
+    for name, metric, old, new, change, regressed in rows:
+        mark = "❌" if regressed else "✅"
+        print(f"   {mark} {name:<10} {metric:<7} {old:>10.2f} → {new:>10.2f} ({change:+.1%})")
+    regressions = sum(1 for row in rows if row[-1])
+    if regressions:
+        print(f"❌ {regressions} métrica(s) piores que a tolerância de {args.tolerance:.0%}")
+        return 1
+    print("✅ Sem regressões")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Book2Video Deduplication Cache
+Resultados de processamento indexados pelo hash do conteúdo do livro
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+INDEX_FILENAME = "index.json"
+INDEX_LOCK_FILENAME = "index.lock"
+
+
+def result_key(content_sha256, target_duration_minutes, visual_style):
+    """Cache key for a book's bytes plus the options that shape the output"""
+    raw = f"{content_sha256}:{target_duration_minutes}:{visual_style}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path, data):
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class ResultCache:
+    """On-disk result cache with an LRU index and entry/size limits
+
+    The pre-fork workers share the directory and each keeps its own index
+    in memory. Saving merges with index.json under a file lock, so no worker
+    drops the others' entries. A miss on a key that another worker has
+    since written picks up the entry file.
+    """
+
+    def __init__(self, directory, max_entries=1000, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> {"size": bytes, "last_access": epoch}, do mais antigo para o mais recente
+        self._index = OrderedDict()
+        self._total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def get(self, key):
+        """Return the cached result for `key`, or None"""
+        with self._lock:
+            entry = self._index.get(key) or self._adopt(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            try:
+                with open(self._entry_path(key), "rb") as f:
+                    result = json.loads(f.read())
+            except (OSError, ValueError):
+                # Arquivo sumiu ou corrompeu: trata como miss e limpa o índice
+                self._drop(key)
+                self.misses += 1
+                return None
+            entry["last_access"] = time.time()
+            self._index.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        """Store a result and evict least recently used entries past the limits"""
+        data = json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            _atomic_write(self._entry_path(key), data)
+            old = self._index.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old["size"]
+            self._index[key] = {"size": len(data), "last_access": time.time()}
+            self._total_bytes += len(data)
+            self._evict()
+            self._save_index()
+
+    def flush(self):
+        """Persist the index (access order included)"""
+        with self._lock:
+            self._save_index()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _evict(self):
+        while self._index and (len(self._index) > self.max_entries
+                               or self._total_bytes > self.max_bytes):
+            key = next(iter(self._index))
+            self._drop(key)
+            self.evictions += 1
+
+    def _drop(self, key):
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry["size"]
+        try:
+            os.unlink(self._entry_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _adopt(self, key):
+        # Outro worker pode ter gravado a entrada depois que este leu o índice
+        try:
+            size = os.stat(self._entry_path(key)).st_size
+        except OSError:
+            return None
+        entry = self._index[key] = {"size": size, "last_access": time.time()}
+        self._total_bytes += size
+        return entry
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILENAME), "rb") as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+
+    def _load_index(self):
+        self._merge(self._read_index())
+        self._evict()
+
+    def _merge(self, stored):
+        """Add the entries of an index read from disk; the newest access time wins"""
+        merged = dict(self._index)
+        for key, entry in stored.items():
+            mine = merged.get(key)
+            if mine is not None:
+                if entry.get("last_access", 0) > mine["last_access"]:
+                    merged[key] = dict(mine, last_access=entry["last_access"])
+            elif os.path.exists(self._entry_path(key)):
+                # Sem o arquivo a entrada foi removida (por este ou outro worker)
+                merged[key] = entry
+        self._index = OrderedDict(sorted(merged.items(), key=lambda item: item[1].get("last_access", 0)))
+        self._total_bytes = sum(entry["size"] for entry in self._index.values())
+
+    @contextmanager
+    def _index_file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, INDEX_LOCK_FILENAME), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _save_index(self):
+        # Lê, mescla e grava sob o lock: com --workers N o último a gravar não apaga os outros
+        with self._index_file_lock():
+            self._merge(self._read_index())
+            self._evict()
+            data = json.dumps(self._index, separators=(",", ":")).encode("utf-8")
+            _atomic_write(os.path.join(self.directory, INDEX_FILENAME), data)
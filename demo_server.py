@@ -5,266 +5,185 @@ Roda com Python padrão, sem dependências externas
 Simula todo o sistema Book2Video funcionando
 """
 
+import argparse
+import hashlib
 import http.server
-import socketserver
 import json
 import urllib.parse
 import time
 import uuid
 from datetime import datetime
 import os
+import threading
 
-# Dados em memória para o demo
-users = {}
-projects = {}
-sessions = {}
+from auth_tokens import (AuthMixin, SessionManager, TokenSigner, add_auth_arguments, auth_secret,
+                         check_password, hash_password)
+from dedup_cache import ResultCache, result_key
+from events import ProjectEvents, WaiterSlots
+from memo_cache import DEFAULT_DISK_BYTES, DEFAULT_MEMORY_BYTES, DEFAULT_TTL_SECONDS, shared_cache
+from json_codec import BACKENDS as JSON_BACKENDS, PayloadTemplate, dumps as json_dumps, select_backend
+from project_index import InvalidCursor
+from metrics import (LATENCY_BUCKETS, MetricsMixin, counter_total, create_metrics, histogram_quantile,
+                     histogram_totals, load_snapshot, merge_snapshots)
+from jobs import DEFAULT_PRIORITY, JobScheduler, QueueFullError, add_job_arguments
+from records import User
+from rate_limit import RateLimitMixin, add_rate_limit_arguments, create_rate_limiter
+from router import Router, RoutingMixin
+from profiling import ProfilingMixin, add_profiling_arguments, create_profiler, token_matches
+from prefork import PreforkSupervisor, WorkerBoard, add_prefork_arguments, serve_until_terminated
+from serving import KeepAliveMixin, add_serving_arguments, configure_keepalive, create_server
+from static_assets import StaticAsset, etag_matches, send_asset
+from storage import MemoryStorage, add_storage_arguments, create_storage
+from uploads import (DEFAULT_MAX_UPLOAD_BYTES, DEFAULT_SPOOL_DIR, UploadError,
+                     UploadTooLarge, book_path, receive_upload)
 
-class Book2VideoHandler(http.server.SimpleHTTPRequestHandler):
+# Users/projects/sessions: em memória por padrão, SQLite com --storage sqlite
+store = MemoryStorage()
+DEMO_USER_ID = "demo_user_123"
+DEMO_EMAIL = "demo@book2video.com"
+# Chave dos tokens de sessão, definida antes de criar os processos
+token_signer = None
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Pre-fork (--workers N): placar compartilhado e índice deste processo
+WORKER_STATS_FIELDS = (
+    "total_users", "total_projects", "completed_projects",
+    "jobs_queued", "jobs_running", "jobs_completed", "jobs_failed", "job_workers",
+    "cache_hits", "cache_misses", "cache_evictions",
+)
+worker_board = None
+worker_id = 0
+storage_backend = "memory"
+
+# Fila de processamento, criada em start_demo_server
+scheduler = None
+render_seconds = 3.0
+# Provedores de IA reais ou o stub local (stub_ai_server.py); None = etapas simuladas
+ai_url = None
+ai_concurrency = None
+render_workers = None
+# Cache de memoização das saídas de IA por cena (memo_cache.py); None = desligado
+memo_options = None
+
+# Progresso dos projetos para /projects/{id}/events (SSE e long-poll)
+project_events = ProjectEvents()
+# Long-polls e streams SSE esperando ao mesmo tempo (por processo); None até open_worker_state
+event_waiters = None
+TERMINAL_STATUSES = ("completed", "failed")
+SSE_RETRY_MS = 3000
+SSE_HEARTBEAT_SECONDS = 15
+SSE_MAX_STREAM_SECONDS = 300
+LONG_POLL_TIMEOUT = 25
+MAX_LONG_POLL_TIMEOUT = 60
+# Espera em fatias curtas para notar parada graciosa (e mudanças em outros processos)
+EVENT_WAIT_SLICE = 1.0
+STORE_RECHECK_SECONDS = 2.0
+
+# Uploads vão em blocos para o spool; corpos JSON são pequenos
+spool_dir = DEFAULT_SPOOL_DIR
+max_upload_bytes = DEFAULT_MAX_UPLOAD_BYTES
+MAX_JSON_BODY_BYTES = 64 * 1024
+
+# Resultados já processados, indexados por hash do livro + opções
+result_cache = None
+DEFAULT_TARGET_DURATION_MINUTES = 3
+DEFAULT_VISUAL_STYLE = "educational"
+
+# Partes fixas do projeto demo de serve_project_detail
+DEMO_PROJECT_TEMPLATE = PayloadTemplate({
+    "title": "Demo Project - O Pequeno Príncipe", 
+    "status": "completed",
+    "original_filename": "pequeno_principe.txt",
+    "file_size_bytes": 15420,
+    "target_duration_minutes": 3,
+    "visual_style": "educational",
+    "video_url": "https://demo.book2video.com/videos/demo.mp4",
+    "thumbnail_url": "https://demo.book2video.com/thumbs/demo.jpg",
+    "processing_time_seconds": 127,
+    "quality_rating": 9.2,
+    "cost_usd": 0.12,
+    "scenes": [
+        {
+            "scene_number": 1,
+            "narration": "Em um pequeno planeta, não maior que uma casa, vivia um pequeno príncipe...",
+            "visual_description": "Um pequeno asteroide flutuando no espaço com uma figura pequena e uma única rosa",
+            "duration_seconds": 45,
+            "emotional_tone": "contemplativo"
+        },
+        {
+            "scene_number": 2,
+            "narration": "O pequeno príncipe aprendeu com uma sábia raposa que o essencial é invisível aos olhos...",
+            "visual_description": "Uma raposa dourada e o pequeno príncipe sentados juntos em um campo ao pôr do sol",
+            "duration_seconds": 52,
+            "emotional_tone": "inspirador"
+        }
+    ],
+    "demo_mode": True
+})
+
+# Páginas HTML (pages.py): importadas e comprimidas no primeiro acesso, não na partida
+static_assets = {}
+static_assets_lock = threading.Lock()
+
+def page_asset(name):
+    """Pre-compressed StaticAsset of one HTML page, built on first use"""
+    asset = static_assets.get(name)
+    if asset is None:
+        with static_assets_lock:
+            asset = static_assets.get(name)
+            if asset is None:
+                import pages
+                html, max_age = pages.PAGES[name]
+                asset = static_assets[name] = StaticAsset(html, max_age=max_age)
+    return asset
+
+ROUTES = [
+    ("GET", "/", "serve_homepage"),
+    ("GET", "/health", "serve_health"),
+    ("GET", "/stats", "serve_stats"),
+    ("GET", "/metrics", "serve_metrics"),
+    ("GET", "/demo", "serve_demo_page"),
+    ("GET", "/projects", "serve_projects"),
+    ("GET", "/projects/{project_id}", "serve_project_detail"),
+    ("GET", "/jobs/{job_id}", "serve_job"),
+    ("POST", "/auth/register", "handle_register"),
+    ("POST", "/auth/login", "handle_login"),
+    ("POST", "/auth/logout", "handle_logout"),
+    ("POST", "/projects/upload", "handle_upload"),
+    ("GET", "/projects/{project_id}/events", "serve_project_events"),
+    ("POST", "/projects/{project_id}/process", "handle_process"),
+    ("GET", "/admin/profiling", "serve_profiling"),
+    ("POST", "/admin/profiling", "handle_profiling_update"),
+]
+# Rotas que --api-only remove
+HTML_ROUTES = frozenset({"serve_homepage", "serve_demo_page"})
+
+def api_routes():
+    return [route for route in ROUTES if route[2] not in HTML_ROUTES]
+
+class Book2VideoHandler(ProfilingMixin, MetricsMixin, AuthMixin, RateLimitMixin, RoutingMixin, KeepAliveMixin, http.server.SimpleHTTPRequestHandler):
     """Handler customizado para simular a API Book2Video"""
     
-    def do_GET(self):
-        """Handle GET requests"""
-        path = self.path.split('?')[0]
-        
-        if path == '/':
-            self.serve_homepage()
-        elif path == '/health':
-            self.serve_health()
-        elif path == '/stats':
-            self.serve_stats()
-        elif path == '/demo':
-            self.serve_demo_page()
-        elif path == '/projects':
-            self.serve_projects()
-        elif path.startswith('/projects/'):
-            project_id = path.split('/')[-1]
-            self.serve_project_detail(project_id)
-        else:
-            self.serve_404()
-    
-    def do_POST(self):
-        """Handle POST requests"""
-        path = self.path.split('?')[0]
-        
-        if path == '/auth/register':
-            self.handle_register()
-        elif path == '/auth/login':
-            self.handle_login()
-        elif path == '/projects/upload':
-            self.handle_upload()
-        elif path.startswith('/projects/') and path.endswith('/process'):
-            project_id = path.split('/')[-2]
-            self.handle_process(project_id)
-        else:
-            self.serve_404()
+    rate_limit_rules = {
+        "handle_login": "login",
+        "handle_register": "login",
+        "handle_upload": "upload",
+        "serve_project_detail": "status",
+        "serve_job": "status",
+        "serve_project_events": "status",
+    }
+    rate_limit_exempt = frozenset({"serve_health", "serve_metrics"})
+    auth_public = frozenset({"serve_homepage", "serve_health", "serve_metrics", "serve_demo_page",
+                             "serve_404", "handle_register", "handle_login",
+                             "serve_profiling", "handle_profiling_update"})
+    router = Router(ROUTES)
+    # --api-only: sem páginas HTML e com 404 em JSON
+    api_only = False
     
     def serve_homepage(self):
         """Serve the main demo page"""
-        html = f"""
-<!DOCTYPE html>
-<html lang="pt-BR">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>📚🎬 Book2Video Demo</title>
-    <style>
-        body {{ 
-            font-family: 'Segoe UI', sans-serif; 
-            margin: 0; 
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            min-height: 100vh;
-        }}
-        .container {{ 
-            max-width: 1200px; 
-            margin: 0 auto; 
-            padding: 20px; 
-        }}
-        .header {{ 
-            text-align: center; 
-            margin-bottom: 40px; 
-        }}
-        .card {{ 
-            background: rgba(255,255,255,0.1); 
-            border-radius: 15px; 
-            padding: 30px; 
-            margin: 20px 0; 
-            backdrop-filter: blur(10px);
-        }}
-        .button {{ 
-            background: #4CAF50; 
-            color: white; 
-            padding: 15px 30px; 
-            border: none; 
-            border-radius: 8px; 
-            font-size: 16px; 
-            cursor: pointer; 
-            margin: 10px; 
-            text-decoration: none;
-            display: inline-block;
-            transition: all 0.3s;
-        }}
-        .button:hover {{ 
-            background: #45a049; 
-            transform: translateY(-2px);
-        }}
-        .status {{ 
-            background: rgba(76, 175, 80, 0.2); 
-            border-left: 4px solid #4CAF50; 
-            padding: 15px; 
-            margin: 15px 0; 
-            border-radius: 5px;
-        }}
-        .features {{ 
-            display: grid; 
-            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); 
-            gap: 20px; 
-            margin: 30px 0; 
-        }}
-        .feature {{ 
-            background: rgba(255,255,255,0.05); 
-            padding: 20px; 
-            border-radius: 10px; 
-            text-align: center;
-        }}
-        .api-section {{ 
-            background: rgba(0,0,0,0.2); 
-            padding: 20px; 
-            border-radius: 10px; 
-            margin: 20px 0;
-        }}
-        .endpoint {{ 
-            background: rgba(255,255,255,0.1); 
-            padding: 10px; 
-            margin: 5px 0; 
-            border-radius: 5px; 
-            font-family: monospace;
-        }}
-        .demo-upload {{ 
-            background: rgba(255,255,255,0.1); 
-            padding: 20px; 
-            border-radius: 10px; 
-            margin: 20px 0;
-        }}
-        input[type="file"], input[type="text"] {{ 
-            background: rgba(255,255,255,0.9); 
-            color: #333; 
-            padding: 10px; 
-            border: none; 
-            border-radius: 5px; 
-            margin: 10px 0; 
-            width: 100%;
-            max-width: 400px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>📚🎬 Book2Video Demo System</h1>
-            <p>Sistema completo funcionando - Converte livros em vídeos com IA</p>
-        </div>
-        
-        <div class="status">
-            <h3>✅ Sistema Online e Funcionando!</h3>
-            <p><strong>Tempo online:</strong> {datetime.now().strftime('%H:%M:%S')}</p>
-            <p><strong>Usuários registrados:</strong> {len(users)}</p>
-            <p><strong>Projetos criados:</strong> {len(projects)}</p>
-            <p><strong>Status:</strong> 🟢 Operacional</p>
-        </div>
-        
-        <div class="features">
-            <div class="feature">
-                <h3>🤖 IA Avançada</h3>
-                <p>OpenAI GPT-4 + ElevenLabs</p>
-                <p>Converte texto em cenas cinematográficas</p>
-            </div>
-            <div class="feature">
-                <h3>🎬 Vídeos Profissionais</h3>
-                <p>FFmpeg + Pipeline automático</p>
-                <p>MP4 com narração e imagens</p>
-            </div>
-            <div class="feature">
-                <h3>📊 Monitoramento</h3>
-                <p>Grafana + Prometheus</p>
-                <p>Métricas em tempo real</p>
-            </div>
-        </div>
-        
-        <div class="card">
-            <h2>🧪 Testar Sistema</h2>
-            <p>Escolha como quer testar o Book2Video:</p>
-            
-            <a href="/demo" class="button">📱 Interface Demo</a>
-            <a href="/health" class="button">🔍 Health Check</a>
-            <a href="/stats" class="button">📊 Estatísticas</a>
-            <a href="/projects" class="button">📋 Ver Projetos</a>
-        </div>
-        
-        <div class="api-section">
-            <h2>🔌 API Endpoints Disponíveis</h2>
-            <div class="endpoint">GET /health - Verificar saúde do sistema</div>
-            <div class="endpoint">POST /auth/register - Registrar usuário</div>
-            <div class="endpoint">POST /auth/login - Login usuário</div>
-            <div class="endpoint">POST /projects/upload - Upload de livro</div>
-            <div class="endpoint">POST /projects/{{id}}/process - Processar com IA</div>
-            <div class="endpoint">GET /projects - Listar projetos</div>
-            <div class="endpoint">GET /stats - Estatísticas do sistema</div>
-        </div>
-        
-        <div class="demo-upload">
-            <h2>📁 Demo Upload Rápido</h2>
-            <p>Simule um upload de livro:</p>
-            <form onsubmit="demoUpload(event)">
-                <input type="text" placeholder="Título do livro" id="title" value="O Pequeno Príncipe"><br>
-                <input type="file" accept=".txt,.pdf,.docx" id="file"><br>
-                <button type="submit" class="button">🚀 Processar com IA</button>
-            </form>
-            <div id="result"></div>
-        </div>
-    </div>
-    
-    <script>
-        async function demoUpload(event) {{
-            event.preventDefault();
-            
-            const result = document.getElementById('result');
-            result.innerHTML = '<p>🤖 Processando com IA...</p>';
-            
-            // Simular processamento
-            setTimeout(() => {{
-                const projectId = Math.random().toString(36).substr(2, 9);
-                result.innerHTML = `
-                    <div style="background: rgba(76, 175, 80, 0.2); padding: 15px; border-radius: 5px; margin: 10px 0;">
-                        <h3>✅ Processamento Concluído!</h3>
-                        <p><strong>Projeto ID:</strong> ${{projectId}}</p>
-                        <p><strong>Cenas geradas:</strong> 4 cenas</p>
-                        <p><strong>Duração:</strong> 3 minutos 27 segundos</p>
-                        <p><strong>Custo:</strong> $0.12</p>
-                        <p><strong>Qualidade:</strong> 9.2/10</p>
-                        <p><strong>Status:</strong> 🎬 Vídeo pronto!</p>
-                        <a href="/projects/${{projectId}}" class="button">👀 Ver Detalhes</a>
-                    </div>
-                `;
-            }}, 3000);
-        }}
-        
-        // Auto-refresh stats
-        setInterval(() => {{
-            const time = document.querySelector('.status p strong');
-            if (time) {{
-                time.nextSibling.textContent = ' ' + new Date().toLocaleTimeString();
-            }}
-        }}, 1000);
-    </script>
-</body>
-</html>
-        """
-        
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html; charset=utf-8')
-        self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+        send_asset(self, page_asset("homepage"))
     
     def serve_health(self):
         """Health check endpoint"""
@@ -285,294 +204,981 @@ class Book2VideoHandler(http.server.SimpleHTTPRequestHandler):
         self.send_json_response(health_data)
     
     def serve_stats(self):
-        """System statistics"""
+        """System statistics, derived from the same counters as /metrics"""
+        snapshot = metrics_snapshot()
         stats = {
-            "total_users": len(users),
-            "total_projects": len(projects),
-            "completed_projects": len([p for p in projects.values() if p.get('status') == 'completed']),
-            "success_rate": 95.7,
+            "total_users": store.count_users(),
+            "total_projects": store.count_projects(),
+            "completed_projects": store.count_projects("completed"),
+            "projects_by_status": store.project_status_counts(),
             "system_status": "operational",
             "version": "1.0.0",
-            "uptime": "running",
+            "uptime_seconds": int(time.time() - server_start_time),
             "demo_mode": True,
-            "processing_queue": 0,
-            "average_processing_time": 127,
-            "total_videos_generated": 42,
-            "ai_cost_savings": "78%"
+            "processing_queue": scheduler.queue_depth(),
+            "jobs": scheduler.stats(),
+            "dedup_cache": result_cache.stats(),
+            "ai_memo_cache": memo_stats(snapshot),
+            "rate_limit": self.rate_limiter.stats() if self.rate_limiter else None,
+            "auth": self.session_manager.stats(),
+            "event_waiters": event_waiters.stats(),
         }
+        stats.update(derived_stats(snapshot))
+        if worker_board is not None:
+            worker_board.publish(worker_id, worker_snapshot())
+            stats.update(aggregate_worker_stats(stats))
         
         self.send_json_response(stats)
     
-    def serve_demo_page(self):
-        """Demo interface page"""
-        html = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>📱 Book2Video Interface Demo</title>
-    <style>
-        body { font-family: Arial, sans-serif; margin: 20px; background: #f5f5f5; }
-        .container { max-width: 800px; margin: 0 auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 4px 6px rgba(0,0,0,0.1); }
-        .button { background: #4CAF50; color: white; padding: 10px 20px; border: none; border-radius: 5px; cursor: pointer; margin: 5px; }
-        .result { background: #e8f5e8; padding: 15px; margin: 15px 0; border-radius: 5px; }
-        .processing { background: #fff3cd; padding: 15px; margin: 15px 0; border-radius: 5px; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>📱 Book2Video - Interface Demo</h1>
-        <p>Interface simulada do sistema completo</p>
-        
-        <h3>🔐 1. Autenticação</h3>
-        <button onclick="demoLogin()" class="button">Login Demo</button>
-        <div id="auth-result"></div>
-        
-        <h3>📁 2. Upload de Livro</h3>
-        <input type="file" id="book-file" accept=".txt,.pdf,.docx">
-        <button onclick="demoUpload()" class="button">Upload</button>
-        <div id="upload-result"></div>
-        
-        <h3>🤖 3. Processamento IA</h3>
-        <button onclick="demoProcess()" class="button">Processar com IA</button>
-        <div id="process-result"></div>
-        
-        <h3>📊 4. Status do Sistema</h3>
-        <button onclick="loadStats()" class="button">Ver Estatísticas</button>
-        <div id="stats-result"></div>
-    </div>
-    
-    <script>
-        function demoLogin() {
-            document.getElementById('auth-result').innerHTML = '<div class="result">✅ Login realizado com sucesso!<br>Token: demo_token_123</div>';
-        }
-        
-        function demoUpload() {
-            document.getElementById('upload-result').innerHTML = '<div class="result">✅ Livro enviado com sucesso!<br>Projeto ID: proj_demo_456</div>';
-        }
-        
-        function demoProcess() {
-            const result = document.getElementById('process-result');
-            result.innerHTML = '<div class="processing">🤖 Processando com IA GPT-4...</div>';
-            
-            setTimeout(() => {
-                result.innerHTML = `
-                    <div class="result">
-                        ✅ Processamento concluído!<br>
-                        🎬 4 cenas geradas<br>
-                        ⏱️ Tempo: 2min 34s<br>
-                        💰 Custo: $0.15<br>
-                        📊 Qualidade: 9.1/10
-                    </div>
-                `;
-            }, 3000);
-        }
-        
-        async function loadStats() {
-            try {
-                const response = await fetch('/stats');
-                const stats = await response.json();
-                document.getElementById('stats-result').innerHTML = `
-                    <div class="result">
-                        📊 Estatísticas do Sistema:<br>
-                        👥 Usuários: ${stats.total_users}<br>
-                        📋 Projetos: ${stats.total_projects}<br>
-                        ✅ Taxa sucesso: ${stats.success_rate}%<br>
-                        🎬 Vídeos gerados: ${stats.total_videos_generated}<br>
-                        💰 Economia IA: ${stats.ai_cost_savings}
-                    </div>
-                `;
-            } catch(e) {
-                document.getElementById('stats-result').innerHTML = '<div class="result">Carregando estatísticas...</div>';
-            }
-        }
-    </script>
-</body>
-</html>
-        """
-        
+    def serve_metrics(self):
+        """Prometheus text exposition (summed over every worker process)"""
+        gauges = [
+            ("book2video_jobs_queued", "Jobs waiting for a processing worker", (), scheduler.queue_depth()),
+            ("book2video_jobs_running", "Jobs being processed right now", (), scheduler.stats()["running"]),
+            ("book2video_uptime_seconds", "Seconds since this server started", (),
+             round(time.time() - server_start_time, 3)),
+        ]
+        if worker_board is not None:
+            totals = worker_board.totals()
+            gauges[0] = gauges[0][:3] + (int(totals["jobs_queued"]),)
+            gauges[1] = gauges[1][:3] + (int(totals["jobs_running"]),)
+            gauges.append(("book2video_worker_processes", "Live server worker processes", (),
+                           len(worker_board.rows())))
+        body = self.metrics.render(metrics_snapshot(), gauges).encode("utf-8")
         self.send_response(200)
-        self.send_header('Content-type', 'text/html; charset=utf-8')
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+        self.wfile.write(body)
+    
+    def serve_demo_page(self):
+        """Demo interface page"""
+        send_asset(self, page_asset("demo"))
     
     def serve_projects(self):
-        """List projects"""
-        project_list = []
-        for pid, project in projects.items():
-            project_list.append({
-                "id": pid,
-                "title": project.get("title", "Untitled"),
-                "status": project.get("status", "uploaded"),
-                "created_at": project.get("created_at", datetime.now().isoformat())
-            })
+        """List projects one page at a time (?limit=&cursor=&status=&owner=&sort=)"""
+        split = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(split.query)
+        try:
+            limit = min(max(int(query.get('limit', [DEFAULT_PAGE_SIZE])[0]), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            self.send_json_response({"error": "Invalid limit"}, 400)
+            return
+        sort = query.get('sort', ['-created_at'])[0]
+        if sort not in ('created_at', '-created_at'):
+            self.send_json_response({"error": "sort must be created_at or -created_at"}, 400)
+            return
+        
+        try:
+            page, next_cursor = store.list_projects(
+                limit,
+                cursor=query.get('cursor', [None])[0],
+                status=query.get('status', [None])[0],
+                owner_id=query.get('owner', [None])[0],
+                descending=sort.startswith('-')
+            )
+        except InvalidCursor as e:
+            self.send_json_response({"error": str(e)}, 400)
+            return
+        project_list = [{
+            "id": project["id"],
+            "title": project.get("title", "Untitled"),
+            "status": project.get("status", "uploaded"),
+            "owner_id": project.get("owner_id"),
+            "version": project.get("version", 1),
+            "created_at": project["created_at"]
+        } for project in page]
         
-        self.send_json_response(project_list)
+        # A lista continua sendo o corpo; a próxima página vai nos cabeçalhos
+        headers = {}
+        if next_cursor:
+            query['cursor'] = [next_cursor]
+            next_url = f"{split.path}?{urllib.parse.urlencode(query, doseq=True)}"
+            headers["X-Next-Cursor"] = next_cursor
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        self.send_json_response(project_list, headers=headers)
     
     def serve_project_detail(self, project_id):
-        """Project detail"""
-        if project_id in projects:
-            project = projects[project_id]
-            self.send_json_response(project)
+        """Project detail with ETag/304, ?fields= projection and ?since_version= deltas"""
+        project = store.get_project(project_id)
+        if project is not None:
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+            fields = None
+            if 'fields' in query:
+                fields = frozenset(name.strip() for value in query['fields'] for name in value.split(',') if name.strip())
+            since_version = None
+            if 'since_version' in query:
+                try:
+                    since_version = int(query['since_version'][0])
+                except ValueError:
+                    self.send_json_response({"error": "Invalid since_version"}, 400)
+                    return
+            etag = project_etag(project, fields, since_version)
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if etag_matches(self.headers.get('If-None-Match'), (etag,)):
+                self.send_response(304)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                return
+            self.send_json_response(project_view(project, fields, since_version), headers=headers)
         else:
-            # Create demo project
-            demo_project = {
+            # Projeto demo: só id e created_at mudam, o resto é serializado uma vez
+            dynamic_fields = {
                 "id": project_id,
-                "title": "Demo Project - O Pequeno Príncipe", 
-                "status": "completed",
-                "original_filename": "pequeno_principe.txt",
-                "file_size_bytes": 15420,
-                "target_duration_minutes": 3,
-                "visual_style": "educational",
-                "video_url": "https://demo.book2video.com/videos/demo.mp4",
-                "thumbnail_url": "https://demo.book2video.com/thumbs/demo.jpg",
-                "processing_time_seconds": 127,
-                "quality_rating": 9.2,
-                "cost_usd": 0.12,
-                "scenes": [
-                    {
-                        "scene_number": 1,
-                        "narration": "Em um pequeno planeta, não maior que uma casa, vivia um pequeno príncipe...",
-                        "visual_description": "Um pequeno asteroide flutuando no espaço com uma figura pequena e uma única rosa",
-                        "duration_seconds": 45,
-                        "emotional_tone": "contemplativo"
-                    },
-                    {
-                        "scene_number": 2,
-                        "narration": "O pequeno príncipe aprendeu com uma sábia raposa que o essencial é invisível aos olhos...",
-                        "visual_description": "Uma raposa dourada e o pequeno príncipe sentados juntos em um campo ao pôr do sol",
-                        "duration_seconds": 52,
-                        "emotional_tone": "inspirador"
-                    }
-                ],
-                "created_at": datetime.now().isoformat(),
-                "demo_mode": True
+                "created_at": datetime.now().isoformat()
             }
-            self.send_json_response(demo_project)
+            self.send_json_response(DEMO_PROJECT_TEMPLATE.render(dynamic_fields, self.wants_pretty()))
     
     def handle_register(self):
         """Handle user registration"""
         content_length = int(self.headers.get('Content-Length', 0))
-        if content_length > 0:
+        if content_length > MAX_JSON_BODY_BYTES:
+            self.close_connection = True
+            self.send_json_response({"error": "Request body too large"}, 413)
+        elif content_length > 0:
             post_data = self.rfile.read(content_length)
             try:
                 data = json.loads(post_data.decode('utf-8'))
+                email = normalize_email(data.get("email"))
+                if not email or not data.get("password"):
+                    self.send_json_response({"error": "Email and password are required"}, 400)
+                    return
                 user_id = str(uuid.uuid4())
-                users[user_id] = {
+                user = {
                     "id": user_id,
-                    "email": data.get("email", "demo@book2video.com"),
+                    "email": email,
                     "full_name": data.get("full_name", "Demo User"),
                     "subscription_tier": "free",
-                    "created_at": datetime.now().isoformat()
+                    "password_hash": hash_password(str(data["password"])),
+                    "created_at": time.time()
                 }
-                self.send_json_response(users[user_id])
+                # O email da conta demo é reservado: ela entra pelo login sem email
+                if email == DEMO_EMAIL or not store.add_user(user):
+                    self.send_json_response({"error": "Email already registered"}, 409)
+                    return
+                self.send_json_response(public_user(user))
             except:
                 self.send_json_response({"error": "Invalid data"}, 400)
         else:
             self.send_json_response({"error": "No data"}, 400)
     
     def handle_login(self):
-        """Handle user login"""
+        """Handle user login; without an email it signs in the demo user (not with --require-auth)"""
+        data = self.read_json_body()
+        if data is None:
+            self.send_json_response({"error": "Invalid data"}, 400)
+            return
+        if not data.get("email") and self.require_auth:
+            # Com autenticação obrigatória o login demo seria um atalho para qualquer um
+            self.send_json_response({"error": "Email and password are required"}, 400)
+            return
+        if data.get("email"):
+            user = store.get_user_by_email(normalize_email(data["email"]))
+            # Sem password_hash (ex.: a conta demo) não há login por email
+            if (user is None or not user.get("password_hash")
+                    or not check_password(str(data.get("password") or ""), user["password_hash"])):
+                self.send_json_response({"error": "Invalid email or password"}, 401)
+                return
+        else:
+            user = demo_user()
+        token, session = self.session_manager.create(user)
         response = {
-            "access_token": "demo_token_" + str(int(time.time())),
+            "access_token": token,
             "token_type": "bearer",
-            "user": {
-                "id": "demo_user_123",
-                "email": "demo@book2video.com",
-                "full_name": "Demo User",
-                "subscription_tier": "free",
-                "created_at": datetime.now().isoformat()
-            }
+            "expires_in": self.session_manager.ttl_seconds,
+            "expires_at": datetime.fromtimestamp(session["expires_at"]).isoformat(),
+            "user": public_user(user)
         }
         self.send_json_response(response)
     
+    def handle_logout(self):
+        """Revoke the session of the Bearer token"""
+        if self.auth is None:
+            self.send_unauthorized("authentication required")
+            return
+        session_id, _, _, expires = self.auth
+        self.session_manager.revoke(session_id, expires)
+        self.send_json_response({"message": "Logged out", "session_id": session_id})
+    
+    def admin_allowed(self):
+        """Admin routes exist only with --profiling and an admin token; 404 otherwise"""
+        profiler = self.profiler
+        if profiler is None or not profiler.admin_token:
+            self.serve_404()
+            return False
+        if not token_matches(self.headers.get("X-Admin-Token", ""), profiler.admin_token):
+            self.send_json_response({"error": "Forbidden"}, 403)
+            return False
+        return True
+    
+    def serve_profiling(self):
+        """Profiling settings, recent cProfile captures and slow requests of this process"""
+        if not self.admin_allowed():
+            return
+        profiler = self.profiler
+        self.send_json_response({
+            "worker_id": worker_id,
+            "pid": os.getpid(),
+            "profiling": profiler.stats(),
+            "profiles": list(profiler.recent_profiles),
+            "slow_requests": list(profiler.recent_slow),
+        })
+    
+    def handle_profiling_update(self):
+        """Change sample_rate / slow_ms at run time (only in the process that answers)"""
+        if not self.admin_allowed():
+            return
+        data = self.read_json_body()
+        if data is None:
+            self.send_json_response({"error": "Invalid data"}, 400)
+            return
+        try:
+            self.profiler.configure(sample_rate=data.get("sample_rate"), slow_ms=data.get("slow_ms"))
+        except (TypeError, ValueError) as e:
+            self.send_json_response({"error": str(e)}, 400)
+            return
+        self.send_json_response({"worker_id": worker_id, "profiling": self.profiler.settings()})
+    
     def handle_upload(self):
         """Handle file upload"""
         project_id = str(uuid.uuid4())
-        projects[project_id] = {
+        try:
+            upload = receive_upload(self.headers, self.rfile, spool_dir, max_upload_bytes)
+        except UploadTooLarge as e:
+            # O corpo não foi lido até o fim, então a conexão não pode ser reaproveitada
+            self.close_connection = True
+            self.send_json_response({"error": str(e)}, 413)
+            return
+        except UploadError as e:
+            self.close_connection = True
+            self.send_json_response({"error": str(e)}, 400)
+            return
+        
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        filename = upload["filename"] or query.get("filename", ["book.txt"])[0]
+        title = (upload["fields"].get("title") or query.get("title", [None])[0]
+                 or os.path.splitext(filename)[0])
+        options = {key: values[0] for key, values in query.items()}
+        options.update(upload["fields"])
+        try:
+            target_duration, visual_style = processing_options(options)
+        except ValueError as e:
+            self.send_json_response({"error": str(e)}, 400)
+            return
+        project = {
             "id": project_id,
-            "title": "Demo Upload Project",
+            "title": title,
             "status": "uploaded",
-            "file_size": 12500,
-            "created_at": datetime.now().isoformat()
+            "owner_id": self.auth[1] if self.auth else DEMO_USER_ID,
+            "original_filename": filename,
+            "content_type": upload["content_type"],
+            "file_size": upload["size"],
+            "sha256": upload["sha256"],
+            "target_duration_minutes": target_duration,
+            "visual_style": visual_style,
+            "created_at": time.time()
         }
+        cached = result_cache.get(result_key(upload["sha256"], target_duration, visual_style))
+        if cached is not None:
+            apply_cached_result(project, cached)
+        store.add_project(project)
         
         response = {
             "message": "File uploaded successfully",
             "project_id": project_id,
-            "status": "uploaded",
-            "file_size": 12500,
-            "processing_started": True
+            "status": project["status"],
+            "title": title,
+            "file_size": upload["size"],
+            "sha256": upload["sha256"],
+            "duplicate_upload": upload["duplicate"],
+            "cache_hit": cached is not None,
+            "processing_started": False
         }
+        if cached is not None:
+            response["result"] = cached
         self.send_json_response(response)
     
     def handle_process(self, project_id):
-        """Handle AI processing"""
-        if project_id not in projects:
-            projects[project_id] = {"id": project_id, "title": "Demo Project"}
+        """Queue AI processing for a project"""
+        options = self.read_json_body()
+        if options is None:
+            self.send_json_response({"error": "Invalid data"}, 400)
+            return
+        try:
+            priority = min(max(int(options.get("priority", DEFAULT_PRIORITY)), 0), 9)
+        except (TypeError, ValueError):
+            self.send_json_response({"error": "Invalid priority"}, 400)
+            return
+        defaults = store.get_project(project_id) or {}
+        defaults.update(options)
+        try:
+            target_duration, visual_style = processing_options(defaults)
+        except ValueError as e:
+            self.send_json_response({"error": str(e)}, 400)
+            return
         
-        # Update project status
-        projects[project_id].update({
-            "status": "completed",
-            "processing_time_seconds": 127,
-            "cost_usd": 0.12,
-            "scenes_generated": 4,
-            "quality_rating": 9.1
+        # Projeto desconhecido vira um projeto demo (não faz nada se já existir)
+        store.add_project({
+            "id": project_id,
+            "title": "Demo Project",
+            "status": "uploaded",
+            "owner_id": self.auth[1] if self.auth else DEMO_USER_ID,
+            "created_at": time.time()
         })
+        content_sha256 = defaults.get("sha256")
+        cache_key = None
+        cached = None
+        if content_sha256:
+            cache_key = result_key(content_sha256, target_duration, visual_style)
+            cached = result_cache.get(cache_key)
+        
+        busy = {}
+        
+        def claim(project):
+            if project.get("status") in ("queued", "running"):
+                busy.update(job_id=project.get("job_id"), status=project["status"])
+                return False
+            project["target_duration_minutes"] = target_duration
+            project["visual_style"] = visual_style
+            if cached is not None:
+                apply_cached_result(project, cached)
+        
+        project = store.update_project(project_id, claim)
+        if busy:
+            self.send_json_response({
+                "error": "Project is already being processed",
+                "project_id": project_id,
+                "job_id": busy["job_id"],
+                "status": busy["status"]
+            }, 409)
+            return
+        payload = {
+            "project_id": project_id,
+            "title": project.get("title", "Demo Book"),
+            "book_path": book_path(spool_dir, content_sha256) if content_sha256 else None,
+            "target_duration_minutes": target_duration,
+            "visual_style": visual_style,
+            "cache_key": cache_key,
+            "render_seconds": render_seconds,
+            "ai_url": ai_url,
+            "ai_concurrency": ai_concurrency,
+            "memo": memo_options if ai_url else None,
+            "render_workers": render_workers,
+            "render_dir": os.path.join(spool_dir, "renders", project_id) if ai_url else None
+        }
+        
+        if cached is not None:
+            publish_project_status(project)
+            response = {
+                "message": "AI processing reused from cache",
+                "project_id": project_id,
+                "status": "completed",
+                "cache_hit": True,
+                "demo_mode": True
+            }
+            response.update(cached)
+            self.send_json_response(response)
+            return
+        
+        try:
+            job = scheduler.submit(project_id, payload, priority)
+        except QueueFullError as e:
+            self.send_json_response({"error": str(e), "retry_after_seconds": 5}, 429,
+                                    headers={"Retry-After": "5"})
+            return
         
         response = {
-            "message": "AI processing completed successfully",
+            "message": "AI processing queued",
             "project_id": project_id,
-            "status": "completed",
-            "processing_time_seconds": 127,
-            "total_duration_seconds": 207,
-            "scenes_generated": 4,
-            "cost_usd": 0.12,
-            "book_analysis": {
-                "title": "Demo Book",
-                "word_count": 1250,
-                "estimated_reading_time_minutes": 6,
-                "chapters_detected": 3
-            },
+            "job_id": job.id,
+            "status": "queued",
+            "priority": priority,
+            "cache_hit": False,
+            "queue_depth": scheduler.queue_depth(),
             "demo_mode": True
         }
+        self.send_json_response(response, 202)
+    
+    def serve_project_events(self, project_id):
+        """Processing progress as Server-Sent Events, or long-poll with ?since=<version>"""
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        if project_events.since(project_id, 0)[0] == 0:
+            project = store.get_project(project_id)
+            if project is None:
+                self.send_json_response({"error": "Project not found"}, 404)
+                return
+            publish_project_status(project)
+        if 'since' in query:
+            self.serve_project_events_poll(project_id, query)
+        else:
+            self.serve_project_events_stream(project_id)
+    
+    def serve_project_events_poll(self, project_id, query):
+        """Long-poll: answer as soon as there is anything newer than `since`"""
+        try:
+            since = int(query['since'][0])
+            timeout = min(max(float(query.get('timeout', [LONG_POLL_TIMEOUT])[0]), 0), MAX_LONG_POLL_TIMEOUT)
+        except ValueError:
+            self.send_json_response({"error": "since and timeout must be numbers"}, 400)
+            return
+        if timeout <= 0 or not event_waiters.try_acquire():
+            # Sem vaga para esperar: responde já e o cliente volta em SSE_RETRY_MS (polling curto)
+            version, snapshot, events = project_events.since(project_id, since)
+            headers = {"Retry-After": str(SSE_RETRY_MS // 1000)} if timeout > 0 and not events else None
+            self.send_json_response(dict(snapshot, version=version, events=events), headers=headers)
+            return
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                version, snapshot, events = project_events.wait(
+                    project_id, since, max(min(EVENT_WAIT_SLICE, remaining), 0))
+                if (events or remaining <= 0 or snapshot.get("status") in TERMINAL_STATUSES
+                        or getattr(self.server, "draining", False)):
+                    break
+                recheck_project_status(project_id, snapshot)
+        finally:
+            event_waiters.release()
+        response = dict(snapshot, version=version, events=events)
         self.send_json_response(response)
     
-    def serve_404(self):
-        """Serve 404 page"""
-        self.send_response(404)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        html = """
-        <html><body>
-        <h1>404 - Endpoint não encontrado</h1>
-        <p><a href="/">← Voltar para página inicial</a></p>
-        </body></html>
+    def serve_project_events_stream(self, project_id):
+        """Server-Sent Events until the project finishes (or the stream times out)
+
+        With every waiter slot taken the stream sends what is already known
+        and closes; EventSource reconnects after `retry` and tries again.
         """
-        self.wfile.write(html.encode('utf-8'))
+        try:
+            last_id = int(self.headers.get('Last-Event-ID') or 0)
+        except ValueError:
+            last_id = 0
+        waiting = self.command != 'HEAD' and event_waiters.try_acquire()
+        try:
+            self.stream_project_events(project_id, last_id, waiting)
+        finally:
+            if waiting:
+                event_waiters.release()
+    
+    def stream_project_events(self, project_id, last_id, waiting):
+        """Write the SSE response; without a waiter slot only what is already known"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('X-Accel-Buffering', 'no')
+        # Sem Content-Length: o fim do fluxo é o fechamento da conexão
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        if self.command == 'HEAD':
+            return
+        
+        started = last_write = last_check = time.monotonic()
+        try:
+            self.wfile.write(f"retry: {SSE_RETRY_MS}\n\n".encode())
+            if not waiting:
+                self.write_sse_events(project_events.since(project_id, last_id)[2])
+                return
+            while time.monotonic() - started < SSE_MAX_STREAM_SECONDS:
+                version, snapshot, events = project_events.wait(project_id, last_id, EVENT_WAIT_SLICE)
+                now = time.monotonic()
+                if events:
+                    self.write_sse_events(events)
+                    last_id = events[-1]["id"]
+                    last_write = now
+                elif now - last_write >= SSE_HEARTBEAT_SECONDS:
+                    self.wfile.write(b": keepalive\n\n")
+                    last_write = now
+                if snapshot.get("status") in TERMINAL_STATUSES and last_id == version:
+                    break
+                if getattr(self.server, "draining", False):
+                    break
+                if now - last_check >= STORE_RECHECK_SECONDS:
+                    recheck_project_status(project_id, snapshot)
+                    last_check = now
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def write_sse_events(self, events):
+        """One SSE frame per event, in a single write"""
+        self.wfile.write(b"".join(
+            b"id: %d\nevent: %s\ndata: %s\n\n" % (event["id"], event["event"].encode(),
+                                                   json_dumps(event["data"]))
+            for event in events
+        ))
+    
+    def serve_job(self, job_id):
+        """Processing job status"""
+        job = scheduler.get(job_id)
+        if job is None:
+            self.send_json_response({"error": "Job not found"}, 404)
+        else:
+            self.send_json_response(job.to_dict())
+    
+    def wants_pretty(self):
+        """True when the client asked for indented JSON with ?pretty=1"""
+        if 'pretty=' not in self.path:
+            return False
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        return query.get('pretty', ['0'])[0].lower() in ('1', 'true', 'yes')
+    
+    def read_json_body(self):
+        """Read an optional JSON object body; None when it is malformed"""
+        content_length = int(self.headers.get('Content-Length', 0))
+        if content_length <= 0:
+            return {}
+        if content_length > MAX_JSON_BODY_BYTES:
+            self.close_connection = True
+            return None
+        try:
+            data = json.loads(self.rfile.read(content_length).decode('utf-8'))
+        except (UnicodeDecodeError, ValueError):
+            return None
+        return data if isinstance(data, dict) else None
     
-    def send_json_response(self, data, status=200):
-        """Send JSON response"""
+    def rate_limit_identity(self):
+        """Authenticated requests are limited per user and plan, the rest per IP"""
+        if self.auth is not None:
+            return "user:" + self.auth[1], self.auth[2]
+        return super().rate_limit_identity()
+    
+    def serve_404(self):
+        """Serve 404 page (JSON with --api-only)"""
+        if self.api_only:
+            self.send_json_response({"error": "Not found"}, 404)
+            return
+        send_asset(self, page_asset("not_found"), status=404)
+    
+    def send_json_response(self, data, status=200, headers=None):
+        """Send JSON response; `data` may also be an already encoded body"""
+        phases = self.request_phases
+        if phases is None:
+            json_data = data if isinstance(data, bytes) else json_dumps(data, self.wants_pretty())
+        else:
+            started = time.perf_counter()
+            json_data = data if isinstance(data, bytes) else json_dumps(data, self.wants_pretty())
+            phases["serialize"] += time.perf_counter() - started
         self.send_response(status)
         self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(json_data)))
         self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
-        json_data = json.dumps(data, indent=2, ensure_ascii=False)
-        self.wfile.write(json_data.encode('utf-8'))
+        self.wfile.write(json_data)
+
+def public_user(user):
+    """User fields safe to send to clients, dates in ISO 8601"""
+    user = User.from_dict(user).to_dict()
+    user.pop("password_hash", None)
+    return user
+
+def normalize_email(email):
+    """Emails are matched case-insensitively and without surrounding spaces"""
+    return email.strip().lower() if isinstance(email, str) else None
+
+def demo_user():
+    """The demo account, created on first use"""
+    user = store.get_user(DEMO_USER_ID)
+    if user is None:
+        user = {
+            "id": DEMO_USER_ID,
+            "email": DEMO_EMAIL,
+            "full_name": "Demo User",
+            "subscription_tier": "free",
+            "created_at": time.time()
+        }
+        store.add_user(user)
+    return user
+
+def project_etag(project, fields=None, since_version=None):
+    """Validator of one representation: project version plus the query shaping it"""
+    tag = f'{project["id"]}-v{project.get("version", 1)}'
+    if fields is not None:
+        tag += "-f" + hashlib.sha256(",".join(sorted(fields)).encode("utf-8")).hexdigest()[:12]
+    if since_version is not None:
+        tag += f"-d{since_version}"
+    return f'"{tag}"'
+
+def project_view(project, fields=None, since_version=None):
+    """Project as sent to clients: all fields, a ?fields= projection or a ?since_version= delta
+
+    `id` and `version` are always included. A delta lists the fields changed
+    after `since_version` and the ones removed since then.
+    """
+    version = project.get("version", 1)
+    field_versions = project.get("field_versions") or {}
+    view = {"id": project["id"], "version": version}
+    if since_version is None:
+        changed = (key for key in project if key != "field_versions")
+    else:
+        # Campos nunca alterados são da versão 1
+        changed = (key for key in project.keys() | field_versions.keys()
+                   if key != "field_versions" and field_versions.get(key, 1) > since_version)
+        view["since_version"] = since_version
+        view["removed"] = []
+    for key in changed:
+        if fields is not None and key not in fields:
+            continue
+        if key in project:
+            view.setdefault(key, project[key])
+        else:
+            view["removed"].append(key)
+    if since_version is not None:
+        view["removed"].sort()
+    return view
+
+def processing_options(source):
+    """Validated (target_duration_minutes, visual_style) from a request or project"""
+    try:
+        target_duration = int(source.get("target_duration_minutes") or DEFAULT_TARGET_DURATION_MINUTES)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid target_duration_minutes")
+    if not 1 <= target_duration <= 120:
+        raise ValueError("target_duration_minutes must be between 1 and 120")
+    visual_style = source.get("visual_style") or DEFAULT_VISUAL_STYLE
+    if not isinstance(visual_style, str) or len(visual_style) > 64:
+        raise ValueError("Invalid visual_style")
+    return target_duration, visual_style
+
+def apply_cached_result(project, result):
+    """Complete a project straight from a cached processing result"""
+    project.update(result)
+    project["status"] = "completed"
+    project["cache_hit"] = True
+
+def update_project_from_job(job):
+    """Mirror a job's state into its project record"""
+    def apply(project):
+        project["job_id"] = job.id
+        project["status"] = job.state
+        if job.state == "completed":
+            project.update(job.result)
+            project["cache_hit"] = False
+        elif job.state == "failed":
+            project["error"] = job.error
+    
+    project = store.update_project(job.project_id, apply)
+    if project is not None:
+        publish_project_status(project, job)
+    if job.state == "completed" and job.payload.get("cache_key"):
+        result_cache.put(job.payload["cache_key"], job.result)
+    if job.state in TERMINAL_STATUSES:
+        record_job_metrics(job)
+
+def record_job_metrics(job):
+    """Outcome, duration, stage timings and AI spend of a finished job"""
+    metrics = Book2VideoHandler.metrics
+    metrics.inc("book2video_jobs_total", (("outcome", job.state),))
+    if job.processing_time is not None:
+        metrics.observe("book2video_job_duration_seconds", (), job.processing_time)
+    if job.state != "completed":
+        return
+    for stage, seconds in job.result.get("stage_seconds", {}).items():
+        metrics.observe("book2video_stage_duration_seconds", (("stage", stage),), seconds)
+    for provider, usage in job.result.get("ai_requests", {}).items():
+        labels = (("provider", provider),)
+        metrics.inc("book2video_ai_cost_usd_total", labels, usage["cost_usd"])
+        metrics.inc("book2video_ai_memo_hits_total", labels, usage["memo_hits"])
+        metrics.inc("book2video_ai_memo_misses_total", labels, usage["calls"])
+        metrics.inc("book2video_ai_memo_saved_usd_total", labels, usage["saved_usd"])
+
+def metrics_snapshot():
+    """This process's metrics, merged with the other workers' exports under --workers"""
+    snapshot = Book2VideoHandler.metrics.snapshot()
+    if worker_board is None:
+        return snapshot
+    snapshots = [snapshot]
+    for row in worker_board.rows():
+        if row["worker"] != worker_id:
+            exported = load_snapshot(metrics_export_path(row["worker"]))
+            if exported is not None:
+                snapshots.append(exported)
+    return merge_snapshots(snapshots)
+
+def metrics_export_path(index):
+    return os.path.join(spool_dir, "metrics", f"worker-{index}.json")
+
+def derived_stats(snapshot):
+    """/stats figures computed from the metrics instead of hard-coded"""
+    completed = counter_total(snapshot, "book2video_jobs_total", outcome="completed")
+    failed = counter_total(snapshot, "book2video_jobs_total", outcome="failed")
+    finished, processing_time = histogram_totals(snapshot, "book2video_job_duration_seconds")
+    spent = counter_total(snapshot, "book2video_ai_cost_usd_total")
+    saved = counter_total(snapshot, "book2video_ai_memo_saved_usd_total")
+    requests = counter_total(snapshot, "book2video_http_requests_total")
+    server_errors = sum(value for name, labels, value in snapshot["counters"]
+                        if name == "book2video_http_requests_total" and dict(map(tuple, labels))["status"].startswith("5"))
+    p50 = histogram_quantile(snapshot, "book2video_http_request_duration_seconds", LATENCY_BUCKETS, 0.5)
+    p95 = histogram_quantile(snapshot, "book2video_http_request_duration_seconds", LATENCY_BUCKETS, 0.95)
+    # Sem jobs/chamadas ainda, as taxas ficam nulas em vez de inventadas
+    return {
+        "success_rate": round(100 * completed / (completed + failed), 1) if completed + failed else None,
+        "average_processing_time": round(processing_time / finished, 3) if finished else 0.0,
+        "total_videos_generated": completed,
+        "ai_cost_usd": round(spent, 4),
+        "ai_cost_savings": f"{100 * saved / (saved + spent):.0f}%" if saved + spent else None,
+        "http": {
+            "requests": requests,
+            "server_errors": server_errors,
+            "latency_p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+        },
+    }
+
+def memo_stats(snapshot):
+    """/stats block for the AI memo cache: per-call hit rate plus the local tiers"""
+    hits = counter_total(snapshot, "book2video_ai_memo_hits_total")
+    misses = counter_total(snapshot, "book2video_ai_memo_misses_total")
+    stats = {
+        "enabled": memo_options is not None and ai_url is not None,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        "saved_cost_usd": round(counter_total(snapshot, "book2video_ai_memo_saved_usd_total"), 4),
+    }
+    if stats["enabled"] and scheduler.executor == "thread":
+        # Com o executor de processos as camadas vivem nos filhos
+        stats["tiers"] = shared_cache(**memo_options).stats()
+    return stats
+
+def publish_job_progress(job):
+    """Stage/percentage update from a running job"""
+    project_events.publish(job.project_id, "progress", {
+        "project_id": job.project_id,
+        "job_id": job.id,
+        "status": job.state,
+        "stage": job.stage,
+        "progress": job.progress
+    })
+
+def publish_project_status(project, job=None):
+    """Status transition of a project (or its current status for a new listener)"""
+    status = project.get("status", "uploaded")
+    data = {
+        "project_id": project["id"],
+        "version": project.get("version", 1),
+        "job_id": project.get("job_id"),
+        "status": status,
+        "stage": job.stage if job is not None else None,
+        "progress": 100 if status == "completed" else (job.progress if job is not None else 0)
+    }
+    if status == "completed":
+        data["scenes_generated"] = project.get("scenes_generated")
+        data["total_duration_seconds"] = project.get("total_duration_seconds")
+        data["cache_hit"] = project.get("cache_hit", False)
+    elif status == "failed":
+        data["error"] = project.get("error")
+    project_events.publish(project["id"], "status", data)
 
-def start_demo_server():
+def recheck_project_status(project_id, snapshot):
+    """With --workers the job may run in another process: pick its status up from storage"""
+    if worker_board is None:
+        return
+    project = store.get_project(project_id)
+    if project is not None and project.get("status") != snapshot.get("status"):
+        publish_project_status(project)
+
+def worker_snapshot():
+    """This process's numeric counters for the shared worker board"""
+    jobs = scheduler.stats()
+    cache = result_cache.stats()
+    return {
+        "total_users": store.count_users(),
+        "total_projects": store.count_projects(),
+        "completed_projects": store.count_projects("completed"),
+        "jobs_queued": jobs["queued"],
+        "jobs_running": jobs["running"],
+        "jobs_completed": jobs["completed"],
+        "jobs_failed": jobs["failed"],
+        "job_workers": jobs["workers"],
+        "cache_hits": cache["hits"],
+        "cache_misses": cache["misses"],
+        "cache_evictions": cache["evictions"],
+    }
+
+def aggregate_worker_stats(local_stats):
+    """/stats fields summed over every live worker process"""
+    rows = worker_board.rows()
+    totals = worker_board.totals()
+    lookups = totals["cache_hits"] + totals["cache_misses"]
+    aggregated = {
+        "processing_queue": int(totals["jobs_queued"]),
+        "jobs": dict(local_stats["jobs"],
+                     queued=int(totals["jobs_queued"]), running=int(totals["jobs_running"]),
+                     completed=int(totals["jobs_completed"]), failed=int(totals["jobs_failed"]),
+                     workers=int(totals["job_workers"])),
+        "dedup_cache": dict(local_stats["dedup_cache"],
+                            hits=int(totals["cache_hits"]), misses=int(totals["cache_misses"]),
+                            hit_rate=round(totals["cache_hits"] / lookups, 4) if lookups else 0.0,
+                            evictions=int(totals["cache_evictions"])),
+        "workers": {
+            "count": len(rows),
+            "served_by": worker_id,
+            "processes": [{"worker": row["worker"], "pid": row["pid"], "age_seconds": row["age_seconds"]}
+                          for row in rows],
+        },
+    }
+    if storage_backend == "memory":
+        # Cada processo tem seus próprios dicts; com SQLite os totais já são globais
+        aggregated["total_users"] = int(totals["total_users"])
+        aggregated["total_projects"] = int(totals["total_projects"])
+        aggregated["completed_projects"] = int(totals["completed_projects"])
+    return aggregated
+
+def open_worker_state(args):
+    """Storage, sessions, result cache and job queue for this process (after any fork)"""
+    global store, result_cache, scheduler, event_waiters
+    store = create_storage(args.storage, args.db_path)
+    event_waiters = WaiterSlots(args.max_event_waiters)
+    Book2VideoHandler.metrics = create_metrics()
+    # Por processo: a thread que vigia requisições lentas não sobrevive ao fork
+    Book2VideoHandler.profiler = create_profiler(args)
+    if worker_board is not None:
+        # /metrics de qualquer processo soma as exportações dos outros
+        export_path = metrics_export_path(worker_id)
+        if os.path.exists(export_path):
+            os.unlink(export_path)
+        Book2VideoHandler.metrics.start_export(export_path)
+    Book2VideoHandler.session_manager = SessionManager(store, token_signer,
+                                                       args.session_ttl_hours * 3600).start()
+    result_cache = ResultCache(args.cache_dir or os.path.join(spool_dir, "cache"),
+                               max_entries=args.cache_max_entries,
+                               max_bytes=args.cache_max_mb * 1024 * 1024)
+    # Por caminho: pipeline.py (e o asyncio do fan-out de IA) só é importado no primeiro job
+    scheduler = JobScheduler("pipeline:run_pipeline", max_workers=args.job_workers,
+                             max_queue=args.job_queue_size, executor=args.job_executor,
+                             on_update=update_project_from_job,
+                             on_progress=publish_job_progress).start()
+
+def close_worker_state():
+    Book2VideoHandler.session_manager.stop()
+    scheduler.shutdown()
+    result_cache.flush()
+    store.close()
+
+def serve_worker(args, server_address, listen_socket=None, reuse_port=False, index=0):
+    """Run one server process until SIGTERM (or Ctrl+C without --workers)"""
+    global worker_id
+    worker_id = index
+    open_worker_state(args)
+    if worker_board is not None:
+        worker_board.start_publisher(worker_id, worker_snapshot)
+    try:
+        with create_server(args.mode, server_address, Book2VideoHandler,
+                           max_workers=args.max_workers, max_pending=args.max_pending,
+                           max_body_bytes=max_upload_bytes, listen_socket=listen_socket,
+                           reuse_port=reuse_port) as httpd:
+            serve_until_terminated(httpd, args.grace_seconds)
+    finally:
+        close_worker_state()
+
+def start_demo_server(argv=None):
     """Start the demo server"""
-    global server_start_time
+    global server_start_time, render_seconds, spool_dir, max_upload_bytes
+    global storage_backend, worker_board, ai_url, ai_concurrency, memo_options, render_workers
+    global token_signer
     server_start_time = time.time()
     
-    PORT = 8000
+    parser = argparse.ArgumentParser(description="Book2Video Demo Server")
+    add_serving_arguments(parser, default_port=8000)
+    add_job_arguments(parser)
+    parser.add_argument("--render-seconds", type=float, default=3.0,
+                        help="tempo simulado de renderização por projeto (padrão: 3.0)")
+    parser.add_argument("--spool-dir", default=DEFAULT_SPOOL_DIR,
+                        help=f"diretório dos uploads (padrão: {DEFAULT_SPOOL_DIR})")
+    parser.add_argument("--max-upload-mb", type=int, default=DEFAULT_MAX_UPLOAD_BYTES // (1024 * 1024),
+                        help="tamanho máximo de upload em MB (padrão: 50)")
+    parser.add_argument("--json-backend", choices=JSON_BACKENDS, default="auto",
+                        help="serializador JSON: orjson/ujson se instalados, senão json (padrão: auto)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="diretório do cache de resultados (padrão: <spool-dir>/cache)")
+    parser.add_argument("--cache-max-entries", type=int, default=1000,
+                        help="resultados mantidos no cache (padrão: 1000)")
+    parser.add_argument("--cache-max-mb", type=int, default=256,
+                        help="tamanho máximo do cache em MB (padrão: 256)")
+    parser.add_argument("--ai-url", default=None,
+                        help="URL base das APIs de IA, ex.: o stub http://localhost:8090 (padrão: etapas simuladas)")
+    parser.add_argument("--ai-concurrency", type=int, default=None,
+                        help="chamadas simultâneas por provedor de IA (padrão: 20)")
+    parser.add_argument("--render-workers", type=int, default=None,
+                        help="segmentos de vídeo renderizados em paralelo pelo FFmpeg (padrão: nº de CPUs)")
+    parser.add_argument("--memo-dir", default=None,
+                        help="diretório do cache de saídas de IA por cena (padrão: <spool-dir>/memo)")
+    parser.add_argument("--memo-memory-mb", type=int, default=DEFAULT_MEMORY_BYTES // (1024 * 1024),
+                        help="camada em memória do cache de IA em MB (padrão: 64)")
+    parser.add_argument("--memo-disk-mb", type=int, default=DEFAULT_DISK_BYTES // (1024 * 1024),
+                        help="camada em disco do cache de IA em MB (padrão: 1024)")
+    parser.add_argument("--memo-ttl-hours", type=float, default=DEFAULT_TTL_SECONDS / 3600,
+                        help="validade das saídas de IA em cache, em horas (padrão: 168)")
+    parser.add_argument("--max-event-waiters", type=int, default=None,
+                        help="long-polls/streams SSE esperando ao mesmo tempo por processo; além disso o "
+                             "cliente recebe o estado atual e volta depois (padrão: metade de --max-workers, "
+                             "0 no modo single)")
+    parser.add_argument("--api-only", action="store_true",
+                        help="só a API JSON: sem páginas HTML (/ e /demo) e com 404 em JSON")
+    add_rate_limit_arguments(parser)
+    add_auth_arguments(parser)
+    add_profiling_arguments(parser)
+    add_storage_arguments(parser)
+    add_prefork_arguments(parser)
+    args = parser.parse_args(argv)
+    PORT = args.port
+    if args.max_event_waiters is None:
+        # No modo single uma espera bloquearia o servidor inteiro
+        args.max_event_waiters = 0 if args.mode == "single" else max(args.max_workers // 2, 1)
+    configure_keepalive(Book2VideoHandler, args)
+    if args.api_only:
+        Book2VideoHandler.router = Router(api_routes())
+        Book2VideoHandler.api_only = True
+    Book2VideoHandler.rate_limiter = create_rate_limiter(args)
+    Book2VideoHandler.require_auth = args.require_auth
+    # Mesma chave em todos os processos: um token vale em qualquer worker
+    token_signer = TokenSigner(auth_secret(args))
+    json_backend = select_backend(args.json_backend)
+    render_seconds = args.render_seconds
+    ai_url = args.ai_url
+    ai_concurrency = args.ai_concurrency
+    render_workers = args.render_workers
+    spool_dir = args.spool_dir
+    max_upload_bytes = args.max_upload_mb * 1024 * 1024
+    os.makedirs(spool_dir, exist_ok=True)
+    memo_options = {
+        "directory": args.memo_dir or os.path.join(spool_dir, "memo"),
+        "memory_bytes": args.memo_memory_mb * 1024 * 1024,
+        "disk_bytes": args.memo_disk_mb * 1024 * 1024,
+        "ttl_seconds": args.memo_ttl_hours * 3600,
+    }
+    storage_backend = args.storage
+    workers = max(args.workers, 1)
     
     print("🚀 BOOK2VIDEO DEMO SERVER")
     print("=" * 40)
     print(f"🌐 Servidor iniciado em: http://localhost:{PORT}")
-    print(f"📱 Interface principal: http://localhost:{PORT}/")
+    if not args.api_only:
+        print(f"📱 Interface principal: http://localhost:{PORT}/")
     print(f"🔍 Health check: http://localhost:{PORT}/health")
     print(f"📊 Estatísticas: http://localhost:{PORT}/stats")
-    print(f"🧪 Demo interface: http://localhost:{PORT}/demo")
+    if args.api_only:
+        print("🔌 Só API JSON (--api-only): sem páginas HTML")
+    else:
+        print(f"🧪 Demo interface: http://localhost:{PORT}/demo")
+    print(f"⚙️  Modo: {args.mode} ({args.max_workers} trabalhadores)")
+    print(f"📡 Eventos: até {args.max_event_waiters} long-polls/SSE esperando por processo")
+    if workers > 1:
+        print(f"🧬 Processos: {workers} (" + ("socket compartilhado" if args.shared_socket else "SO_REUSEPORT") + ")")
+    print(f"🧾 JSON: {json_backend}")
+    print("🔐 Autenticação: tokens HMAC" + (" obrigatórios" if args.require_auth else " (anônimo = modo demo)"))
+    print("🚦 Limite de requisições: " + ("desligado" if args.no_rate_limit else "por usuário/IP e plano"))
+    if args.profiling:
+        print(f"🔬 Profiling: /admin/profiling, cProfile em {args.profile_sample_rate:.0%} das requisições"
+              + (f", lentas > {args.slow_request_ms:g} ms" if args.slow_request_ms else ""))
+    print(f"🗄️  Armazenamento: {args.storage}" + (f" ({args.db_path or 'padrão'})" if args.storage == "sqlite" else ""))
+    if workers > 1 and args.storage == "memory":
+        print("💡 Com --workers cada processo tem seus próprios dados; use --storage sqlite para compartilhar")
+    print(f"🤖 Fila de IA: {args.job_workers} {args.job_executor}(s), até {args.job_queue_size} jobs")
+    if ai_url:
+        print(f"🧠 APIs de IA: {ai_url} (cenas em paralelo, cache em {memo_options['directory']})")
     print("=" * 40)
     print("✅ Sistema Book2Video funcionando!")
     print("🤖 Simula todo o pipeline: Upload → IA → Vídeo")
@@ -580,8 +1186,18 @@ def start_demo_server():
     print()
     
     try:
-        with socketserver.TCPServer(("", PORT), Book2VideoHandler) as httpd:
-            httpd.serve_forever()
+        if workers > 1:
+            worker_board = WorkerBoard(WORKER_STATS_FIELDS, workers)
+            supervisor = PreforkSupervisor(
+                workers, ("", PORT),
+                lambda index, address, sock, reuse_port: serve_worker(args, address, sock, reuse_port, index),
+                reuse_port=False if args.shared_socket else None,
+                grace_seconds=args.grace_seconds, board=worker_board,
+            )
+            supervisor.run()
+            print(f"\n⏹️  Servidor parado ({supervisor.restarts} reinícios de processos)")
+        else:
+            serve_worker(args, ("", PORT))
     except KeyboardInterrupt:
         print("\n⏹️  Servidor parado pelo usuário")
     except OSError as e:
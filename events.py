@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Book2Video Project Events
+Canal de progresso por projeto para SSE e long-poll, com versões crescentes
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+
+DEFAULT_MAX_EVENTS = 64
+DEFAULT_MAX_CHANNELS = 10000
+
+
+class WaiterSlots:
+    """Cap on requests blocked waiting for project events at the same time
+
+    Long-poll and SSE keep a server thread for as long as they wait; once
+    `limit` of them are waiting, callers get the current state right away
+    instead, so waits can never take every thread away from normal routes.
+    """
+
+    def __init__(self, limit):
+        self.limit = max(limit, 0)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._rejected = 0
+
+    def try_acquire(self):
+        """Take a slot without blocking; False when all are in use"""
+        with self._lock:
+            if self._active >= self.limit:
+                self._rejected += 1
+                return False
+            self._active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+
+    def stats(self):
+        with self._lock:
+            return {"limit": self.limit, "active": self._active, "rejected": self._rejected}
+
+
+class _Channel:
+    __slots__ = ("version", "events", "snapshot", "changed", "touched")
+
+    def __init__(self, lock, max_events):
+        self.version = 0
+        self.events = deque(maxlen=max_events)
+        self.snapshot = {}
+        self.changed = threading.Condition(lock)
+        self.touched = time.time()
+
+
+class ProjectEvents:
+    """Recent events and latest state per project, with blocking waits
+
+    Every publish bumps the project's version. Readers ask for everything
+    after the version they last saw; when that is older than the retained
+    events they get the latest snapshot instead, so a reader never has to
+    replay more than `max_events`.
+    """
+
+    def __init__(self, max_events=DEFAULT_MAX_EVENTS, max_channels=DEFAULT_MAX_CHANNELS):
+        self.max_events = max_events
+        self.max_channels = max_channels
+        self._lock = threading.Lock()
+        self._channels = OrderedDict()
+
+    def _channel(self, project_id):
+        # Chamado com self._lock adquirido
+        channel = self._channels.get(project_id)
+        if channel is None:
+            channel = self._channels[project_id] = _Channel(self._lock, self.max_events)
+            while len(self._channels) > self.max_channels:
+                self._channels.popitem(last=False)
+        else:
+            self._channels.move_to_end(project_id)
+        channel.touched = time.time()
+        return channel
+
+    def publish(self, project_id, event_type, data):
+        """Record an event, update the snapshot and wake the waiters; returns the version"""
+        with self._lock:
+            channel = self._channel(project_id)
+            channel.version += 1
+            channel.snapshot.update(data)
+            event = {"id": channel.version, "event": event_type, "data": dict(data, version=channel.version)}
+            channel.events.append(event)
+            channel.changed.notify_all()
+            return channel.version
+
+    def since(self, project_id, version):
+        """(current_version, snapshot, events after `version`) without blocking"""
+        with self._lock:
+            channel = self._channels.get(project_id)
+            if channel is None:
+                return 0, {}, []
+            return self._collect(channel, version)
+
+    def wait(self, project_id, version, timeout):
+        """Like since(), but block up to `timeout` seconds for something newer"""
+        with self._lock:
+            channel = self._channel(project_id)
+            if channel.version == version:
+                channel.changed.wait_for(lambda: channel.version != version, timeout)
+            return self._collect(channel, version)
+
+    def _collect(self, channel, version):
+        # Versão maior que a atual (ex.: servidor reiniciado) também recebe o estado atual
+        if version > channel.version:
+            version = 0
+        events = [event for event in channel.events if event["id"] > version]
+        if events and events[0]["id"] != version + 1:
+            # Eventos antigos já descartados: começa pelo estado consolidado
+            events = [{"id": channel.version, "event": "snapshot",
+                       "data": dict(channel.snapshot, version=channel.version)}]
+        return channel.version, dict(channel.snapshot), events
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Book2Video Ingestion
+Leitura em fluxo de livros TXT/EPUB: capítulos, palavras, frases e tempo de leitura
+Memória limitada: o texto passa por geradores em blocos, nunca inteiro numa string
+"""
+
+import codecs
+import posixpath
+import re
+import urllib.parse
+import zipfile
+from collections import namedtuple
+from html.parser import HTMLParser
+from xml.etree import ElementTree
+
+READ_CHUNK_SIZE = 64 * 1024
+# Parágrafo (ou linha sem quebra) maior que isso é entregue em pedaços
+MAX_PARAGRAPH_CHARS = 64 * 1024
+READING_WORDS_PER_MINUTE = 230
+MAX_CHAPTERS_LISTED = 1000
+MAX_HEADING_CHARS = 80
+
+Block = namedtuple("Block", "kind text")
+
+# Palavras = tokens separados por espaço, menos os que são só pontuação ("—", "...")
+PUNCTUATION_TOKEN_RE = re.compile(r"(?<!\S)[^\w\s]+(?!\S)")
+SENTENCE_END_RE = re.compile(r"[.!?…]+(?=[\s\"”’»)\]]|$)")
+# "Capítulo 3", "CHAPTER IV. The Storm", "Parte um: A viagem", "Prólogo"
+CHAPTER_HEADING_RE = re.compile(
+    r"^(?:chapter|cap[ií]tulo|parte|part|livro|book|pr[oó]logo|prologue|ep[ií]logo|epilogue)"
+    r"(?:\s+(?:\d+|[ivxlcdm]+|\w+)\b\.?)?(?:\s*[-—–:.]\s*\S.*)?$",
+    re.IGNORECASE,
+)
+ROMAN_HEADING_RE = re.compile(r"^(?=[MDCLXVI])M*(?:C[MD]|D?C{0,3})(?:X[CL]|L?X{0,3})(?:I[XV]|V?I{0,3})\.?$")
+NUMBER_HEADING_RE = re.compile(r"^\d{1,3}\.?$")
+
+
+def detect_format(path):
+    """Guess the book format from its first bytes: epub (a zip archive) or txt"""
+    with open(path, "rb") as f:
+        head = f.read(64)
+    if head.startswith(b"PK\x03\x04"):
+        return "epub"
+    return "txt"
+
+
+def sniff_encoding(sample):
+    """Pick a decoder for the first bytes of a text file"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        # Livros antigos em português costumam vir em Latin-1/Windows-1252
+        return "cp1252"
+
+
+def iter_text_chunks(f, encoding=None, chunk_size=READ_CHUNK_SIZE):
+    """Decode a binary file incrementally; yields str chunks"""
+    first = f.read(chunk_size)
+    encoding = encoding or sniff_encoding(first)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    chunk = first
+    while chunk:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+        chunk = f.read(chunk_size)
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def iter_lines(chunks, max_chars=MAX_PARAGRAPH_CHARS):
+    """Split str chunks into lines without holding more than one partial line"""
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        lines = pending.splitlines(keepends=True)
+        pending = ""
+        # Linha sem "\n" pode continuar no próximo bloco (inclusive um "\r\n" partido)
+        if lines and not lines[-1].endswith("\n"):
+            pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r\n")
+        while len(pending) > max_chars:
+            yield pending[:max_chars]
+            pending = pending[max_chars:]
+    if pending:
+        yield pending.rstrip("\r\n")
+
+
+def is_heading(text, strict=False):
+    """Heuristic chapter heading test for a short standalone line"""
+    if not text or len(text) > MAX_HEADING_CHARS:
+        return False
+    if CHAPTER_HEADING_RE.match(text):
+        return True
+    if strict:
+        return False
+    if ROMAN_HEADING_RE.match(text) or NUMBER_HEADING_RE.match(text):
+        return True
+    # Linha curta toda em maiúsculas, ex.: "O PRÍNCIPE"
+    return (text == text.upper() and any(c.isalpha() for c in text)
+            and len(text.split()) <= 8 and text[-1] not in ".,;:!?…")
+
+
+def iter_text_blocks(lines):
+    """Group lines into paragraphs (blank-line separated) and headings"""
+    parts = []
+    size = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if parts:
+                yield _text_block(parts)
+                parts, size = [], 0
+            continue
+        if len(parts) == 1 and is_heading(parts[0], strict=True):
+            # "CAPÍTULO 1" seguido do texto sem linha em branco
+            yield Block("heading", parts[0])
+            parts, size = [], 0
+        parts.append(line)
+        size += len(line) + 1
+        if size >= MAX_PARAGRAPH_CHARS:
+            yield Block("paragraph", " ".join(parts))
+            parts, size = [], 0
+    if parts:
+        yield _text_block(parts)
+
+
+def _text_block(parts):
+    text = " ".join(parts)
+    if len(parts) == 1 and is_heading(text):
+        return Block("heading", text)
+    return Block("paragraph", text)
+
+
+class _XHTMLTextExtractor(HTMLParser):
+    """Turn XHTML into heading/paragraph blocks as it is fed"""
+
+    BLOCK_TAGS = {"p", "div", "li", "blockquote", "section", "article", "tr", "dd", "dt",
+                  "pre", "h4", "h5", "h6", "br", "hr", "body"}
+    HEADING_TAGS = {"h1", "h2", "h3"}
+    SKIP_TAGS = {"script", "style", "head", "title"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self._parts = []
+        self._size = 0
+        self._heading = 0
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip += 1
+        elif tag in self.HEADING_TAGS:
+            self._flush()
+            self._heading += 1
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip = max(self._skip - 1, 0)
+        elif tag in self.HEADING_TAGS:
+            self._flush()
+            self._heading = max(self._heading - 1, 0)
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        self._parts.append(data)
+        self._size += len(data)
+        if self._size >= MAX_PARAGRAPH_CHARS and not self._heading:
+            self._flush()
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def _flush(self):
+        if not self._parts:
+            return
+        text = " ".join("".join(self._parts).split())
+        self._parts, self._size = [], 0
+        if text:
+            self.blocks.append(Block("heading" if self._heading else "paragraph", text))
+
+    def drain(self):
+        blocks, self.blocks = self.blocks, []
+        return blocks
+
+
+def epub_documents(zf):
+    """XHTML member names in reading (spine) order"""
+    try:
+        container = ElementTree.fromstring(zf.read("META-INF/container.xml"))
+        rootfile = next(el for el in container.iter() if el.tag.endswith("rootfile"))
+        opf_path = rootfile.get("full-path")
+        opf = ElementTree.fromstring(zf.read(opf_path))
+        manifest = {}
+        for el in opf.iter():
+            if el.tag.endswith("}item") or el.tag == "item":
+                manifest[el.get("id")] = el.get("href")
+        base = posixpath.dirname(opf_path)
+        names = []
+        for el in opf.iter():
+            if el.tag.endswith("}itemref") or el.tag == "itemref":
+                href = manifest.get(el.get("idref"))
+                if href:
+                    names.append(posixpath.normpath(posixpath.join(base, urllib.parse.unquote(href))))
+        members = set(zf.namelist())
+        names = [name for name in names if name in members]
+        if names:
+            return names
+    except (KeyError, StopIteration, ElementTree.ParseError, TypeError):
+        pass
+    # Sem OPF legível: todos os XHTML em ordem alfabética
+    return sorted(name for name in zf.namelist() if name.lower().endswith((".xhtml", ".html", ".htm")))
+
+
+def iter_epub_blocks(path, chunk_size=READ_CHUNK_SIZE):
+    """Blocks of an EPUB, one spine document at a time"""
+    with zipfile.ZipFile(path) as zf:
+        for name in epub_documents(zf):
+            parser = _XHTMLTextExtractor()
+            with zf.open(name) as member:
+                for text in iter_text_chunks(member, "utf-8", chunk_size):
+                    parser.feed(text)
+                    yield from parser.drain()
+            parser.close()
+            yield from parser.drain()
+
+
+def iter_blocks(path, fmt=None, chunk_size=READ_CHUNK_SIZE):
+    """Heading/paragraph blocks of a TXT or EPUB book, streamed from disk"""
+    fmt = fmt or detect_format(path)
+    if fmt == "epub":
+        yield from iter_epub_blocks(path, chunk_size)
+        return
+    with open(path, "rb") as f:
+        yield from iter_text_blocks(iter_lines(iter_text_chunks(f, chunk_size=chunk_size)))
+
+
+def count_words(text):
+    """Whitespace-separated tokens with at least one letter or digit"""
+    return len(text.split()) - len(PUNCTUATION_TOKEN_RE.findall(text))
+
+
+class BookStats:
+    """Running counters over a stream of blocks"""
+
+    def __init__(self):
+        self.words = 0
+        self.sentences = 0
+        self.paragraphs = 0
+        self.characters = 0
+        self.chapters = []
+        self.chapter_count = 0
+        self._current = None
+
+    def add(self, block):
+        words = count_words(block.text)
+        self.words += words
+        self.characters += len(block.text)
+        if block.kind == "heading":
+            self.chapter_count += 1
+            self._current = {"title": block.text, "word_count": 0, "sentence_count": 0}
+            if len(self.chapters) < MAX_CHAPTERS_LISTED:
+                self.chapters.append(self._current)
+            return
+        sentences = len(SENTENCE_END_RE.findall(block.text))
+        if words and not SENTENCE_END_RE.search(block.text[-3:]):
+            # Parágrafo que termina sem pontuação conta como uma frase
+            sentences += 1
+        self.sentences += sentences
+        self.paragraphs += 1
+        if self._current is None:
+            # Texto antes do primeiro título
+            self._current = {"title": None, "word_count": 0, "sentence_count": 0}
+            self.chapter_count += 1
+            self.chapters.append(self._current)
+        self._current["word_count"] += words
+        self._current["sentence_count"] += sentences
+
+    def to_dict(self):
+        # Títulos sem texto logo antes de outro título (ex.: "PARTE I") não contam como capítulo
+        chapters = [chapter for chapter in self.chapters if chapter["word_count"]]
+        dropped = len(self.chapters) - len(chapters)
+        return {
+            "word_count": self.words,
+            "sentence_count": self.sentences,
+            "paragraph_count": self.paragraphs,
+            "character_count": self.characters,
+            "estimated_reading_time_minutes": round(self.words / READING_WORDS_PER_MINUTE, 1),
+            "chapters_detected": self.chapter_count - dropped,
+            "chapters": chapters,
+        }
+
+
+def analyze_blocks(blocks):
+    stats = BookStats()
+    for block in blocks:
+        stats.add(block)
+    return stats.to_dict()
+
+
+def analyze_book(path, title=None, fmt=None):
+    """The `book_analysis` block for a book file"""
+    fmt = fmt or detect_format(path)
+    analysis = {"title": title, "format": fmt}
+    analysis.update(analyze_blocks(iter_blocks(path, fmt)))
+    return analysis
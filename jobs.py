@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Book2Video Job Scheduler
+Fila de processamento com prioridade para o pipeline de IA
+"""
+
+import functools
+import importlib
+import itertools
+import queue
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+
+JOB_STATES = ("queued", "running", "completed", "failed")
+EXECUTOR_KINDS = ("thread", "process")
+DEFAULT_PRIORITY = 5
+
+
+class QueueFullError(Exception):
+    """Raised when the processing queue has no room for another job"""
+
+
+# Nos processos do pool o progresso volta ao pai por esta fila
+_progress_queue = None
+
+
+def _init_process_worker(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+@functools.lru_cache(maxsize=None)
+def _import_work_fn(path):
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def resolve_work_fn(work_fn):
+    """The callable for a work function or a "module:function" path, imported on first use"""
+    return _import_work_fn(work_fn) if isinstance(work_fn, str) else work_fn
+
+
+def _run_in_process(work_fn, job_id, payload):
+    def progress(stage, percent):
+        _progress_queue.put((job_id, stage, percent))
+
+    return resolve_work_fn(work_fn)(payload, progress)
+
+
+class Job:
+    """A single processing request and its lifecycle"""
+
+    def __init__(self, project_id, payload, priority=DEFAULT_PRIORITY):
+        self.id = str(uuid.uuid4())
+        self.project_id = project_id
+        self.payload = payload
+        self.priority = priority
+        self.state = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.stage = None
+        self.progress = 0
+
+    @property
+    def processing_time(self):
+        if self.started_at is None:
+            return None
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return end - self.started_at
+
+    def to_dict(self):
+        processing_time = self.processing_time
+        return {
+            "job_id": self.id,
+            "project_id": self.project_id,
+            "state": self.state,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "processing_time_seconds": round(processing_time, 3) if processing_time is not None else None,
+            "stage": self.stage,
+            "progress": self.progress,
+            "error": self.error,
+        }
+
+
+class JobScheduler:
+    """Bounded priority queue drained by a pool of worker threads or processes
+
+    `work_fn(payload, progress)` gets a `progress(stage, percent)` callable;
+    each call updates the job and is passed on to `on_progress(job)`.
+    `work_fn` may also be a "module:function" path: the module is then only
+    imported when the first job runs (in each worker process, with the
+    process executor), which keeps it out of the server's startup.
+    """
+
+    def __init__(self, work_fn, max_workers=2, max_queue=64, executor="thread",
+                 on_update=None, max_finished=1000, on_progress=None):
+        if executor not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind: {executor}")
+        self.work_fn = work_fn
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor = executor
+        self.on_update = on_update
+        self.on_progress = on_progress
+        self.max_finished = max_finished
+
+        self._queue = queue.PriorityQueue(maxsize=max_queue)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._finished = OrderedDict()
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._threads = []
+        self._process_pool = None
+        self._progress_queue = None
+        self._stopping = False
+
+    def start(self):
+        """Start the worker pool"""
+        if self.executor == "process":
+            # multiprocessing só entra com --job-executor process
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            self._progress_queue = multiprocessing.Queue()
+            self._process_pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     initializer=_init_process_worker,
+                                                     initargs=(self._progress_queue,))
+            threading.Thread(target=self._progress_loop, name="b2v-job-progress", daemon=True).start()
+        for i in range(self.max_workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"b2v-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def shutdown(self):
+        """Stop accepting jobs and release the workers"""
+        self._stopping = True
+        for _ in self._threads:
+            # Sentinela com prioridade máxima para acordar cada trabalhador
+            self._queue.put((-1, next(self._sequence), None))
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._progress_queue.put(None)
+
+    def submit(self, project_id, payload, priority=DEFAULT_PRIORITY):
+        """Enqueue a job; raises QueueFullError when the queue is at capacity"""
+        if self._stopping:
+            raise QueueFullError("Scheduler is shutting down")
+        job = Job(project_id, payload, priority)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait((priority, next(self._sequence), job))
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            raise QueueFullError(f"Processing queue is full ({self.max_queue} jobs)")
+        self._notify(job)
+        return job
+
+    def get(self, job_id):
+        """Return the job with the given id, or None"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_depth(self):
+        """Jobs waiting for a worker"""
+        return self._queue.qsize()
+
+    def stats(self):
+        """Counters for /stats"""
+        with self._lock:
+            running = self._running
+            completed = self._completed
+            failed = self._failed
+        return {
+            "queued": self.queue_depth(),
+            "running": running,
+            "completed": completed,
+            "failed": failed,
+            "workers": self.max_workers,
+            "executor": self.executor,
+            "max_queue": self.max_queue,
+        }
+
+    def _worker_loop(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                return
+            self._run(job)
+
+    def _run(self, job):
+        with self._lock:
+            job.state = "running"
+            job.started_at = time.time()
+            self._running += 1
+        self._notify(job)
+
+        try:
+            if self._process_pool is not None:
+                result = self._process_pool.submit(_run_in_process, self.work_fn, job.id, job.payload).result()
+            else:
+                result = resolve_work_fn(self.work_fn)(job.payload,
+                                                       lambda stage, percent: self._report(job, stage, percent))
+        except Exception as e:
+            with self._lock:
+                job.state = "failed"
+                job.error = str(e) or e.__class__.__name__
+                self._failed += 1
+                self._finish(job)
+        else:
+            with self._lock:
+                job.state = "completed"
+                job.progress = 100
+                job.result = result
+                self._completed += 1
+                self._finish(job)
+        error = self._notify(job)
+        if error is not None and job.state == "completed":
+            # O resultado não pôde ser registrado: o job falha em vez de ficar "running"
+            with self._lock:
+                job.state = "failed"
+                job.error = f"Could not record result: {error}"
+                self._completed -= 1
+                self._failed += 1
+            self._notify(job)
+
+    def _report(self, job, stage, percent):
+        with self._lock:
+            if job.state != "running":
+                return
+            job.stage = stage
+            job.progress = min(max(int(round(percent)), 0), 100)
+        if self.on_progress is not None:
+            self._callback(self.on_progress, job)
+
+    def _progress_loop(self):
+        while True:
+            item = self._progress_queue.get()
+            if item is None:
+                return
+            job_id, stage, percent = item
+            job = self.get(job_id)
+            if job is not None:
+                self._report(job, stage, percent)
+
+    def _finish(self, job):
+        # Chamado com self._lock adquirido
+        job.finished_at = time.time()
+        self._running -= 1
+        self._finished[job.id] = job
+        while len(self._finished) > self.max_finished:
+            old_id, _ = self._finished.popitem(last=False)
+            self._jobs.pop(old_id, None)
+
+    def _notify(self, job):
+        """Run on_update; returns the error it raised, or None"""
+        if self.on_update is not None:
+            return self._callback(self.on_update, job)
+        return None
+
+    def _callback(self, callback, job):
+        # Um erro no callback não pode matar o trabalhador: o pool encolheria sem aviso
+        try:
+            callback(job)
+        except Exception as e:
+            sys.stderr.write(f"job {job.id}: {callback.__name__} failed ({job.state})\n")
+            traceback.print_exc()
+            return str(e) or e.__class__.__name__
+        return None
+
+
+def add_job_arguments(parser):
+    """Register the job scheduler CLI flags on an argparse parser"""
+    parser.add_argument("--job-workers", type=int, default=2,
+                        help="trabalhadores do processamento de IA (padrão: 2)")
+    parser.add_argument("--job-executor", choices=EXECUTOR_KINDS, default="thread",
+                        help="executar jobs em threads ou processos (padrão: thread)")
+    parser.add_argument("--job-queue-size", type=int, default=64,
+                        help="jobs aguardando antes de responder 429 (padrão: 64)")
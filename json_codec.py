@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Book2Video JSON Codec
+Serialização compacta das respostas, com backend rápido opcional
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+BACKENDS = ("auto", "orjson", "ujson", "json")
+
+_stdlib_compact = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+_stdlib_pretty = json.JSONEncoder(ensure_ascii=False, indent=2)
+
+
+def _dumps_json(data):
+    return _stdlib_compact.encode(data).encode("utf-8")
+
+
+def _dumps_orjson(data):
+    try:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # Tipos que o orjson não conhece seguem pelo caminho padrão
+        return _dumps_json(data)
+
+
+def _dumps_ujson(data):
+    try:
+        return ujson.dumps(data, ensure_ascii=False).encode("utf-8")
+    except (TypeError, OverflowError):
+        return _dumps_json(data)
+
+
+_compact = _dumps_json
+backend_name = "json"
+
+
+def available_backends():
+    """Backends importable in this environment"""
+    names = ["json"]
+    if ujson is not None:
+        names.insert(0, "ujson")
+    if orjson is not None:
+        names.insert(0, "orjson")
+    return names
+
+
+def select_backend(name="auto"):
+    """Choose the compact serializer; "auto" picks the fastest one installed"""
+    global _compact, backend_name
+    if name == "auto":
+        name = available_backends()[0]
+    if name == "orjson" and orjson is not None:
+        _compact = _dumps_orjson
+    elif name == "ujson" and ujson is not None:
+        _compact = _dumps_ujson
+    elif name == "json":
+        _compact = _dumps_json
+    else:
+        raise ValueError(f"JSON backend not available: {name}")
+    backend_name = name
+    return name
+
+
+def dumps(data, pretty=False):
+    """Serialize to UTF-8 bytes; compact unless `pretty` is asked for"""
+    if isinstance(data, FrozenPayload):
+        return data.encode(pretty)
+    if pretty:
+        return _stdlib_pretty.encode(data).encode("utf-8")
+    return _compact(data)
+
+
+class FrozenPayload:
+    """Immutable response body serialized once per format"""
+
+    def __init__(self, data):
+        self.data = data
+        self._encoded = {}
+
+    def encode(self, pretty=False):
+        body = self._encoded.get(pretty)
+        if body is None:
+            body = self._encoded[pretty] = dumps(self.data, pretty)
+        return body
+
+
+class PayloadTemplate:
+    """Mostly-constant object whose static members are serialized only once
+
+    `render` splices the per-request members in front of the cached ones,
+    e.g. the id of an otherwise identical demo project.
+    """
+
+    def __init__(self, static_fields):
+        self.static_fields = static_fields
+        inner = _dumps_json(static_fields)
+        self._static_inner = inner[1:-1]
+
+    def render(self, dynamic_fields, pretty=False):
+        if pretty:
+            data = dict(dynamic_fields)
+            data.update(self.static_fields)
+            return dumps(data, pretty=True)
+        head = _compact(dynamic_fields)
+        if not self._static_inner:
+            return head
+        if head == b"{}":
+            return b"{" + self._static_inner + b"}"
+        return head[:-1] + b"," + self._static_inner + b"}"
+
+    def to_dict(self, dynamic_fields):
+        data = dict(dynamic_fields)
+        data.update(self.static_fields)
+        return data
+
+
+select_backend("auto")
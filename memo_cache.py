@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Book2Video Memo Cache
+Memoização das saídas de IA por cena: LRU em memória + disco, com TTL
+Chave = hash de (etapa, modelo, prompt, parâmetros); pedidos idênticos simultâneos
+esperam a mesma chamada (single-flight)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_BYTES = 1024 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+# Varredura do diretório para aplicar o limite de disco a cada N gravações
+DISK_SWEEP_EVERY = 32
+# Valores bytes vão crus para o disco; o resto vira JSON
+_SUFFIXES = {"bytes": ".bin", "json": ".json"}
+
+
+def memo_key(stage, model, prompt, params=None):
+    """Stable hash of everything that determines an AI output"""
+    raw = json.dumps([stage, model, prompt, params or {}], ensure_ascii=False, sort_keys=True,
+                     separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _encode(value):
+    if isinstance(value, (bytes, bytearray)):
+        return "bytes", bytes(value)
+    return "json", json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _decode(kind, data):
+    return data if kind == "bytes" else json.loads(data)
+
+
+class MemoCache:
+    """Two-tier memoization cache with TTL, size limits and single-flight
+
+    The memory tier is a per-process LRU bounded in bytes. The disk tier keeps
+    one file per key (sharded by the first two hex digits); its mtime is the
+    write time used for the TTL and its atime is bumped on hits for LRU
+    eviction, so processes sharing the directory need no common index.
+    """
+
+    def __init__(self, directory, memory_bytes=DEFAULT_MEMORY_BYTES, disk_bytes=DEFAULT_DISK_BYTES,
+                 ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (kind, data, expires_at), do menos para o mais recentemente usado
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._inflight = {}
+        self._writes = 0
+        self._disk_used = None
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0,
+                         "expired": 0, "memory_evictions": 0, "disk_evictions": 0, "saved_cost_usd": 0.0}
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key):
+        """Cached value for `key`, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                kind, data, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return _decode(kind, data)
+                self._forget(key)
+                self.counters["expired"] += 1
+        found = self._read_disk(key, now)
+        with self._lock:
+            if found is None:
+                self.counters["misses"] += 1
+                return None
+            kind, data, expires_at = found
+            self.counters["disk_hits"] += 1
+            self._remember(key, kind, data, expires_at)
+        return _decode(kind, data)
+
+    def put(self, key, value):
+        kind, data = _encode(value)
+        expires_at = time.time() + self.ttl_seconds
+        path = self._path(key, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        with self._lock:
+            self._remember(key, kind, data, expires_at)
+            self._writes += 1
+            sweep = self._writes % DISK_SWEEP_EVERY == 0
+        if sweep:
+            self.sweep_disk()
+
+    def get_or_compute(self, key, compute, cost_usd=0.0):
+        """Cached value, or compute() once even if many threads ask at the same time"""
+        value = self.get(key)
+        if value is not None:
+            self._saved(cost_usd)
+            return value
+        future, leader = self._join(key)
+        if not leader:
+            value = future.result()
+            self._saved(cost_usd)
+            return value
+        return self._lead(key, future, compute)
+
+    async def aget_or_compute(self, key, compute, cost_usd=0.0):
+        """Async get_or_compute(): `compute` is a coroutine function
+
+        Waiters may be on other event loops or threads; they all share the
+        leader's concurrent.futures.Future.
+        """
+        value = self.get(key)
+        if value is not None:
+            self._saved(cost_usd)
+            return value
+        future, leader = self._join(key)
+        if not leader:
+            # Só chega aqui com um loop rodando; importar no topo custaria ~40 ms a quem não usa asyncio
+            import asyncio
+            value = await asyncio.wrap_future(future)
+            self._saved(cost_usd)
+            return value
+        try:
+            value = await compute()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self.put(key, value)
+        self._finish(key, future, value=value)
+        return value
+
+    def _join(self, key):
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None and key in self._memory:
+                # O líder terminou entre o get() e aqui
+                future = Future()
+                future.set_result(_decode(*self._memory[key][:2]))
+            if future is not None:
+                # Quem espera o líder não gasta chamada: conta como coalescido, não como miss
+                self.counters["misses"] -= 1
+                self.counters["coalesced"] += 1
+                return future, False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def _lead(self, key, future, compute):
+        try:
+            value = compute()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self.put(key, value)
+        self._finish(key, future, value=value)
+        return value
+
+    def _finish(self, key, future, value=None, error=None):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            # Cancelamento do líder vira erro comum para quem estava esperando
+            future.set_exception(error if isinstance(error, Exception) else RuntimeError("computation cancelled"))
+        else:
+            future.set_result(value)
+
+    def _saved(self, cost_usd):
+        if cost_usd:
+            with self._lock:
+                self.counters["saved_cost_usd"] += cost_usd
+
+    def _path(self, key, kind):
+        return os.path.join(self.directory, key[:2], key + _SUFFIXES[kind])
+
+    def _read_disk(self, key, now):
+        for kind in _SUFFIXES:
+            path = self._path(key, kind)
+            try:
+                with open(path, "rb") as f:
+                    written = os.fstat(f.fileno()).st_mtime
+                    if written + self.ttl_seconds <= now:
+                        break
+                    data = f.read()
+                # atime marca o último uso para a evicção por LRU
+                os.utime(path, (now, written))
+                return kind, data, written + self.ttl_seconds
+            except FileNotFoundError:
+                continue
+        else:
+            return None
+        with self._lock:
+            self.counters["expired"] += 1
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        return None
+
+    def _remember(self, key, kind, data, expires_at):
+        # Chamado com self._lock adquirido
+        self._forget(key)
+        if len(data) > self.memory_bytes // 4:
+            # Valor grande demais fica só no disco
+            return
+        self._memory[key] = (kind, data, expires_at)
+        self._memory_used += len(data)
+        while self._memory_used > self.memory_bytes:
+            _, (_, old, _) = self._memory.popitem(last=False)
+            self._memory_used -= len(old)
+            self.counters["memory_evictions"] += 1
+
+    def _forget(self, key):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_used -= len(entry[1])
+
+    def sweep_disk(self):
+        """Drop expired files, then least recently used ones past `disk_bytes`"""
+        now = time.time()
+        files = []
+        total = 0
+        expired = 0
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if st.st_mtime + self.ttl_seconds <= now:
+                    expired += _unlink(entry.path)
+                    continue
+                files.append((max(st.st_atime, st.st_mtime), st.st_size, entry.path))
+                total += st.st_size
+        evicted = 0
+        if total > self.disk_bytes:
+            files.sort()
+            for _, size, path in files:
+                if total <= self.disk_bytes:
+                    break
+                evicted += _unlink(path)
+                total -= size
+        with self._lock:
+            self.counters["expired"] += expired
+            self.counters["disk_evictions"] += evicted
+            self._disk_used = total
+        return total
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            entries = len(self._memory)
+            memory_used = self._memory_used
+            disk_used = self._disk_used
+        hits = counters["memory_hits"] + counters["disk_hits"] + counters["coalesced"]
+        lookups = hits + counters["misses"]
+        counters["saved_cost_usd"] = round(counters["saved_cost_usd"], 4)
+        counters.update({
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": entries,
+            "memory_bytes": memory_used,
+            "max_memory_bytes": self.memory_bytes,
+            "disk_bytes": disk_used,
+            "max_disk_bytes": self.disk_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        })
+        return counters
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+        return 1
+    except FileNotFoundError:
+        return 0
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_cache(directory, **options):
+    """One MemoCache per directory and process, so every job in a worker shares it"""
+    key = (os.getpid(), os.path.abspath(directory))
+    with _shared_lock:
+        cache = _shared.get(key)
+        if cache is None:
+            cache = _shared[key] = MemoCache(directory, **options)
+        return cache
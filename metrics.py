@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Book2Video Metrics
+Contadores e histogramas com buckets fixos, expostos no formato texto do Prometheus
+Requisições por rota, status e latência, mais a duração das etapas do processamento
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+# Segundos; o último bucket (+Inf) é implícito
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+EXPORT_INTERVAL = 1.0
+
+
+class Metrics:
+    """Counters and fixed-bucket histograms keyed by (name, labels)
+
+    `labels` is a tuple of (label, value) pairs. Recording is a dict lookup
+    and a few additions under one short lock; the Prometheus text is only
+    built when scraped. snapshot() returns plain JSON-able data, so
+    snapshots from several processes can be merged before rendering.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        # (nome, labels) -> [contagem por bucket..., contagem +Inf, soma]
+        self._histograms = {}
+        self._meta = {}
+
+    def describe(self, name, kind, help_text, buckets=None):
+        self._meta[name] = (kind, help_text, buckets)
+
+    def inc(self, name, labels=(), value=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        buckets = self._meta[name][2]
+        key = (name, labels)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            series[bisect_left(buckets, value)] += 1
+            series[-1] += value
+
+    def record_request(self, labels, seconds):
+        """One HTTP request: counter by (route, method, status) and latency by (route, method)"""
+        count_key = ("book2video_http_requests_total", labels)
+        latency_key = ("book2video_http_request_duration_seconds", labels[:2])
+        with self._lock:
+            self._counters[count_key] = self._counters.get(count_key, 0) + 1
+            series = self._histograms.get(latency_key)
+            if series is None:
+                series = self._histograms[latency_key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            series[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            series[-1] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                "histograms": [[name, list(labels), list(series)]
+                               for (name, labels), series in self._histograms.items()],
+            }
+
+    def start_export(self, path, interval=EXPORT_INTERVAL):
+        """Write snapshot() to `path` every `interval` seconds from a daemon thread"""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        def loop():
+            while True:
+                try:
+                    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                        json.dump(self.snapshot(), f)
+                    os.replace(tmp_path, path)
+                except OSError:
+                    pass
+                time.sleep(interval)
+
+        thread = threading.Thread(target=loop, name="b2v-metrics-export", daemon=True)
+        thread.start()
+        return thread
+
+    def render(self, snapshot=None, gauges=()):
+        """Prometheus text exposition of a (merged) snapshot plus `gauges`
+
+        `gauges` are (name, help, labels, value) tuples read at scrape time.
+        """
+        snapshot = snapshot or self.snapshot()
+        lines = []
+        described = set()
+
+        def header(name, kind, help_text):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for name, labels, value in sorted(snapshot["counters"], key=_series_order):
+            kind, help_text, _ = self._meta.get(name, ("counter", name, None))
+            header(name, kind, help_text)
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        for name, labels, series in sorted(snapshot["histograms"], key=_series_order):
+            kind, help_text, buckets = self._meta[name]
+            header(name, kind, help_text)
+            cumulative = 0
+            for bound, count in zip(buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f"{name}_bucket{_labels(labels + [['le', le]])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(series[-1])}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        for name, help_text, labels, value in gauges:
+            header(name, "gauge", help_text)
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def merge_snapshots(snapshots):
+    """Sum counters and histogram buckets of several snapshot() results"""
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, series in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = list(series)
+            else:
+                for i, value in enumerate(series):
+                    merged[i] += value
+    return {
+        "counters": [[name, [list(pair) for pair in labels], value] for (name, labels), value in counters.items()],
+        "histograms": [[name, [list(pair) for pair in labels], series]
+                       for (name, labels), series in histograms.items()],
+    }
+
+
+def load_snapshot(path):
+    """Snapshot exported by Metrics.start_export(), or None"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def counter_total(snapshot, name, **match):
+    """Sum of counter `name` over the series whose labels include `match`"""
+    return sum(value for series, labels, value in snapshot["counters"]
+               if series == name and _matches(labels, match))
+
+
+def histogram_totals(snapshot, name, **match):
+    """(count, sum) of histogram `name` over the series matching `match`"""
+    count = 0
+    total = 0.0
+    for series, labels, values in snapshot["histograms"]:
+        if series == name and _matches(labels, match):
+            count += sum(values[:-1])
+            total += values[-1]
+    return count, total
+
+
+def histogram_quantile(snapshot, name, buckets, quantile, **match):
+    """Estimated quantile of histogram `name`, interpolated inside its bucket like Prometheus does
+
+    None when there are no observations; values past the last finite bucket
+    are reported as that bucket's bound.
+    """
+    merged = None
+    for series, labels, values in snapshot["histograms"]:
+        if series == name and _matches(labels, match):
+            merged = list(values) if merged is None else [a + b for a, b in zip(merged, values)]
+    if merged is None:
+        return None
+    rank = quantile * sum(merged[:-1])
+    if rank <= 0:
+        return None
+    cumulative = 0
+    for i, count in enumerate(merged[:-1]):
+        if cumulative + count >= rank and count:
+            if i == len(buckets):
+                return buckets[-1]
+            lower = buckets[i - 1] if i else 0.0
+            return lower + (buckets[i] - lower) * (rank - cumulative) / count
+        cumulative += count
+    return buckets[-1]
+
+
+def _matches(labels, match):
+    pairs = dict(map(tuple, labels))
+    return all(pairs.get(key) == value for key, value in match.items())
+
+
+def _series_order(series):
+    return series[0], [list(pair) for pair in series[1]]
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class MetricsMixin:
+    """Counts and times every routed request into the handler class's `metrics`
+
+    Must come first in the handler's bases so the 401/429 answers of the
+    other mixins are recorded under the route they were meant for.
+    """
+
+    metrics = None
+    _response_status = None
+
+    def run_route(self, method, params=None):
+        if self.metrics is None:
+            super().run_route(method, params)
+            return
+        started = time.perf_counter()
+        self._response_status = None
+        try:
+            super().run_route(method, params)
+        finally:
+            # Sem resposta (ex.: cliente desconectou) conta como 499, como no nginx
+            labels = (("route", getattr(method, "__name__", "unknown")), ("method", self.command),
+                      ("status", str(self._response_status or 499)))
+            self.metrics.record_request(labels, time.perf_counter() - started)
+
+    def send_response(self, code, message=None):
+        self._response_status = code
+        super().send_response(code, message)
+
+
+def create_metrics():
+    """Metrics with the server's series described"""
+    metrics = Metrics()
+    metrics.describe("book2video_http_requests_total", "counter",
+                     "HTTP requests by route handler, method and status code")
+    metrics.describe("book2video_http_request_duration_seconds", "histogram",
+                     "HTTP request latency by route handler and method", LATENCY_BUCKETS)
+    metrics.describe("book2video_jobs_total", "counter", "Finished processing jobs by outcome")
+    metrics.describe("book2video_job_duration_seconds", "histogram",
+                     "Wall-clock seconds of finished processing jobs", STAGE_BUCKETS)
+    metrics.describe("book2video_stage_duration_seconds", "histogram",
+                     "Seconds spent in each processing stage", STAGE_BUCKETS)
+    metrics.describe("book2video_ai_cost_usd_total", "counter", "Estimated spend on AI provider calls")
+    metrics.describe("book2video_ai_memo_hits_total", "counter", "AI calls answered by the memo cache")
+    metrics.describe("book2video_ai_memo_misses_total", "counter", "AI calls sent to a provider")
+    metrics.describe("book2video_ai_memo_saved_usd_total", "counter",
+                     "Estimated AI spend avoided by the memo cache")
+    return metrics
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Book2Video Processing Pipeline
+Trabalho executado pela fila de processamento para cada projeto
+"""
+
+import os
+import time
+
+from ai_fanout import run_fanout
+from memo_cache import shared_cache
+from scene_planner import plan_book
+from video_assembly import assemble_video, ffmpeg_available
+
+# Etapas na ordem em que rodam, com a fração do tempo total de cada uma
+STAGES = (
+    ("parse", 0.10),
+    ("summarize", 0.20),
+    ("images", 0.35),
+    ("narration", 0.20),
+    ("assemble", 0.15),
+)
+# Atualizações de porcentagem por etapa
+PROGRESS_STEPS = 4
+# Etapas que o fan-out de IA executa juntas, cena a cena
+AI_STAGES = ("summarize", "images", "narration")
+
+
+def _no_progress(stage, percent):
+    pass
+
+
+def run_pipeline(payload, progress=None):
+    """Process one project and return the fields to merge into it
+
+    `progress(stage, percent)` is called as the stages advance; `percent`
+    covers the whole pipeline.
+    """
+    progress = progress or _no_progress
+    started = time.time()
+
+    # Simula o tempo de renderização das etapas que ainda não existem de verdade
+    render_seconds = payload.get("render_seconds", 0)
+    book_path = payload.get("book_path")
+    book_analysis = None
+    scenes = None
+    ai_stats = None
+    ai_url = payload.get("ai_url")
+    render_dir = payload.get("render_dir")
+    assembly = None
+    # Segundos por etapa; as etapas de IA feitas pelo fan-out contam juntas como "ai"
+    stage_seconds = {}
+    done = 0.0
+    for stage, weight in STAGES:
+        if ai_stats is not None and stage in AI_STAGES:
+            continue
+        progress(stage, done * 100)
+        stage_started = time.monotonic()
+        if stage in AI_STAGES and ai_url and scenes:
+            ai_weight = sum(w for name, w in STAGES if name in AI_STAGES)
+            base = done
+
+            def on_scene(finished, total):
+                progress("ai", (base + ai_weight * finished / total) * 100)
+
+            memo = shared_cache(**payload["memo"]) if payload.get("memo") else None
+            scenes, ai_stats = run_fanout(scenes, payload.get("visual_style", "educational"), on_scene,
+                                          base_url=ai_url, concurrency=payload.get("ai_concurrency"),
+                                          output_dir=render_dir, memo=memo)
+            stage_seconds["ai"] = round(time.monotonic() - stage_started, 3)
+            done += ai_weight
+            continue
+        if stage == "assemble" and ai_stats is not None and render_dir:
+            if ffmpeg_available():
+                base = done
+
+                def on_segment(ready, total):
+                    progress(stage, (base + weight * ready / total) * 100)
+
+                assembly = assemble_video(scenes, render_dir, payload.get("render_workers"),
+                                          on_segment=on_segment)
+            else:
+                assembly = {"skipped": "ffmpeg não encontrado"}
+            stage_seconds[stage] = round(time.monotonic() - stage_started, 3)
+            done += weight
+            progress(stage, done * 100)
+            continue
+        if stage == "parse" and book_path and os.path.exists(book_path):
+            book_analysis, scenes = plan_book(book_path, payload.get("target_duration_minutes", 3),
+                                              payload.get("title"))
+            stage_seconds[stage] = round(time.monotonic() - stage_started, 3)
+            done += weight
+            progress(stage, done * 100)
+            continue
+        for step in range(1, PROGRESS_STEPS + 1):
+            if render_seconds > 0:
+                time.sleep(render_seconds * weight / PROGRESS_STEPS)
+            progress(stage, (done + weight * step / PROGRESS_STEPS) * 100)
+        stage_seconds[stage] = round(time.monotonic() - stage_started, 3)
+        done += weight
+
+    result = {
+        "processing_time_seconds": round(time.time() - started, 3),
+        "stage_seconds": stage_seconds,
+        "total_duration_seconds": 207,
+        "cost_usd": 0.12,
+        "scenes_generated": 4,
+        "quality_rating": 9.1,
+        "book_analysis": book_analysis or {
+            "title": payload.get("title", "Demo Book"),
+            "word_count": 1250,
+            "estimated_reading_time_minutes": 6,
+            "chapters_detected": 3
+        },
+    }
+    if scenes:
+        result["scenes"] = scenes
+        result["scenes_generated"] = len(scenes)
+        result["total_duration_seconds"] = round(sum(scene["duration_seconds"] for scene in scenes), 1)
+    if ai_stats is not None:
+        result["ai_requests"] = ai_stats
+        # Só o que foi de fato chamado; o que veio do cache de memoização não custa
+        result["cost_usd"] = round(sum(provider["cost_usd"] for provider in ai_stats.values()), 4)
+    if assembly is not None:
+        result["video_assembly"] = assembly
+        if "video_path" in assembly:
+            result["video_path"] = assembly["video_path"]
+    return result
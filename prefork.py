@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Book2Video Pre-fork
+Vários processos servindo a mesma porta, com supervisor que reinicia os filhos
+Só usa a biblioteca padrão do Python (precisa de os.fork, ou seja, Linux/macOS)
+"""
+
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+DEFAULT_GRACE_SECONDS = 10.0
+# Filho que morre antes disso conta como crash em loop e reinicia com espera
+MIN_HEALTHY_SECONDS = 2.0
+MAX_RESTART_DELAY = 30.0
+SUPERVISOR_POLL_SECONDS = 0.2
+PUBLISH_INTERVAL = 1.0
+
+
+def prefork_supported():
+    return hasattr(os, "fork")
+
+
+def reuse_port_supported():
+    return hasattr(socket, "SO_REUSEPORT")
+
+
+class WorkerBoard:
+    """Numeric per-worker stats in shared memory, summed for /stats
+
+    Created by the supervisor before forking, so every child sees the same
+    array. Each worker only writes its own row; readers sum all rows.
+    """
+
+    def __init__(self, fields, workers):
+        self.fields = tuple(fields)
+        self.workers = workers
+        self._width = len(self.fields) + 2
+        # Por linha: pid, instante da publicação, depois os campos
+        from multiprocessing.sharedctypes import RawArray
+        self._values = RawArray("d", workers * self._width)
+
+    def publish(self, worker_id, values):
+        row = worker_id * self._width
+        for i, name in enumerate(self.fields):
+            self._values[row + 2 + i] = float(values.get(name, 0) or 0)
+        self._values[row] = os.getpid()
+        self._values[row + 1] = time.time()
+
+    def clear(self, worker_id):
+        row = worker_id * self._width
+        for i in range(self._width):
+            self._values[row + i] = 0.0
+
+    def rows(self):
+        """Live rows as dicts with worker id, pid and age of the data"""
+        now = time.time()
+        result = []
+        for worker_id in range(self.workers):
+            row = worker_id * self._width
+            pid = int(self._values[row])
+            if not pid:
+                continue
+            entry = {"worker": worker_id, "pid": pid,
+                     "age_seconds": round(now - self._values[row + 1], 3)}
+            for i, name in enumerate(self.fields):
+                entry[name] = self._values[row + 2 + i]
+            result.append(entry)
+        return result
+
+    def totals(self):
+        totals = dict.fromkeys(self.fields, 0.0)
+        for entry in self.rows():
+            for name in self.fields:
+                totals[name] += entry[name]
+        return totals
+
+    def start_publisher(self, worker_id, snapshot, interval=PUBLISH_INTERVAL):
+        """Publish `snapshot()` from a daemon thread every `interval` seconds"""
+        def loop():
+            while True:
+                try:
+                    self.publish(worker_id, snapshot())
+                except Exception:
+                    pass
+                time.sleep(interval)
+
+        thread = threading.Thread(target=loop, name=f"b2v-board-{worker_id}", daemon=True)
+        thread.start()
+        return thread
+
+
+def open_listener(server_address, reuse_port):
+    """Resolve the port (and the shared socket when SO_REUSEPORT is not used)
+
+    Returns (server_address, listen_socket); listen_socket is None when every
+    child binds its own SO_REUSEPORT socket.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            # Só verifica a porta (e resolve a porta 0); cada filho faz o próprio bind
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            sock.bind(server_address)
+            address = sock.getsockname()[:2]
+            sock.close()
+            return (server_address[0], address[1]), None
+        sock.bind(server_address)
+        sock.listen(128)
+        # Não bloqueante: o filho que perde a corrida no accept só volta ao select
+        sock.setblocking(False)
+        return (server_address[0], sock.getsockname()[1]), sock
+    except BaseException:
+        sock.close()
+        raise
+
+
+def serve_until_terminated(httpd, grace_seconds=DEFAULT_GRACE_SECONDS):
+    """serve_forever until SIGTERM, then stop accepting and drain in-flight requests"""
+    def on_term(signum, frame):
+        # shutdown() espera o loop terminar, então não pode rodar na thread do loop
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+    if hasattr(httpd, "drain_timeout"):
+        httpd.drain_timeout = grace_seconds
+    previous = signal.signal(signal.SIGTERM, on_term)
+    try:
+        httpd.serve_forever()
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+    drain = getattr(httpd, "drain", None)
+    if drain is not None:
+        return drain(grace_seconds)
+    return True
+
+
+class PreforkSupervisor:
+    """Forks `workers` children that run `start_worker` and keeps them alive
+
+    `start_worker(worker_id, server_address, listen_socket, reuse_port)` runs in
+    the child and returns when the child should exit (normally after SIGTERM).
+    """
+
+    def __init__(self, workers, server_address, start_worker, reuse_port=None,
+                 grace_seconds=DEFAULT_GRACE_SECONDS, board=None):
+        if not prefork_supported():
+            raise RuntimeError("Pre-fork mode needs os.fork (Linux/macOS)")
+        self.workers = workers
+        self.start_worker = start_worker
+        self.reuse_port = reuse_port_supported() if reuse_port is None else reuse_port
+        self.grace_seconds = grace_seconds
+        self.board = board
+        self.server_address, self.listen_socket = open_listener(server_address, self.reuse_port)
+        self.restarts = 0
+        self._children = {}
+        self._started_at = {}
+        self._restart_delay = {}
+        self._restart_due = {}
+        self._stopping = False
+
+    def run(self):
+        """Start the children and supervise them until SIGTERM/SIGINT"""
+        previous = {sig: signal.signal(sig, self._on_stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            for worker_id in range(self.workers):
+                self._spawn(worker_id)
+            self._supervise()
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+            if self.listen_socket is not None:
+                self.listen_socket.close()
+
+    def _on_stop(self, signum, frame):
+        if not self._stopping:
+            self._stopping = True
+            self._deadline = time.monotonic() + self.grace_seconds + 1.0
+            self._signal_children(signal.SIGTERM)
+
+    def _signal_children(self, sig):
+        for pid in list(self._children):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def _spawn(self, worker_id):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                # Ctrl+C chega ao grupo todo; quem coordena a parada é o supervisor
+                signal.signal(signal.SIGINT, signal.SIG_IGN)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                self.start_worker(worker_id, self.server_address, self.listen_socket, self.reuse_port)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self._children[pid] = worker_id
+        self._started_at[worker_id] = time.monotonic()
+
+    def _supervise(self):
+        while self._children or (self._restart_due and not self._stopping):
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid, status = 0, 0
+            if pid:
+                self._reap(pid, status)
+                continue
+            now = time.monotonic()
+            if self._stopping:
+                self._restart_due.clear()
+                if now > self._deadline:
+                    self._signal_children(signal.SIGKILL)
+            else:
+                for worker_id, due in list(self._restart_due.items()):
+                    if now >= due:
+                        del self._restart_due[worker_id]
+                        self.restarts += 1
+                        self._spawn(worker_id)
+            time.sleep(SUPERVISOR_POLL_SECONDS)
+
+    def _reap(self, pid, status):
+        worker_id = self._children.pop(pid, None)
+        if worker_id is None:
+            return
+        if self.board is not None:
+            self.board.clear(worker_id)
+        if self._stopping:
+            return
+        uptime = time.monotonic() - self._started_at.get(worker_id, 0)
+        if uptime < MIN_HEALTHY_SECONDS:
+            delay = min(max(self._restart_delay.get(worker_id, 0.5) * 2, 1.0), MAX_RESTART_DELAY)
+        else:
+            delay = 0.0
+        self._restart_delay[worker_id] = delay
+        print(f"⚠️  Worker {worker_id} (pid {pid}) saiu com status {os.waitstatus_to_exitcode(status)}; "
+              f"reiniciando em {delay:.1f}s")
+        self._restart_due[worker_id] = time.monotonic() + delay
+
+
+def add_prefork_arguments(parser):
+    """Register the pre-fork CLI flags on an argparse parser"""
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processos servindo a mesma porta; 1 = sem pre-fork (padrão: 1)")
+    parser.add_argument("--shared-socket", action="store_true",
+                        help="um socket herdado por todos os processos em vez de SO_REUSEPORT")
+    parser.add_argument("--grace-seconds", type=float, default=DEFAULT_GRACE_SECONDS,
+                        help=f"tempo para terminar requisições em andamento no SIGTERM "
+                             f"(padrão: {DEFAULT_GRACE_SECONDS:g})")
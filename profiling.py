@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Book2Video Request Profiling
+Tempos por fase de cada requisição (cabeçalhos, corpo, handler, serialização, escrita)
+cProfile por amostragem ou sob demanda (cabeçalho X-Profile) e log de requisições lentas com a pilha
+Desligado (sem --profiling) custa só uma verificação de atributo por requisição
+"""
+
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+PROFILE_HEADER = "X-Profile"
+ADMIN_TOKEN_ENV = "BOOK2VIDEO_ADMIN_TOKEN"
+TOP_FUNCTIONS = 15
+STACK_DEPTH = 12
+RECENT_PROFILES = 20
+RECENT_SLOW = 50
+# O vigia acorda a cada quarto do limite, mas nunca mais que 100 vezes por segundo
+MIN_WATCH_INTERVAL = 0.01
+
+
+class RequestProfiler:
+    """Per-process profiling settings plus the recent profiles and slow requests
+
+    `sample_rate` is the fraction of requests run under cProfile; a request
+    can also ask for it with `X-Profile: <admin token>`. Requests slower than
+    `slow_ms` are logged with their phases and, when the watchdog caught
+    them while still running, the top frames of their stack.
+    """
+
+    def __init__(self, sample_rate=0.0, slow_ms=0, admin_token=None):
+        self.admin_token = admin_token
+        self._lock = threading.Lock()
+        # Um cProfile por vez: perfis simultâneos em threads diferentes se atrapalham
+        self._profile_lock = threading.Lock()
+        self._inflight = {}
+        self._watchdog = None
+        self.recent_profiles = deque(maxlen=RECENT_PROFILES)
+        self.recent_slow = deque(maxlen=RECENT_SLOW)
+        self.counters = {"traced": 0, "profiled": 0, "profile_skipped_busy": 0, "slow": 0}
+        self.sample_rate = 0.0
+        self.slow_seconds = 0.0
+        self.configure(sample_rate=sample_rate, slow_ms=slow_ms)
+
+    def configure(self, sample_rate=None, slow_ms=None):
+        """Change the settings at run time (e.g. from the admin endpoint)"""
+        if sample_rate is not None:
+            if not 0.0 <= sample_rate <= 1.0:
+                raise ValueError("sample_rate must be between 0 and 1")
+            self.sample_rate = float(sample_rate)
+        if slow_ms is not None:
+            if slow_ms < 0:
+                raise ValueError("slow_ms must be >= 0")
+            self.slow_seconds = slow_ms / 1000.0
+            if self.slow_seconds and self._watchdog is None:
+                self._watchdog = threading.Thread(target=self._watch, name="b2v-slow-watch", daemon=True)
+                self._watchdog.start()
+        # Sem amostragem, sem log de lentas e sem token: nem os tempos por fase são medidos
+        self.tracing = bool(self.sample_rate or self.slow_seconds or self.admin_token)
+
+    def settings(self):
+        return {"sample_rate": self.sample_rate, "slow_ms": round(self.slow_seconds * 1000, 3),
+                "header_trigger": bool(self.admin_token)}
+
+    def wants_profile(self, header):
+        if self.admin_token and header and token_matches(header, self.admin_token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self, method, path):
+        """Register a traced request for the slow-request watchdog; returns its entry"""
+        entry = [time.perf_counter(), method, path, None]
+        if self.slow_seconds:
+            with self._lock:
+                self._inflight[threading.get_ident()] = entry
+        return entry
+
+    def finish(self, entry, phases, profile=None):
+        """Record a finished request; returns the slow-request report, if it was slow"""
+        total = time.perf_counter() - entry[0]
+        if self.slow_seconds:
+            with self._lock:
+                self._inflight.pop(threading.get_ident(), None)
+        report = None
+        with self._lock:
+            self.counters["traced"] += 1
+            if profile is not None:
+                self.counters["profiled"] += 1
+        timings = phase_report(phases, total)
+        if profile is not None:
+            self.recent_profiles.append({
+                "method": entry[1], "path": entry[2], "at": time.time(),
+                "phases_ms": timings, "top_functions": top_functions(profile),
+            })
+        if self.slow_seconds and total >= self.slow_seconds:
+            report = {"method": entry[1], "path": entry[2], "at": time.time(),
+                      "phases_ms": timings, "stack": entry[3]}
+            with self._lock:
+                self.counters["slow"] += 1
+            self.recent_slow.append(report)
+        return report
+
+    def try_profile(self):
+        """A started cProfile.Profile, or None when another request is being profiled"""
+        if not self._profile_lock.acquire(blocking=False):
+            with self._lock:
+                self.counters["profile_skipped_busy"] += 1
+            return None
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Outro profiler (ex.: um depurador) já está ativo neste processo
+            self._profile_lock.release()
+            return None
+        return profile
+
+    def stop_profile(self, profile):
+        profile.disable()
+        self._profile_lock.release()
+
+    def _watch(self):
+        while True:
+            slow = self.slow_seconds
+            time.sleep(max(slow / 4, MIN_WATCH_INTERVAL) if slow else 1.0)
+            if not slow:
+                continue
+            now = time.perf_counter()
+            with self._lock:
+                late = [(ident, entry) for ident, entry in self._inflight.items()
+                        if entry[3] is None and now - entry[0] >= slow]
+            if not late:
+                continue
+            frames = sys._current_frames()
+            for ident, entry in late:
+                frame = frames.get(ident)
+                if frame is not None:
+                    # Onde a requisição estava enquanto já passava do limite
+                    entry[3] = [f"{os.path.basename(item.filename)}:{item.lineno} {item.name}"
+                                for item in traceback.extract_stack(frame)[-STACK_DEPTH:]]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["in_flight"] = len(self._inflight)
+        stats.update(self.settings())
+        return stats
+
+
+def token_matches(given, token):
+    """Constant-time token check; bytes, since compare_digest rejects non-ASCII str"""
+    return hmac.compare_digest(given.encode("utf-8"), token.encode("utf-8"))
+
+
+def phase_report(phases, total):
+    """Milliseconds per phase; "handler" is what is left of the routed time"""
+    report = {name: round(seconds * 1000, 3) for name, seconds in phases.items()}
+    routed = total - phases["body"] - phases["serialize"] - phases["write"]
+    report["handler"] = round(max(routed, 0.0) * 1000, 3)
+    report["total"] = round((total + phases["parse"]) * 1000, 3)
+    return report
+
+
+def top_functions(profile, limit=TOP_FUNCTIONS):
+    """The functions with the most own time in a finished profile
+
+    Sorted by own time rather than cumulative: by cumulative time the top
+    entries would always be the run_route chain of the handler mixins.
+    """
+    # pstats custa ~18 ms para importar: só quando há um perfil para ler
+    import pstats
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in pstats.Stats(profile).stats.items():
+        rows.append((own, cumulative, calls, f"{os.path.basename(filename)}:{line}({name})"))
+    rows.sort(reverse=True)
+    return [{"function": where, "calls": calls, "own_ms": round(own * 1000, 3),
+             "cumulative_ms": round(cumulative * 1000, 3)}
+            for own, cumulative, calls, where in rows[:limit]]
+
+
+class _TimedReader:
+    """Request body wrapper adding the time spent reading to phases["body"]"""
+
+    def __init__(self, raw, phases):
+        self.raw = raw
+        self.phases = phases
+
+    def read(self, size=-1):
+        started = time.perf_counter()
+        try:
+            return self.raw.read(size)
+        finally:
+            self.phases["body"] += time.perf_counter() - started
+
+    def readline(self, size=-1):
+        started = time.perf_counter()
+        try:
+            return self.raw.readline(size)
+        finally:
+            self.phases["body"] += time.perf_counter() - started
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class _TimedWriter:
+    """Response wrapper adding the time spent writing to phases["write"]"""
+
+    def __init__(self, raw, phases):
+        self.raw = raw
+        self.phases = phases
+
+    def write(self, data):
+        started = time.perf_counter()
+        try:
+            return self.raw.write(data)
+        finally:
+            self.phases["write"] += time.perf_counter() - started
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class ProfilingMixin:
+    """Phase timings, cProfile sampling and slow-request logging around run_route
+
+    Goes first in the handler's bases. With `profiler` unset (the default)
+    every hook returns straight to the next class. Handlers that serialize
+    responses add to `request_phases["serialize"]` when it is not None.
+    """
+
+    profiler = None
+    request_phases = None
+    _parse_seconds = 0.0
+
+    def parse_request(self):
+        if self.profiler is None or not self.profiler.tracing:
+            return super().parse_request()
+        started = time.perf_counter()
+        try:
+            return super().parse_request()
+        finally:
+            self._parse_seconds = time.perf_counter() - started
+
+    def run_route(self, method, params=None):
+        profiler = self.profiler
+        if profiler is None or not profiler.tracing:
+            super().run_route(method, params)
+            return
+        phases = self.request_phases = {"parse": self._parse_seconds, "body": 0.0, "serialize": 0.0, "write": 0.0}
+        profile = None
+        if profiler.wants_profile(self.headers.get(PROFILE_HEADER)):
+            profile = profiler.try_profile()
+        rfile, wfile = self.rfile, self.wfile
+        self.rfile = _TimedReader(rfile, phases)
+        self.wfile = _TimedWriter(wfile, phases)
+        entry = profiler.start(self.command, self.path)
+        try:
+            super().run_route(method, params)
+        finally:
+            if profile is not None:
+                profiler.stop_profile(profile)
+            # O KeepAliveMixin precisa do RequestBody original para descartar o resto do corpo
+            self.rfile, self.wfile = rfile, wfile
+            self.request_phases = None
+            report = profiler.finish(entry, phases, profile)
+            if report is not None:
+                self.log_slow_request(report)
+
+    def log_slow_request(self, report):
+        phases = " ".join(f"{name}={value}" for name, value in report["phases_ms"].items())
+        self.log_message("slow request %s %s: %s ms", report["method"], report["path"], phases)
+        for frame in report["stack"] or ():
+            sys.stderr.write(f"    {frame}\n")
+
+
+def add_profiling_arguments(parser):
+    parser.add_argument("--profiling", action="store_true",
+                        help="liga tempos por fase, cProfile sob demanda e /admin/profiling")
+    parser.add_argument("--profile-sample-rate", type=float, default=0.0,
+                        help="fração das requisições perfiladas com cProfile (padrão: 0)")
+    parser.add_argument("--slow-request-ms", type=float, default=0,
+                        help="loga requisições mais lentas que isso, com a pilha (padrão: 0 = desligado)")
+    parser.add_argument("--admin-token", default=None,
+                        help=f"token de /admin/* e do cabeçalho {PROFILE_HEADER} (padrão: ${ADMIN_TOKEN_ENV})")
+
+
+def create_profiler(args):
+    """The profiler configured by add_profiling_arguments(), or None when disabled"""
+    if not args.profiling:
+        return None
+    return RequestProfiler(args.profile_sample_rate, args.slow_request_ms,
+                           args.admin_token or os.environ.get(ADMIN_TOKEN_ENV))
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Book2Video Project Index
+Índices secundários para listar projetos paginados sem varrer tudo
+"""
+
+import base64
+import binascii
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(key):
+    created_ts, project_id = key
+    raw = f"{created_ts!r}|{project_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_ts, project_id = raw.split("|", 1)
+        return float(created_ts), project_id
+    except (ValueError, UnicodeError, binascii.Error):
+        raise InvalidCursor("Invalid cursor")
+
+
+class ProjectIndex:
+    """Sorted (created_at, id) lists per status/owner filter plus status counters
+
+    Every combination of the two filters (including "any") has its own sorted
+    list, so a page is two bisects and a slice regardless of how many projects
+    exist. Updates touch at most four lists.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lists = {}
+        self._status_counts = Counter()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, project_id, created_ts, status, owner_id=None):
+        if project_id in self._entries:
+            self.remove(project_id)
+        key = (created_ts, project_id)
+        self._entries[project_id] = (key, status, owner_id)
+        for list_key in self._list_keys(status, owner_id):
+            insort(self._lists.setdefault(list_key, []), key)
+        self._status_counts[status] += 1
+
+    def update_status(self, project_id, status):
+        entry = self._entries.get(project_id)
+        if entry is None or entry[1] == status:
+            return
+        key, old_status, owner_id = entry
+        for list_key in self._status_list_keys(old_status, owner_id):
+            self._discard(list_key, key)
+        for list_key in self._status_list_keys(status, owner_id):
+            insort(self._lists.setdefault(list_key, []), key)
+        self._entries[project_id] = (key, status, owner_id)
+        self._status_counts[old_status] -= 1
+        self._status_counts[status] += 1
+
+    def update(self, project_id, status, owner_id):
+        """Re-index a project whose status and/or owner may have changed"""
+        entry = self._entries.get(project_id)
+        if entry is None:
+            return
+        key, _, old_owner = entry
+        if old_owner == owner_id:
+            self.update_status(project_id, status)
+        else:
+            # Dono novo muda as listas por dono de todos os filtros: mais simples reinserir
+            self.remove(project_id)
+            self.add(project_id, key[0], status, owner_id)
+
+    def remove(self, project_id):
+        entry = self._entries.pop(project_id, None)
+        if entry is None:
+            return
+        key, status, owner_id = entry
+        for list_key in self._list_keys(status, owner_id):
+            self._discard(list_key, key)
+        self._status_counts[status] -= 1
+
+    def count(self, status=None):
+        """Projects with `status` (all projects when None), O(1)"""
+        if status is None:
+            return len(self._entries)
+        return self._status_counts.get(status, 0)
+
+    def status_counts(self):
+        return {status: count for status, count in self._status_counts.items() if count}
+
+    def page(self, limit, cursor=None, status=None, owner_id=None, descending=True):
+        """Return (project_ids, next_cursor) for one page of a filtered listing"""
+        keys = self._lists.get((status, owner_id), [])
+        after = decode_cursor(cursor) if cursor else None
+        if descending:
+            end = bisect_left(keys, after) if after is not None else len(keys)
+            start = max(end - limit, 0)
+            selected = keys[start:end][::-1]
+            has_more = start > 0
+        else:
+            start = bisect_right(keys, after) if after is not None else 0
+            selected = keys[start:start + limit]
+            has_more = start + limit < len(keys)
+        next_cursor = encode_cursor(selected[-1]) if selected and has_more else None
+        return [project_id for _, project_id in selected], next_cursor
+
+    def _list_keys(self, status, owner_id):
+        keys = [(None, None)] + self._status_list_keys(status, owner_id)
+        if owner_id is not None:
+            keys.append((None, owner_id))
+        return keys
+
+    def _status_list_keys(self, status, owner_id):
+        if owner_id is None:
+            return [(status, None)]
+        return [(status, None), (status, owner_id)]
+
+    def _discard(self, list_key, key):
+        keys = self._lists.get(list_key)
+        if not keys:
+            return
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Book2Video Rate Limiting
+Token bucket por usuário/IP com limites por plano (free, pro, enterprise)
+Respostas 429 com Retry-After e cabeçalhos X-RateLimit-*
+"""
+
+import heapq
+import math
+import threading
+import time
+
+# Requisições por minuto por regra e plano ("*" vale para qualquer plano);
+# a capacidade do balde é o limite inteiro, reposto continuamente ao longo do minuto
+DEFAULT_LIMITS = {
+    "general": {"free": 100, "pro": 300, "enterprise": 1000},
+    "login": {"*": 5},
+    "upload": {"free": 2, "pro": 10, "enterprise": 30},
+    "status": {"free": 30, "pro": 120, "enterprise": 600},
+}
+WINDOW_SECONDS = 60
+DEFAULT_MAX_KEYS = 100000
+# Baldes parados há uma janela inteira já estão cheios: são iguais a um balde novo
+SWEEP_INTERVAL = WINDOW_SECONDS
+
+
+class RateLimiter:
+    """Token buckets keyed by (rule, client) with tier-aware limits
+
+    Each bucket is two floats (tokens, last update). Buckets idle for a full
+    window have refilled completely, so they are dropped on a periodic sweep
+    and memory stays proportional to the clients active in the last minute,
+    capped at `max_keys`.
+    """
+
+    def __init__(self, limits=None, max_keys=DEFAULT_MAX_KEYS, clock=time.monotonic):
+        self.limits = limits or DEFAULT_LIMITS
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets = {}
+        # (regra, plano) -> (limite, tokens por segundo), resolvido uma vez
+        self._resolved = {}
+        self._next_sweep = clock() + SWEEP_INTERVAL
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+
+    def limit_for(self, rule, tier):
+        limits = self.limits.get(rule) or self.limits["general"]
+        return limits.get(tier) or limits.get("*") or limits.get("free") or min(limits.values())
+
+    def hit(self, rule, key, tier="free", cost=1):
+        """Take `cost` tokens from the client's bucket for `rule`
+
+        Returns (allowed, limit, remaining, retry_after, reset) with the last
+        two in whole seconds. A plain tuple: this runs on every request.
+        """
+        resolved = self._resolved.get((rule, tier))
+        if resolved is None:
+            limit = self.limit_for(rule, tier)
+            resolved = self._resolved[(rule, tier)] = (limit, limit / WINDOW_SECONDS)
+        limit, rate = resolved
+        now = self._clock()
+        bucket_key = (rule, key)
+        with self._lock:
+            if now >= self._next_sweep or len(self._buckets) >= self.max_keys:
+                self._sweep(now)
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                tokens = limit
+                bucket = self._buckets[bucket_key] = [limit, now]
+            else:
+                tokens = min(limit, bucket[0] + (now - bucket[1]) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+                self.allowed += 1
+            else:
+                self.limited += 1
+            bucket[0] = tokens
+            bucket[1] = now
+        retry_after = 0 if allowed else math.ceil((cost - tokens) / rate)
+        return allowed, limit, int(tokens), retry_after, math.ceil((limit - tokens) / rate)
+
+    def _sweep(self, now):
+        # Chamado com self._lock adquirido
+        self._next_sweep = now + SWEEP_INTERVAL
+        idle = [key for key, (_, updated) in self._buckets.items() if now - updated >= WINDOW_SECONDS]
+        for key in idle:
+            del self._buckets[key]
+        excess = len(self._buckets) - self.max_keys + 1
+        if excess > 0:
+            # Ainda cheio de clientes ativos: descarta os parados há mais tempo (e um pouco além)
+            excess = max(excess, self.max_keys // 10)
+            oldest = heapq.nsmallest(excess, self._buckets.items(), key=lambda item: item[1][1])
+            for key, _ in oldest:
+                del self._buckets[key]
+            idle.extend(oldest)
+        self.evicted += len(idle)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active_keys": len(self._buckets),
+                "max_keys": self.max_keys,
+                "allowed": self.allowed,
+                "limited": self.limited,
+                "evicted": self.evicted,
+            }
+
+
+class RateLimitMixin:
+    """Checks the handler class's `rate_limiter` before every routed request
+
+    `rate_limit_rules` maps route handler names to a rule of the limiter
+    (anything else is "general"); handlers listed in `rate_limit_exempt` skip
+    the check. The client identity comes from rate_limit_identity(), which
+    handlers override once requests carry an authenticated user.
+    """
+
+    rate_limiter = None
+    rate_limit_rules = {}
+    rate_limit_exempt = frozenset()
+    _rate_limit_headers = None
+
+    def rate_limit_identity(self):
+        """(bucket key, subscription tier) for this request"""
+        return "ip:" + self.client_address[0], "free"
+
+    def run_route(self, method, params=None):
+        self._rate_limit_headers = None
+        name = getattr(method, "__name__", "")
+        if self.rate_limiter is None or name in self.rate_limit_exempt:
+            super().run_route(method, params)
+            return
+        key, tier = self.rate_limit_identity()
+        allowed, limit, remaining, retry_after, reset = self.rate_limiter.hit(
+            self.rate_limit_rules.get(name, "general"), key, tier)
+        self._rate_limit_headers = (
+            ("X-RateLimit-Limit", str(limit)),
+            ("X-RateLimit-Remaining", str(remaining)),
+            ("X-RateLimit-Reset", str(reset)),
+        )
+        if allowed:
+            super().run_route(method, params)
+        else:
+            super().run_route(self.send_rate_limited, {"retry_after": retry_after})
+
+    def end_headers(self):
+        if self._rate_limit_headers:
+            for name, value in self._rate_limit_headers:
+                self.send_header(name, value)
+            self._rate_limit_headers = None
+        super().end_headers()
+
+    def send_rate_limited(self, retry_after):
+        body = f'{{"error": "Rate limit exceeded", "retry_after": {retry_after}}}'.encode("utf-8")
+        self.send_response(429)
+        self.send_header("Retry-After", str(retry_after))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def add_rate_limit_arguments(parser):
+    parser.add_argument("--no-rate-limit", action="store_true",
+                        help="desliga o limite de requisições por usuário/IP (ex.: testes de carga)")
+    parser.add_argument("--rate-limit-max-keys", type=int, default=DEFAULT_MAX_KEYS,
+                        help=f"clientes acompanhados no limitador (padrão: {DEFAULT_MAX_KEYS})")
+
+
+def create_rate_limiter(args):
+    """The limiter configured by add_rate_limit_arguments(), or None when disabled"""
+    if args.no_rate_limit:
+        return None
+    return RateLimiter(max_keys=args.rate_limit_max_keys)
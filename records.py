@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Book2Video Records
+Users, projects e cenas como classes com __slots__ em vez de dicts livres
+Datas guardadas como segundos (float) e formatadas em ISO 8601 só ao virar dict/JSON
+"""
+
+import json
+import sys
+from array import array
+from datetime import datetime
+from operator import attrgetter
+
+
+class RecordError(ValueError):
+    """A record with a missing, unknown or mistyped field"""
+
+
+def to_timestamp(value):
+    """Seconds since the epoch from a number or an ISO 8601 string"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            pass
+    raise RecordError(f"invalid timestamp: {value!r}")
+
+
+def format_timestamp(seconds):
+    return datetime.fromtimestamp(seconds).isoformat()
+
+
+def _string(name, value):
+    if not isinstance(value, str):
+        raise RecordError(f"{name} must be a string")
+    return value
+
+
+def _label(name, value):
+    # Status, plano, estilo...: poucos valores distintos, uma cópia de cada
+    return sys.intern(_string(name, value))
+
+
+def _integer(name, value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise RecordError(f"{name} must be an integer")
+    return value
+
+
+def _number(name, value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise RecordError(f"{name} must be a number")
+    return value
+
+
+def _boolean(name, value):
+    if not isinstance(value, bool):
+        raise RecordError(f"{name} must be a boolean")
+    return value
+
+
+def _object(name, value):
+    if not isinstance(value, dict):
+        raise RecordError(f"{name} must be an object")
+    return value
+
+
+def _timestamp(name, value):
+    try:
+        return to_timestamp(value)
+    except RecordError:
+        raise RecordError(f"{name} must be a timestamp or ISO 8601 date")
+
+
+class Record:
+    """Base of the slotted record types
+
+    `FIELDS` maps each field to its check, in slot order; the check returns
+    the value to store. Missing fields and None are the same thing: the slot
+    holds None and to_dict() leaves the key out. `ENCODERS` turn stored
+    values back into their JSON form.
+    """
+
+    __slots__ = ()
+    FIELDS = {}
+    REQUIRED = ()
+    ENCODERS = {}
+
+    def __init__(self, **fields):
+        self._load(fields)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Validated record from a dict (or the record itself); RecordError when invalid"""
+        if isinstance(data, cls):
+            return data
+        if not isinstance(data, dict):
+            raise RecordError(f"{cls.__name__} must be an object")
+        record = cls.__new__(cls)
+        record._load(data)
+        return record
+
+    @classmethod
+    def from_json(cls, text):
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            raise RecordError(f"invalid JSON: {e}")
+        return cls.from_dict(data)
+
+    def _load(self, data):
+        unknown = data.keys() - self.FIELDS.keys()
+        if unknown:
+            raise RecordError(f"unknown {type(self).__name__} field(s): {', '.join(sorted(map(str, unknown)))}")
+        for name in self.REQUIRED:
+            if data.get(name) is None:
+                raise RecordError(f"{name} is required")
+        for name, check in self.FIELDS.items():
+            value = data.get(name)
+            setattr(self, name, None if value is None else check(name, value))
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Lê todos os slots numa chamada em C; to_dict roda a cada leitura do armazenamento
+        cls._names = tuple(cls.FIELDS)
+        cls._values = attrgetter(*cls._names)
+
+    def to_dict(self):
+        data = {name: value for name, value in zip(self._names, self._values(self)) if value is not None}
+        if self.ENCODERS:
+            for name, encode in self.ENCODERS.items():
+                if name in data:
+                    data[name] = encode(data[name])
+        return data
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._values(self) == other._values(other)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS
+                           if getattr(self, name) is not None)
+        return f"{type(self).__name__}({fields})"
+
+
+class User(Record):
+    FIELDS = {
+        "id": _string,
+        "email": _string,
+        "full_name": _string,
+        "subscription_tier": _label,
+        "password_hash": _string,
+        "created_at": _timestamp,
+    }
+    __slots__ = tuple(FIELDS)
+    REQUIRED = ("id",)
+    ENCODERS = {"created_at": format_timestamp}
+
+
+class Scene(Record):
+    """One planned scene, plus what the AI fan-out and rendering added to it"""
+
+    FIELDS = {
+        "scene_number": _integer,
+        "chapter": _string,
+        "start_paragraph": _integer,
+        "end_paragraph": _integer,
+        "source_word_count": _integer,
+        "duration_seconds": _number,
+        "narration": _string,
+        "narration_word_count": _integer,
+        "emotional_tone": _label,
+        "visual_description": _string,
+        "image_url": _string,
+        "image_path": _string,
+        "audio_bytes": _integer,
+        "audio_sha256": _string,
+        "audio_path": _string,
+        "ai_seconds": _number,
+    }
+    __slots__ = tuple(FIELDS)
+    REQUIRED = ("scene_number",)
+
+
+def _scenes(name, value):
+    if not isinstance(value, (list, tuple)):
+        raise RecordError(f"{name} must be a list")
+    return tuple(Scene.from_dict(scene) for scene in value)
+
+
+def _encode_scenes(scenes):
+    return [scene.to_dict() for scene in scenes]
+
+
+def _field_versions(name, value):
+    # Versão de cada campo numa array alinhada com Project.FIELDS (0 = nunca alterado)
+    versions = array("I", bytes(4 * len(Project.FIELDS)))
+    for field, version in _object(name, value).items():
+        position = PROJECT_FIELD_POSITIONS.get(field)
+        if position is None:
+            raise RecordError(f"{name} names an unknown field: {field}")
+        versions[position] = _integer(name, version)
+    return versions
+
+
+def _encode_field_versions(versions):
+    return {field: version for field, version in zip(Project.FIELDS, versions) if version}
+
+
+class Project(Record):
+    """A project from upload to finished video
+
+    Nested results that are only ever sent back to clients whole
+    (book_analysis, stage_seconds, ai_requests, video_assembly) stay dicts.
+    """
+
+    FIELDS = {
+        "id": _string,
+        "title": _string,
+        "status": _label,
+        "owner_id": _label,
+        "original_filename": _string,
+        "content_type": _label,
+        "file_size": _integer,
+        "sha256": _string,
+        "target_duration_minutes": _integer,
+        "visual_style": _label,
+        "created_at": _timestamp,
+        "version": _integer,
+        "field_versions": _field_versions,
+        "job_id": _string,
+        "cache_hit": _boolean,
+        "error": _string,
+        "processing_time_seconds": _number,
+        "stage_seconds": _object,
+        "total_duration_seconds": _number,
+        "cost_usd": _number,
+        "scenes_generated": _integer,
+        "quality_rating": _number,
+        "book_analysis": _object,
+        "scenes": _scenes,
+        "ai_requests": _object,
+        "video_assembly": _object,
+        "video_path": _string,
+    }
+    __slots__ = tuple(FIELDS)
+    REQUIRED = ("id", "status", "created_at")
+    ENCODERS = {
+        "created_at": format_timestamp,
+        "field_versions": _encode_field_versions,
+        "scenes": _encode_scenes,
+    }
+
+
+PROJECT_FIELD_POSITIONS = {field: position for position, field in enumerate(Project.FIELDS)}
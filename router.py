@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Book2Video Router
+Tabela de rotas método+caminho compilada numa trie, com parâmetros tipados
+"""
+
+import urllib.parse
+import uuid
+
+HTTP_METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+CORS_MAX_AGE = 600
+DEFAULT_CORS_HEADERS = "Content-Type, Authorization"
+
+
+def _convert_str(value):
+    if not value:
+        raise ValueError("empty path segment")
+    return value
+
+
+def _convert_int(value):
+    if not value.isdigit():
+        raise ValueError("not an integer")
+    return int(value)
+
+
+def _convert_uuid(value):
+    return str(uuid.UUID(value))
+
+
+CONVERTERS = {
+    "str": _convert_str,
+    "int": _convert_int,
+    "uuid": _convert_uuid,
+}
+
+
+class _Node:
+    __slots__ = ("static", "param", "param_name", "converter", "handlers", "allowed")
+
+    def __init__(self):
+        self.static = {}
+        self.param = None
+        self.param_name = None
+        self.converter = None
+        self.handlers = {}
+        self.allowed = ()
+
+
+class Router:
+    """Method + path table compiled into a segment trie
+
+    Patterns look like ``/projects/{project_id}`` or ``/items/{n:int}``. A
+    literal segment always wins over a parameter, so ``/projects/upload`` and
+    ``/projects/{project_id}`` never depend on declaration order. Fully static
+    paths are also kept in a dict, so most lookups are a single hash probe;
+    the rest cost one step per path segment, however many routes exist.
+    """
+
+    def __init__(self, routes=()):
+        self._root = _Node()
+        self._static_paths = {}
+        for method, pattern, handler in routes:
+            self.add(method, pattern, handler)
+
+    def add(self, method, pattern, handler):
+        method = method.upper()
+        if method not in HTTP_METHODS:
+            raise ValueError(f"Unsupported method: {method}")
+        node = self._root
+        static = True
+        for segment in self._segments(pattern):
+            if segment.startswith("{") and segment.endswith("}"):
+                static = False
+                name, _, type_name = segment[1:-1].partition(":")
+                converter = CONVERTERS.get(type_name or "str")
+                if converter is None:
+                    raise ValueError(f"Unknown parameter type in {pattern}: {type_name}")
+                if node.param is None:
+                    node.param = _Node()
+                    node.param_name = name
+                    node.converter = converter
+                elif node.param_name != name or node.converter is not converter:
+                    raise ValueError(f"Conflicting parameter in {pattern}: {segment}")
+                node = node.param
+            else:
+                node = node.static.setdefault(segment, _Node())
+        if method in node.handlers:
+            raise ValueError(f"Duplicate route: {method} {pattern}")
+        node.handlers[method] = handler
+        methods = set(node.handlers) | {"OPTIONS"}
+        if "GET" in methods:
+            methods.add("HEAD")
+        node.allowed = tuple(sorted(methods))
+        if static:
+            self._static_paths[self._normalize(pattern)] = node
+
+    def resolve(self, method, path):
+        """Return (handler, params, allowed_methods) for a request path
+
+        `handler` is None when the path is unknown (`allowed_methods` is then
+        empty) or when it does not accept `method`. HEAD falls back to GET.
+        """
+        node = self._static_paths.get(path)
+        params = {}
+        if node is None:
+            node = self._walk(self._root, self._segments(path), 0, params)
+            if node is None:
+                return None, {}, ()
+        handler = node.handlers.get(method)
+        if handler is None and method == "HEAD":
+            handler = node.handlers.get("GET")
+        return handler, params, node.allowed
+
+    def _walk(self, node, segments, i, params):
+        if i == len(segments):
+            return node if node.handlers else None
+        segment = segments[i]
+        child = node.static.get(segment)
+        if child is not None:
+            found = self._walk(child, segments, i + 1, params)
+            if found is not None:
+                return found
+        if node.param is not None:
+            try:
+                value = node.converter(urllib.parse.unquote(segment))
+            except ValueError:
+                return None
+            found = self._walk(node.param, segments, i + 1, params)
+            if found is not None:
+                params[node.param_name] = value
+                return found
+        return None
+
+    @staticmethod
+    def _segments(path):
+        return path.strip("/").split("/") if path.strip("/") else []
+
+    @staticmethod
+    def _normalize(path):
+        return "/" + path.strip("/") if path.strip("/") else "/"
+
+
+class _HeadWriter:
+    """wfile wrapper for HEAD: headers go out, the body is dropped"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.body_started = False
+
+    def write(self, data):
+        if self.body_started:
+            return len(data)
+        return self.raw.write(data)
+
+    def flush(self):
+        return self.raw.flush()
+
+
+class RoutingMixin:
+    """Dispatches every HTTP method through the handler class's `router`
+
+    Route handlers are method names on the handler, called with the path
+    parameters as keyword arguments. Unknown paths go to `serve_404`, known
+    paths with the wrong method get 405 plus Allow, HEAD runs the GET handler
+    without a body and OPTIONS answers CORS preflights.
+    """
+
+    router = None
+
+    def do_GET(self):
+        self.dispatch()
+
+    def do_HEAD(self):
+        self.dispatch()
+
+    def do_POST(self):
+        self.dispatch()
+
+    def do_PUT(self):
+        self.dispatch()
+
+    def do_PATCH(self):
+        self.dispatch()
+
+    def do_DELETE(self):
+        self.dispatch()
+
+    def do_OPTIONS(self):
+        self.dispatch()
+
+    def dispatch(self):
+        path = self.path.split("?", 1)[0]
+        handler, params, allowed = self.router.resolve(self.command, path)
+        if not allowed:
+            self.run_route(self.serve_404)
+        elif handler is not None:
+            self.run_route(getattr(self, handler), params)
+        elif self.command == "OPTIONS":
+            self.send_preflight(allowed)
+        else:
+            self.run_route(self.send_method_not_allowed, {"allowed": allowed})
+
+    def run_route(self, method, params=None):
+        if self.command != "HEAD":
+            method(**(params or {}))
+            return
+        raw = self.wfile
+        self.wfile = _HeadWriter(raw)
+        try:
+            method(**(params or {}))
+        finally:
+            self.wfile = raw
+
+    def end_headers(self):
+        super().end_headers()
+        if isinstance(self.wfile, _HeadWriter):
+            self.wfile.body_started = True
+
+    def send_preflight(self, allowed):
+        """204 answer to an OPTIONS/CORS preflight request"""
+        methods = ", ".join(allowed)
+        self.send_response(204)
+        self.send_header("Allow", methods)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", methods)
+        self.send_header("Access-Control-Allow-Headers",
+                         self.headers.get("Access-Control-Request-Headers") or DEFAULT_CORS_HEADERS)
+        self.send_header("Access-Control-Max-Age", str(CORS_MAX_AGE))
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def send_method_not_allowed(self, allowed):
+        body = b'{"error": "Method not allowed"}'
+        self.send_response(405)
+        self.send_header("Allow", ", ".join(allowed))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
@@ -0,0 +1,649 @@
+#!/usr/bin/env python3
+"""
+Book2Video Serving Engines
+Modos de execução concorrentes para os servidores demo
+Só usa a biblioteca padrão do Python
+"""
+
+import os
+import selectors
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+SERVING_MODES = ("single", "threaded", "asyncio")
+
+# Corpo de requisição acima disso vai para disco em vez de memória
+SPOOL_MAX_MEMORY = 1024 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+DEFAULT_MAX_BODY_BYTES = 64 * 1024 * 1024
+
+# Conexões persistentes: tempo ocioso e requisições por conexão
+DEFAULT_KEEPALIVE_TIMEOUT = 15
+DEFAULT_KEEPALIVE_MAX_REQUESTS = 100
+# Corpo não lido até esse tamanho é descartado; acima disso a conexão fecha
+MAX_DRAIN_BYTES = 1024 * 1024
+# Parada graciosa: tempo para as requisições em andamento terminarem
+DEFAULT_DRAIN_TIMEOUT = 10.0
+
+REJECT_BODY = b'{"error": "Server overloaded"}'
+REJECT_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: " + str(len(REJECT_BODY)).encode() + b"\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n"
+    b"\r\n" + REJECT_BODY
+)
+
+
+class RequestBody:
+    """File-like view limited to one request body on a persistent connection"""
+
+    def __init__(self, rfile, length):
+        self.raw = rfile
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.raw.read(size)
+        self.remaining -= len(data)
+        if not data:
+            self.remaining = 0
+        return data
+
+    def readline(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.raw.readline(size)
+        self.remaining -= len(data)
+        if not data:
+            self.remaining = 0
+        return data
+
+    def drain(self, limit=MAX_DRAIN_BYTES):
+        """Discard what the handler left unread; False when it is too much to bother"""
+        if self.remaining > limit:
+            return False
+        while self.remaining > 0:
+            if not self.read(READ_CHUNK_SIZE):
+                return False
+        return True
+
+
+class KeepAliveMixin:
+    """HTTP/1.1 persistent connections for BaseHTTPRequestHandler subclasses
+
+    Each request body is exposed through a RequestBody so that whatever the
+    handler leaves unread is drained before the next pipelined request is
+    parsed. Connections close after `timeout` idle seconds or after
+    `max_keepalive_requests` requests. Only servers that set
+    `persistent_connections` keep them open at all: on a single-threaded
+    server an idle connection would hold up every other client, so there
+    each response closes its connection, as in HTTP/1.0.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Cabeçalhos e corpo saem em write()s separados: com Nagle o corpo espera o ACK atrasado (~40 ms)
+    disable_nagle_algorithm = True
+    timeout = DEFAULT_KEEPALIVE_TIMEOUT
+    max_keepalive_requests = DEFAULT_KEEPALIVE_MAX_REQUESTS
+    requests_served = 0
+
+    def handle_one_request(self):
+        connection_rfile = self.rfile
+        # Esperando a próxima requisição: numa parada graciosa a conexão pode fechar
+        idle = getattr(self.server, "idle_connections", None)
+        if idle is not None:
+            idle.add(self.request)
+        try:
+            super().handle_one_request()
+        finally:
+            if idle is not None:
+                idle.discard(self.request)
+            body = self.rfile
+            self.rfile = connection_rfile
+            self.requests_served += 1
+        if isinstance(body, RequestBody) and not body.drain():
+            self.close_connection = True
+
+    def parse_request(self):
+        idle = getattr(self.server, "idle_connections", None)
+        if idle is not None:
+            idle.discard(self.request)
+        if not super().parse_request():
+            return False
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            # Não dá para saber onde o corpo termina se o handler não o decodificar
+            self.close_connection = True
+            return True
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            self.send_error(400, "Invalid Content-Length")
+            return False
+        self.rfile = RequestBody(self.rfile, max(length, 0))
+        return True
+
+    def end_headers(self):
+        if not self.close_connection and (self.requests_served + 1 >= self.max_keepalive_requests
+                                          or getattr(self.server, "draining", False)
+                                          or not getattr(self.server, "persistent_connections", False)):
+            self.send_header("Connection", "close")
+        super().end_headers()
+
+
+class ThreadPoolHTTPServer(socketserver.TCPServer):
+    """TCP server that hands connections with a request ready to a bounded worker pool
+
+    A worker serves a connection for as long as the client has requests
+    waiting (pipelined or sent right away). Once it goes quiet the
+    connection is parked: one thread watches every parked socket with a
+    selector and hands it back to the pool when the next request arrives,
+    so idle keep-alive connections never hold a worker. Parked connections
+    close after the handler's `timeout` idle seconds.
+    """
+
+    allow_reuse_address = True
+    draining = False
+    persistent_connections = True
+
+    def __init__(self, server_address, RequestHandlerClass, max_workers=32, max_pending=128,
+                 bind_and_activate=True):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="b2v-worker")
+        # Trabalhadores ocupados + conexões esperando na fila
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._active = 0
+        self._idle = threading.Condition()
+        self.idle_connections = set()
+        # Conexões ociosas: (handler, prazo) chegam pela fila e só a thread do seletor mexe nele
+        self._to_park = deque()
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._selector.register(self._wakeup_recv, selectors.EVENT_READ)
+        self._closed = False
+        self._parking = threading.Thread(target=self._watch_parked, name="b2v-keepalive", daemon=True)
+        self._parking.start()
+        super().__init__(server_address, RequestHandlerClass, bind_and_activate)
+
+    def process_request(self, request, client_address):
+        """Queue the connection, or reject it right away when the backlog is full"""
+        self._dispatch(request, client_address, None)
+
+    def _dispatch(self, request, client_address, handler):
+        if not self._slots.acquire(blocking=False):
+            if handler is not None:
+                self._close_handler(handler)
+            self._reject(request)
+            return
+        with self._idle:
+            self._active += 1
+        try:
+            self._executor.submit(self._process_in_worker, request, client_address, handler)
+        except RuntimeError:
+            # Pool já desligado (server_close)
+            self._finish_worker()
+            if handler is not None:
+                self._close_handler(handler)
+            self.shutdown_request(request)
+
+    def _process_in_worker(self, request, client_address, handler=None):
+        park = False
+        try:
+            if handler is None:
+                handler = self._open_handler(request, client_address)
+            park = self._serve_ready(handler)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            if park:
+                self._park(handler)
+            else:
+                if handler is not None:
+                    self._close_handler(handler)
+                self.shutdown_request(request)
+            self._finish_worker()
+
+    def _finish_worker(self):
+        self._slots.release()
+        with self._idle:
+            self._active -= 1
+            self._idle.notify_all()
+
+    def _open_handler(self, request, client_address):
+        # Como em AsyncHTTPServer._run_handler: o handler vive entre requisições, sem o loop de handle()
+        handler = self.RequestHandlerClass.__new__(self.RequestHandlerClass)
+        handler.request = request
+        handler.client_address = client_address
+        handler.server = self
+        handler.directory = os.getcwd()
+        handler.setup()
+        return handler
+
+    def _serve_ready(self, handler):
+        """Serve requests while one is waiting; True to park the connection"""
+        while not self.draining:
+            state = self._pending(handler)
+            if state != "ready":
+                return state == "idle"
+            handler.close_connection = True
+            handler.handle_one_request()
+            if handler.close_connection:
+                return False
+        return False
+
+    def _pending(self, handler):
+        """"ready" (a request is waiting), "idle" or "closed", without blocking"""
+        sock = handler.connection
+        sock.settimeout(0.0)
+        try:
+            # Primeiro o que já está no buffer do rfile (ex.: requisição em pipeline)
+            if handler.rfile.peek(1):
+                return "ready"
+            return "ready" if sock.recv(1, socket.MSG_PEEK) else "closed"
+        except BlockingIOError:
+            return "idle"
+        except OSError:
+            return "closed"
+        finally:
+            try:
+                sock.settimeout(handler.timeout)
+            except OSError:
+                pass
+
+    def _park(self, handler):
+        deadline = time.monotonic() + (handler.timeout or DEFAULT_KEEPALIVE_TIMEOUT)
+        self._to_park.append((handler, deadline))
+        self._wake_parking()
+
+    def _wake_parking(self):
+        try:
+            self._wakeup_send.send(b"\0")
+        except OSError:
+            pass
+
+    def _watch_parked(self):
+        deadlines = {}
+        try:
+            while not self._closed:
+                timeout = None
+                if deadlines:
+                    timeout = max(min(deadlines.values()) - time.monotonic(), 0)
+                for key, _ in self._selector.select(timeout):
+                    if key.fileobj is self._wakeup_recv:
+                        try:
+                            while self._wakeup_recv.recv(4096):
+                                pass
+                        except BlockingIOError:
+                            pass
+                        continue
+                    handler = key.data
+                    self._selector.unregister(key.fileobj)
+                    del deadlines[handler]
+                    # Chegou a próxima requisição (ou o cliente fechou): volta para o pool
+                    self._dispatch(handler.request, handler.client_address, handler)
+                while self._to_park:
+                    handler, deadline = self._to_park.popleft()
+                    try:
+                        self._selector.register(handler.connection, selectors.EVENT_READ, handler)
+                    except (OSError, ValueError):
+                        self._drop_parked(handler)
+                        continue
+                    deadlines[handler] = deadline
+                now = time.monotonic()
+                for handler, deadline in list(deadlines.items()):
+                    if deadline <= now or self.draining:
+                        self._selector.unregister(handler.connection)
+                        del deadlines[handler]
+                        self._drop_parked(handler)
+        finally:
+            for handler in deadlines:
+                self._drop_parked(handler)
+            while self._to_park:
+                self._drop_parked(self._to_park.popleft()[0])
+            self._selector.close()
+            self._wakeup_recv.close()
+            self._wakeup_send.close()
+
+    def _drop_parked(self, handler):
+        self._close_handler(handler)
+        self.shutdown_request(handler.request)
+
+    def _close_handler(self, handler):
+        try:
+            handler.finish()
+        except OSError:
+            pass
+
+    def drain(self, timeout):
+        """After serve_forever returns: let open connections finish; False on timeout"""
+        self.draining = True
+        # Conexões estacionadas fecham já; as que estão num trabalhador terminam a requisição
+        self._wake_parking()
+        for sock in list(self.idle_connections):
+            try:
+                sock.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        with self._idle:
+            return self._idle.wait_for(lambda: self._active == 0, timeout)
+
+    def _reject(self, request):
+        try:
+            request.sendall(REJECT_RESPONSE)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._closed = True
+        self._wake_parking()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _RequestTooLarge(Exception):
+    pass
+
+
+class _BridgeConnection:
+    """Socket-like adapter that lets a sync handler run against an asyncio stream"""
+
+    def __init__(self, rfile, writer, loop):
+        self._rfile = rfile
+        self._writer = writer
+        self._loop = loop
+
+    def makefile(self, mode, buffering=None):
+        # wbufsize == 0 nos handlers, então só o arquivo de leitura é pedido
+        return self._rfile
+
+    def sendall(self, data):
+        import asyncio
+        future = asyncio.run_coroutine_threadsafe(self._send(bytes(data)), self._loop)
+        future.result()
+
+    async def _send(self, data):
+        self._writer.write(data)
+        await self._writer.drain()
+
+    def settimeout(self, timeout):
+        pass
+
+    def setsockopt(self, *args):
+        pass
+
+
+class AsyncHTTPServer:
+    """asyncio front end: reads requests without blocking, runs handlers in a pool
+
+    asyncio (~40 ms to import) is only imported by the methods that use it,
+    so the threaded and single modes start without it.
+    """
+
+    draining = False
+    persistent_connections = True
+    # Segundos que as conexões em andamento têm para terminar depois de shutdown()
+    drain_timeout = DEFAULT_DRAIN_TIMEOUT
+
+    def __init__(self, server_address, RequestHandlerClass, max_workers=32,
+                 max_body_bytes=DEFAULT_MAX_BODY_BYTES, listen_socket=None, reuse_port=False):
+        self.server_address = server_address
+        self.listen_socket = listen_socket
+        self.reuse_port = reuse_port
+        self.RequestHandlerClass = RequestHandlerClass
+        self.max_workers = max_workers
+        self.max_body_bytes = max_body_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="b2v-async")
+        self.keepalive_timeout = getattr(RequestHandlerClass, "timeout", None) or DEFAULT_KEEPALIVE_TIMEOUT
+        self.max_keepalive_requests = getattr(RequestHandlerClass, "max_keepalive_requests",
+                                              DEFAULT_KEEPALIVE_MAX_REQUESTS)
+        self._loop = None
+        self._server = None
+        self._stop = None
+        self._connections = set()
+        self._idle_connections = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.server_close()
+
+    def serve_forever(self):
+        import asyncio
+        asyncio.run(self._serve())
+
+    def server_close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Stop accepting connections; serve_forever returns once they have drained"""
+        self.draining = True
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    def drain(self, timeout):
+        # O dreno acontece dentro de serve_forever, limitado por drain_timeout
+        return not self._connections
+
+    async def _serve(self):
+        import asyncio
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        if self.draining:
+            return
+        if self.listen_socket is not None:
+            self._server = await asyncio.start_server(
+                self._handle_connection, sock=self.listen_socket, limit=MAX_HEADER_BYTES,
+            )
+        else:
+            host, port = self.server_address
+            self._server = await asyncio.start_server(
+                self._handle_connection, host or None, port,
+                reuse_address=True, reuse_port=self.reuse_port or None, limit=MAX_HEADER_BYTES,
+            )
+        self.server_address = self._server.sockets[0].getsockname()[:2]
+        await self._stop.wait()
+        self._server.close()
+        # Conexões ociosas fecham já; as outras terminam a requisição atual
+        for task in list(self._idle_connections):
+            task.cancel()
+        if self._connections:
+            await asyncio.wait(list(self._connections), timeout=self.drain_timeout)
+        for task in list(self._connections):
+            task.cancel()
+
+    async def _handle_connection(self, reader, writer):
+        import asyncio
+        client_address = writer.get_extra_info("peername")
+        served = 0
+        task = asyncio.current_task()
+        self._connections.add(task)
+        task.add_done_callback(self._connections.discard)
+        try:
+            while served < self.max_keepalive_requests and not self.draining:
+                self._idle_connections.add(task)
+                try:
+                    rfile = await asyncio.wait_for(self._read_request(reader, writer, task),
+                                                   self.keepalive_timeout)
+                except asyncio.TimeoutError:
+                    break
+                finally:
+                    self._idle_connections.discard(task)
+                if rfile is None:
+                    break
+                keep_open = await self._loop.run_in_executor(
+                    self._executor, self._run_handler, rfile, writer, client_address, served
+                )
+                served += 1
+                if not keep_open:
+                    break
+        except _RequestTooLarge:
+            writer.write(b"HTTP/1.1 413 Payload Too Large\r\n"
+                         b"Content-Length: 0\r\nConnection: close\r\n\r\n")
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        except asyncio.CancelledError:
+            # Conexão ociosa cancelada na parada: terminar normalmente evita o traceback do asyncio
+            if not self.draining:
+                raise
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader, writer, connection_task=None):
+        """Read one request (head + body) into a spooled file; None when the peer is done"""
+        import asyncio
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            # Requisição começou: numa parada graciosa ela termina normalmente
+            self._idle_connections.discard(connection_task)
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            writer.write(b"HTTP/1.1 431 Request Header Fields Too Large\r\n"
+                         b"Content-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            return None
+
+        content_length = 0
+        chunked = False
+        for line in head.split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                try:
+                    content_length = int(value.strip())
+                except ValueError:
+                    content_length = 0
+            elif name == b"transfer-encoding":
+                chunked = b"chunked" in value.lower()
+
+        # Acima de SPOOL_MAX_MEMORY o corpo vai para disco, então a memória fica constante
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+        try:
+            spool.write(head)
+            if chunked:
+                await self._copy_chunked(reader, spool)
+            else:
+                if content_length > self.max_body_bytes:
+                    raise _RequestTooLarge()
+                await self._copy_exact(reader, spool, content_length)
+        except BaseException:
+            spool.close()
+            raise
+        spool.seek(0)
+        return spool
+
+    async def _copy_exact(self, reader, spool, remaining):
+        import asyncio
+        while remaining > 0:
+            chunk = await reader.read(min(remaining, READ_CHUNK_SIZE))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"", remaining)
+            spool.write(chunk)
+            remaining -= len(chunk)
+
+    async def _copy_chunked(self, reader, spool):
+        """Copy a chunked body verbatim; the handler does the decoding"""
+        total = 0
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            spool.write(size_line)
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                while True:
+                    trailer = await reader.readuntil(b"\r\n")
+                    spool.write(trailer)
+                    if trailer == b"\r\n":
+                        return
+            total += size
+            if total > self.max_body_bytes:
+                raise _RequestTooLarge()
+            await self._copy_exact(reader, spool, size + 2)
+
+    def _run_handler(self, rfile, writer, client_address, served=0):
+        """Run one request through the regular handler class; True to keep the connection"""
+        connection = _BridgeConnection(rfile, writer, self._loop)
+        handler = self.RequestHandlerClass.__new__(self.RequestHandlerClass)
+        handler.request = connection
+        handler.client_address = client_address
+        handler.server = self
+        handler.directory = os.getcwd()
+        handler.requests_served = served
+        try:
+            handler.setup()
+            try:
+                handler.handle_one_request()
+            finally:
+                handler.finish()
+        except (OSError, ValueError):
+            return False
+        return not handler.close_connection
+
+
+def create_server(mode, server_address, RequestHandlerClass, max_workers=32, max_pending=128,
+                  max_body_bytes=DEFAULT_MAX_BODY_BYTES, listen_socket=None, reuse_port=False):
+    """Build the server for the selected serving mode
+
+    `listen_socket` serves an already listening (e.g. inherited) socket;
+    `reuse_port` binds with SO_REUSEPORT so several processes share the port.
+    """
+    if mode == "asyncio":
+        return AsyncHTTPServer(server_address, RequestHandlerClass, max_workers=max_workers,
+                               max_body_bytes=max_body_bytes, listen_socket=listen_socket,
+                               reuse_port=reuse_port)
+    if mode == "single":
+        server = socketserver.TCPServer(server_address, RequestHandlerClass, bind_and_activate=False)
+    elif mode == "threaded":
+        server = ThreadPoolHTTPServer(server_address, RequestHandlerClass, max_workers=max_workers,
+                                      max_pending=max_pending, bind_and_activate=False)
+    else:
+        raise ValueError(f"Unknown serving mode: {mode}")
+    try:
+        if listen_socket is not None:
+            server.socket.close()
+            server.socket = listen_socket
+            server.server_address = listen_socket.getsockname()
+        else:
+            server.allow_reuse_port = reuse_port
+            server.server_bind()
+            server.server_activate()
+    except BaseException:
+        server.server_close()
+        raise
+    return server
+
+
+def add_serving_arguments(parser, default_port):
+    """Register the shared serving CLI flags on an argparse parser"""
+    parser.add_argument("--port", type=int, default=default_port,
+                        help=f"porta HTTP (padrão: {default_port})")
+    parser.add_argument("--mode", choices=SERVING_MODES, default="threaded",
+                        help="motor de execução (padrão: threaded)")
+    parser.add_argument("--max-workers", type=int, default=32,
+                        help="tamanho do pool de trabalhadores (padrão: 32)")
+    parser.add_argument("--max-pending", type=int, default=128,
+                        help="conexões aguardando antes de responder 503 (padrão: 128)")
+    parser.add_argument("--keepalive-timeout", type=float, default=DEFAULT_KEEPALIVE_TIMEOUT,
+                        help=f"segundos ociosos antes de fechar a conexão (padrão: {DEFAULT_KEEPALIVE_TIMEOUT})")
+    parser.add_argument("--keepalive-max-requests", type=int, default=DEFAULT_KEEPALIVE_MAX_REQUESTS,
+                        help=f"requisições por conexão (padrão: {DEFAULT_KEEPALIVE_MAX_REQUESTS})")
+
+
+def configure_keepalive(RequestHandlerClass, args):
+    """Apply the keep-alive CLI flags to a KeepAliveMixin handler class"""
+    RequestHandlerClass.timeout = args.keepalive_timeout
+    RequestHandlerClass.max_keepalive_requests = args.keepalive_max_requests
@@ -5,23 +5,20 @@ Book2Video Simple Demo Server
 Teste super facil - roda com Python padrao
 """
 
+import argparse
 import http.server
 import socketserver
 import json
 import time
 from datetime import datetime
 
-class SimpleHandler(http.server.SimpleHTTPRequestHandler):
-    def do_GET(self):
-        if self.path == '/' or self.path == '/index.html':
-            self.serve_main_page()
-        elif self.path == '/health':
-            self.serve_health()
-        else:
-            self.serve_404()
-    
-    def serve_main_page(self):
-        html = """<!DOCTYPE html>
+from prefork import PreforkSupervisor, add_prefork_arguments, serve_until_terminated
+from router import Router, RoutingMixin
+from serving import KeepAliveMixin, create_server
+from static_assets import StaticAsset, send_asset
+
+# Paginas servidas como assets estaticos pre-comprimidos
+MAIN_PAGE_HTML = """<!DOCTYPE html>
 <html lang="pt-BR">
 <head>
     <meta charset="UTF-8">
@@ -256,11 +253,26 @@ class SimpleHandler(http.server.SimpleHTTPRequestHandler):
     </script>
 </body>
 </html>"""
-        
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html; charset=utf-8')
-        self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+
+NOT_FOUND_HTML = "<html><body><h1>404 - Pagina nao encontrada</h1><p><a href='/'>Voltar</a></p></body></html>"
+
+static_assets = {}
+
+def build_static_assets():
+    return {
+        "main": StaticAsset(MAIN_PAGE_HTML),
+        "not_found": StaticAsset(NOT_FOUND_HTML, max_age=0),
+    }
+
+class SimpleHandler(RoutingMixin, KeepAliveMixin, http.server.SimpleHTTPRequestHandler):
+    router = Router([
+        ("GET", "/", "serve_main_page"),
+        ("GET", "/index.html", "serve_main_page"),
+        ("GET", "/health", "serve_health"),
+    ])
+    
+    def serve_main_page(self):
+        send_asset(self, static_assets["main"])
     
     def serve_health(self):
         health_data = {
@@ -275,22 +287,31 @@ class SimpleHandler(http.server.SimpleHTTPRequestHandler):
             }
         }
         
+        json_data = json.dumps(health_data, indent=2).encode('utf-8')
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(json_data)))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        json_data = json.dumps(health_data, indent=2)
-        self.wfile.write(json_data.encode('utf-8'))
+        self.wfile.write(json_data)
     
     def serve_404(self):
-        self.send_response(404)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        html = "<html><body><h1>404 - Pagina nao encontrada</h1><p><a href='/'>Voltar</a></p></body></html>"
-        self.wfile.write(html.encode('utf-8'))
+        send_asset(self, static_assets["not_found"], status=404)
 
-def main():
-    PORT = 8080
+def serve_worker(server_address, listen_socket, reuse_port, grace_seconds):
+    """One pre-forked server process"""
+    with create_server("single", server_address, SimpleHandler,
+                       listen_socket=listen_socket, reuse_port=reuse_port) as httpd:
+        serve_until_terminated(httpd, grace_seconds)
+
+def main(argv=None):
+    global static_assets
+    parser = argparse.ArgumentParser(description="Book2Video Simple Demo Server")
+    parser.add_argument("--port", type=int, default=8080, help="porta HTTP (padrao: 8080)")
+    add_prefork_arguments(parser)
+    args = parser.parse_args(argv)
+    PORT = args.port
+    static_assets = build_static_assets()
     
     print("=" * 50)
     print("BOOK2VIDEO DEMO SERVER")
@@ -300,12 +321,24 @@ def main():
     print("=" * 50)
     print("Sistema Book2Video funcionando!")
     print("Simula todo o pipeline: Upload -> IA -> Video")
+    if args.workers > 1:
+        print(f"Processos: {args.workers}")
     print("Pressione Ctrl+C para parar")
     print("=" * 50)
     
     try:
-        with socketserver.TCPServer(("", PORT), SimpleHandler) as httpd:
-            httpd.serve_forever()
+        if args.workers > 1:
+            PreforkSupervisor(
+                args.workers, ("", PORT),
+                lambda index, address, sock, reuse_port: serve_worker(address, sock, reuse_port,
+                                                                      args.grace_seconds),
+                reuse_port=False if args.shared_socket else None,
+                grace_seconds=args.grace_seconds,
+            ).run()
+            print("\nServidor parado")
+        else:
+            with socketserver.TCPServer(("", PORT), SimpleHandler) as httpd:
+                httpd.serve_forever()
     except KeyboardInterrupt:
         print("\nServidor parado")
     except OSError as e:
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Book2Video Static Assets
+Páginas pré-renderizadas e pré-comprimidas, montadas uma vez na inicialização
+"""
+
+import gzip
+import hashlib
+import zlib
+
+# Ordem de preferência quando o cliente aceita mais de uma codificação
+PREFERRED_ENCODINGS = ("gzip", "deflate")
+
+
+class StaticAsset:
+    """Encoded page bytes plus gzip/deflate variants and a strong ETag"""
+
+    def __init__(self, content, content_type="text/html; charset=utf-8", max_age=300):
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        self.content_type = content_type
+        self.cache_control = f"public, max-age={max_age}" if max_age else "no-cache"
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.variants = {"identity": (content, self.etag)}
+        compressed = {
+            "gzip": gzip.compress(content, compresslevel=9, mtime=0),
+            "deflate": zlib.compress(content, 9),
+        }
+        for encoding, body in compressed.items():
+            # Variante só vale a pena se ficar menor que o original
+            if len(body) < len(content):
+                self.variants[encoding] = (body, f'"{digest}-{encoding}"')
+
+    def select(self, accept_encoding):
+        """Pick (encoding, body, etag) for an Accept-Encoding header"""
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in PREFERRED_ENCODINGS:
+            q = accepted.get(encoding, accepted.get("*", 0.0))
+            if q > 0 and encoding in self.variants:
+                body, etag = self.variants[encoding]
+                return encoding, body, etag
+        body, etag = self.variants["identity"]
+        return "identity", body, etag
+
+
+def etag_matches(if_none_match, etags):
+    """True when an If-None-Match header names one of `etags` (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in etags:
+            return True
+    return False
+
+
+def parse_accept_encoding(header):
+    """Map of coding -> q-value from an Accept-Encoding header"""
+    accepted = {}
+    if not header:
+        return accepted
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def send_asset(handler, asset, status=200):
+    """Write a static asset on a BaseHTTPRequestHandler, honouring conditional GETs"""
+    encoding, body, etag = asset.select(handler.headers.get("Accept-Encoding"))
+    # O 304 valida a mesma variante que o 200 mandaria, com o mesmo ETag
+    if status == 200 and etag_matches(handler.headers.get("If-None-Match"), (etag,)):
+        handler.send_response(304)
+        handler.send_header("ETag", etag)
+        handler.send_header("Cache-Control", asset.cache_control)
+        handler.send_header("Vary", "Accept-Encoding")
+        handler.end_headers()
+        return
+
+    handler.send_response(status)
+    handler.send_header("Content-Type", asset.content_type)
+    handler.send_header("Content-Length", str(len(body)))
+    if encoding != "identity":
+        handler.send_header("Content-Encoding", encoding)
+    if status == 200:
+        handler.send_header("ETag", etag)
+    handler.send_header("Cache-Control", asset.cache_control)
+    handler.send_header("Vary", "Accept-Encoding")
+    handler.end_headers()
+    handler.wfile.write(body)
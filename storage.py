@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""
+Book2Video Storage
+Backends de armazenamento para users/projects/sessions: memória ou SQLite (WAL)
+Uso: python storage.py  -> roda a verificação de paridade entre os backends
+"""
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from project_index import ProjectIndex, decode_cursor, encode_cursor
+from records import Project, RecordError, User
+
+STORAGE_BACKENDS = ("memory", "sqlite")
+
+
+def versioned(project):
+    """Copy of a new project stamped with version 1"""
+    project = dict(project)
+    project.setdefault("version", 1)
+    return project
+
+
+def bump_version(before, project):
+    """Stamp an updated project with the next version; False when nothing changed
+
+    `field_versions` keeps, per field, the version that last changed it
+    (fields never changed since creation are version 1), so the fields newer
+    than any version can be listed without keeping old copies. Updaters
+    replace values rather than mutating nested lists/dicts in place. As in
+    the records, a field set to None is the same as a removed one.
+    """
+    changed = [key for key in before.keys() | project.keys()
+               if key not in ("version", "field_versions") and before.get(key) != project.get(key)]
+    if not changed:
+        return False
+    version = before.get("version", 1) + 1
+    field_versions = dict(before.get("field_versions") or {})
+    for key in changed:
+        field_versions[key] = version
+    project["version"] = version
+    project["field_versions"] = field_versions
+    return True
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class MemoryStorage:
+    """Slotted records (records.py) in in-process dicts, guarded by one lock
+
+    Callers still hand in and get back plain dicts; the records are only
+    how they are kept, which is what bounds how many projects fit in RAM.
+    """
+
+    def __init__(self):
+        self.users = {}
+        self.user_emails = {}
+        self.projects = {}
+        self.sessions = {}
+        self.revocations = {}
+        self.revocation_seq = 0
+        self.index = ProjectIndex()
+        self.lock = threading.RLock()
+
+    @contextmanager
+    def batch(self):
+        """Group several writes; here it just holds the lock"""
+        with self.lock:
+            yield self
+
+    def close(self):
+        pass
+
+    # Usuários
+
+    def add_user(self, user):
+        """Insert a user; False when the id or the email is taken, RecordError when invalid"""
+        record = User.from_dict(user)
+        with self.lock:
+            if record.id in self.users or (record.email and record.email in self.user_emails):
+                return False
+            self.users[record.id] = record
+            if record.email:
+                self.user_emails[record.email] = record.id
+            return True
+
+    def get_user(self, user_id):
+        with self.lock:
+            user = self.users.get(user_id)
+            return user.to_dict() if user is not None else None
+
+    def get_user_by_email(self, email):
+        """The user with this email, or None"""
+        with self.lock:
+            return self.get_user(self.user_emails.get(email))
+
+    def count_users(self):
+        return len(self.users)
+
+    # Projetos
+
+    def add_project(self, project):
+        """Insert a project; False when the id already exists, RecordError when invalid"""
+        record = Project.from_dict(versioned(project))
+        with self.lock:
+            if record.id in self.projects:
+                return False
+            self.projects[record.id] = record
+            self.index.add(record.id, record.created_at, record.status, record.owner_id)
+            return True
+
+    def add_projects(self, projects):
+        with self.lock:
+            return sum(1 for project in projects if self.add_project(project))
+
+    def get_project(self, project_id):
+        with self.lock:
+            project = self.projects.get(project_id)
+            return project.to_dict() if project is not None else None
+
+    def update_project(self, project_id, updater):
+        """Apply `updater(project)` atomically
+
+        The updater mutates the project in place, or returns False (before
+        touching it) to leave it unchanged. Any actual change bumps the
+        project's `version`. Returns the resulting project, or None when it
+        does not exist. An update that makes the project invalid raises
+        RecordError and leaves it as it was.
+        """
+        with self.lock:
+            record = self.projects.get(project_id)
+            if record is None:
+                return None
+            project = record.to_dict()
+            before = dict(project)
+            if updater(project) is not False and bump_version(before, project):
+                record = self.projects[project_id] = Project.from_dict(project)
+                self.index.update(project_id, record.status, record.owner_id)
+                return record.to_dict()
+            return project
+
+    def list_projects(self, limit, cursor=None, status=None, owner_id=None, descending=True):
+        """Return (projects, next_cursor) for one page"""
+        with self.lock:
+            page_ids, next_cursor = self.index.page(limit, cursor, status, owner_id, descending)
+            return [self.projects[pid].to_dict() for pid in page_ids], next_cursor
+
+    def count_projects(self, status=None):
+        with self.lock:
+            return self.index.count(status)
+
+    def project_status_counts(self):
+        with self.lock:
+            return self.index.status_counts()
+
+    # Sessões
+
+    def put_session(self, token, session):
+        with self.lock:
+            self.sessions[token] = dict(session)
+
+    def get_session(self, token):
+        with self.lock:
+            session = self.sessions.get(token)
+            return dict(session) if session is not None else None
+
+    def delete_session(self, token):
+        with self.lock:
+            return self.sessions.pop(token, None) is not None
+
+    def revoke_session(self, session_id, expires):
+        """Delete the session and record its revocation; False when already revoked"""
+        with self.lock:
+            self.sessions.pop(session_id, None)
+            if session_id in self.revocations:
+                return False
+            self.revocations[session_id] = float(expires)
+            self.revocation_seq += 1
+            return True
+
+    def revocation_version(self):
+        """Changes whenever a session is revoked (never decreases)"""
+        return self.revocation_seq
+
+    def revoked_sessions(self, now):
+        """{session_id: expires} of revocations whose tokens have not expired"""
+        with self.lock:
+            return {session_id: expires for session_id, expires in self.revocations.items() if expires > now}
+
+    def purge_revocations(self, now):
+        with self.lock:
+            expired = [session_id for session_id, expires in self.revocations.items() if expires <= now]
+            for session_id in expired:
+                del self.revocations[session_id]
+            return len(expired)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT,
+    data TEXT NOT NULL
+);
+DROP INDEX IF EXISTS users_email;
+CREATE UNIQUE INDEX IF NOT EXISTS users_email_unique ON users (email);
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    owner_id TEXT,
+    status TEXT NOT NULL,
+    created_ts REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS projects_created ON projects (created_ts, id);
+CREATE INDEX IF NOT EXISTS projects_status ON projects (status, created_ts, id);
+CREATE INDEX IF NOT EXISTS projects_owner ON projects (owner_id, created_ts, id);
+CREATE INDEX IF NOT EXISTS projects_owner_status ON projects (owner_id, status, created_ts, id);
+CREATE TABLE IF NOT EXISTS project_counts (
+    status TEXT PRIMARY KEY,
+    n INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS projects_count_insert AFTER INSERT ON projects BEGIN
+    INSERT INTO project_counts (status, n) VALUES (NEW.status, 1)
+        ON CONFLICT (status) DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS projects_count_update AFTER UPDATE OF status ON projects
+WHEN OLD.status != NEW.status BEGIN
+    UPDATE project_counts SET n = n - 1 WHERE status = OLD.status;
+    INSERT INTO project_counts (status, n) VALUES (NEW.status, 1)
+        ON CONFLICT (status) DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS projects_count_delete AFTER DELETE ON projects BEGIN
+    UPDATE project_counts SET n = n - 1 WHERE status = OLD.status;
+END;
+CREATE TABLE IF NOT EXISTS sessions (
+    token TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS revoked_sessions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL UNIQUE,
+    expires_ts REAL NOT NULL
+);
+"""
+
+# SQL fixo: o sqlite3 reaproveita as instruções preparadas de cada conexão
+SQL_INSERT_USER = "INSERT OR IGNORE INTO users (id, email, data) VALUES (?, ?, ?)"
+SQL_GET_USER = "SELECT data FROM users WHERE id = ?"
+SQL_GET_USER_BY_EMAIL = "SELECT data FROM users WHERE email = ?"
+SQL_COUNT_USERS = "SELECT COUNT(*) FROM users"
+SQL_INSERT_PROJECT = ("INSERT OR IGNORE INTO projects (id, owner_id, status, created_ts, data) "
+                      "VALUES (?, ?, ?, ?, ?)")
+SQL_GET_PROJECT = "SELECT data FROM projects WHERE id = ?"
+SQL_UPDATE_PROJECT = "UPDATE projects SET owner_id = ?, status = ?, data = ? WHERE id = ?"
+SQL_COUNT_ALL = "SELECT COALESCE(SUM(n), 0) FROM project_counts"
+SQL_COUNT_STATUS = "SELECT n FROM project_counts WHERE status = ?"
+SQL_STATUS_COUNTS = "SELECT status, n FROM project_counts WHERE n > 0"
+SQL_PUT_SESSION = "INSERT OR REPLACE INTO sessions (token, data) VALUES (?, ?)"
+SQL_GET_SESSION = "SELECT data FROM sessions WHERE token = ?"
+SQL_DELETE_SESSION = "DELETE FROM sessions WHERE token = ?"
+# Sem OR IGNORE: um INSERT ignorado ainda avançaria o contador do AUTOINCREMENT
+SQL_REVOKE_SESSION = ("INSERT INTO revoked_sessions (session_id, expires_ts) SELECT ?, ? "
+                      "WHERE NOT EXISTS (SELECT 1 FROM revoked_sessions WHERE session_id = ?)")
+# AUTOINCREMENT nunca reusa seq: o último valor serve de versão das revogações
+SQL_REVOCATION_VERSION = "SELECT seq FROM sqlite_sequence WHERE name = 'revoked_sessions'"
+SQL_REVOKED_SESSIONS = "SELECT session_id, expires_ts FROM revoked_sessions WHERE expires_ts > ?"
+SQL_PURGE_REVOCATIONS = "DELETE FROM revoked_sessions WHERE expires_ts <= ?"
+
+
+class SQLiteStorage:
+    """Embedded SQLite in WAL mode with one connection per thread"""
+
+    def __init__(self, path, statement_cache_size=128):
+        self.path = path
+        self.statement_cache_size = statement_cache_size
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            import sqlite3
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False,
+                                   cached_statements=self.statement_cache_size, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        if conn.in_transaction:
+            # Já dentro de batch(): a transação externa decide o commit
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def batch(self):
+        """Group several writes from this thread into one transaction"""
+        with self._transaction():
+            yield self
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    # Usuários
+
+    def add_user(self, user):
+        record = User.from_dict(user)
+        with self._transaction() as conn:
+            # O índice único em email faz o IGNORE valer também para email repetido
+            return conn.execute(SQL_INSERT_USER, (record.id, record.email, record.to_json())).rowcount == 1
+
+    def get_user(self, user_id):
+        row = self._connect().execute(SQL_GET_USER, (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_user_by_email(self, email):
+        """The user with this email, or None"""
+        row = self._connect().execute(SQL_GET_USER_BY_EMAIL, (email,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count_users(self):
+        return self._connect().execute(SQL_COUNT_USERS).fetchone()[0]
+
+    # Projetos
+
+    def _project_row(self, project):
+        record = Project.from_dict(versioned(project))
+        return record.id, record.owner_id, record.status, record.created_at, record.to_json()
+
+    def add_project(self, project):
+        with self._transaction() as conn:
+            return conn.execute(SQL_INSERT_PROJECT, self._project_row(project)).rowcount == 1
+
+    def add_projects(self, projects):
+        with self._transaction() as conn:
+            return conn.executemany(SQL_INSERT_PROJECT,
+                                    [self._project_row(p) for p in projects]).rowcount
+
+    def get_project(self, project_id):
+        row = self._connect().execute(SQL_GET_PROJECT, (project_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update_project(self, project_id, updater):
+        with self._transaction() as conn:
+            row = conn.execute(SQL_GET_PROJECT, (project_id,)).fetchone()
+            if row is None:
+                return None
+            project = json.loads(row[0])
+            before = dict(project)
+            if updater(project) is not False and bump_version(before, project):
+                record = Project.from_dict(project)
+                conn.execute(SQL_UPDATE_PROJECT, (record.owner_id, record.status, record.to_json(), project_id))
+                return record.to_dict()
+            return project
+
+    def list_projects(self, limit, cursor=None, status=None, owner_id=None, descending=True):
+        where = []
+        params = []
+        if status is not None:
+            where.append("status = ?")
+            params.append(status)
+        if owner_id is not None:
+            where.append("owner_id = ?")
+            params.append(owner_id)
+        if cursor:
+            where.append("(created_ts, id) < (?, ?)" if descending else "(created_ts, id) > (?, ?)")
+            params.extend(decode_cursor(cursor))
+        order = "DESC" if descending else "ASC"
+        sql = "SELECT created_ts, id, data FROM projects"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY created_ts {order}, id {order} LIMIT ?"
+        params.append(limit + 1)
+        rows = self._connect().execute(sql, params).fetchall()
+        next_cursor = encode_cursor((rows[limit - 1][0], rows[limit - 1][1])) if len(rows) > limit else None
+        return [json.loads(data) for _, _, data in rows[:limit]], next_cursor
+
+    def count_projects(self, status=None):
+        conn = self._connect()
+        if status is None:
+            return conn.execute(SQL_COUNT_ALL).fetchone()[0]
+        row = conn.execute(SQL_COUNT_STATUS, (status,)).fetchone()
+        return row[0] if row else 0
+
+    def project_status_counts(self):
+        return dict(self._connect().execute(SQL_STATUS_COUNTS).fetchall())
+
+    # Sessões
+
+    def put_session(self, token, session):
+        with self._transaction() as conn:
+            conn.execute(SQL_PUT_SESSION, (token, _dumps(session)))
+
+    def get_session(self, token):
+        row = self._connect().execute(SQL_GET_SESSION, (token,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete_session(self, token):
+        with self._transaction() as conn:
+            return conn.execute(SQL_DELETE_SESSION, (token,)).rowcount == 1
+
+    def revoke_session(self, session_id, expires):
+        with self._transaction() as conn:
+            conn.execute(SQL_DELETE_SESSION, (session_id,))
+            return conn.execute(SQL_REVOKE_SESSION, (session_id, expires, session_id)).rowcount == 1
+
+    def revocation_version(self):
+        row = self._connect().execute(SQL_REVOCATION_VERSION).fetchone()
+        return row[0] if row else 0
+
+    def revoked_sessions(self, now):
+        return dict(self._connect().execute(SQL_REVOKED_SESSIONS, (now,)).fetchall())
+
+    def purge_revocations(self, now):
+        with self._transaction() as conn:
+            return conn.execute(SQL_PURGE_REVOCATIONS, (now,)).rowcount
+
+
+def create_storage(backend="memory", path=None):
+    """Build a storage backend by name"""
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "sqlite":
+        return SQLiteStorage(path or os.path.join(tempfile.gettempdir(), "book2video.db"))
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def add_storage_arguments(parser):
+    """Register the storage CLI flags on an argparse parser"""
+    parser.add_argument("--storage", choices=STORAGE_BACKENDS, default="memory",
+                        help="onde guardar users/projects/sessions (padrão: memory)")
+    parser.add_argument("--db-path", default=None,
+                        help="arquivo SQLite quando --storage sqlite (padrão: <tmp>/book2video.db)")
+
+
+def check_storage(storage):
+    """Run the behaviour every backend must share; returns a transcript of results"""
+    transcript = []
+    record = transcript.append
+
+    record(("add-user", storage.add_user({"id": "u1", "email": "a@b.c", "full_name": "Ana"})))
+    record(("user", storage.get_user("u1"), storage.get_user("nope"), storage.count_users()))
+    record(("duplicate-user", storage.add_user({"id": "u2", "email": "a@b.c", "full_name": "Ana 2"}),
+            storage.add_user({"id": "u1", "email": "x@y.z", "full_name": "Ana 3"}), storage.count_users()))
+    record(("user-email", storage.get_user_by_email("a@b.c"), storage.get_user_by_email("x@y.z")))
+
+    base = datetime(2026, 1, 1).timestamp()
+    with storage.batch():
+        for i in range(25):
+            storage.add_project({
+                "id": f"p{i:02d}",
+                "title": f"Livro {i}",
+                "status": "uploaded",
+                "owner_id": "u1" if i % 2 else "u2",
+                "created_at": datetime.fromtimestamp(base + i // 2).isoformat(),
+            })
+    record(("duplicate", storage.add_project({"id": "p00", "status": "uploaded",
+                                               "created_at": datetime.now().isoformat()})))
+    record(("bulk", storage.add_projects([
+        {"id": "p00", "status": "uploaded", "created_at": datetime.now().isoformat()},
+        {"id": "p99", "status": "failed", "owner_id": "u3",
+         "created_at": datetime.fromtimestamp(base + 100).isoformat()},
+    ])))
+
+    def complete(project):
+        project["status"] = "completed"
+        project["scenes"] = [{"scene_number": 1, "narration": "Era uma vez"}]
+
+    for pid in ("p03", "p04", "p07", "p10"):
+        record(("update", pid, storage.update_project(pid, complete)))
+    record(("update-missing", storage.update_project("nope", complete)))
+    record(("update-abort", storage.update_project("p05", lambda project: False)))
+    record(("update-noop", storage.update_project("p03", complete)))
+    record(("update-again", storage.update_project("p03", lambda project: project.update(title="Outro"))))
+
+    def invalid(call, *args):
+        try:
+            return call(*args)
+        except RecordError as e:
+            return "RecordError", str(e)
+
+    record(("invalid-project", invalid(storage.add_project, {"id": "bad", "status": 3, "created_at": base}),
+            invalid(storage.add_project, {"id": "bad", "status": "uploaded", "created_at": base, "color": "red"}),
+            invalid(storage.add_project, {"id": "bad", "status": "uploaded"}), storage.get_project("bad")))
+    record(("invalid-update", invalid(storage.update_project, "p04", lambda project: project.update(file_size="1")),
+            storage.get_project("p04")))
+    record(("invalid-user", invalid(storage.add_user, {"id": "u9", "email": ["a@b.c"]}), storage.get_user("u9")))
+    record(("numeric-created", storage.add_project({"id": "p50", "status": "failed", "created_at": base + 0.5,
+                                                    "error": None}), storage.get_project("p50")))
+    record(("clear-field", storage.update_project("p50", lambda project: project.update(error="boom")),
+            storage.update_project("p50", lambda project: project.update(error=None))))
+
+    record(("counts", storage.count_projects(), storage.count_projects("completed"),
+            storage.count_projects("running"), sorted(storage.project_status_counts().items())))
+
+    record(("change-owner", storage.update_project("p07", lambda project: project.update(owner_id="u3")),
+            storage.update_project("p02", lambda project: project.update(owner_id="u3", status="running"))))
+
+    for filters in ({}, {"status": "completed"}, {"owner_id": "u1"}, {"owner_id": "u3"},
+                    {"owner_id": "u1", "status": "uploaded"}, {"owner_id": "u3", "status": "running"},
+                    {"owner_id": "u2", "status": "running"}, {"status": "nothing"}):
+        for descending in (True, False):
+            pages = []
+            cursor = None
+            while True:
+                page, cursor = storage.list_projects(4, cursor, descending=descending, **filters)
+                pages.append([p["id"] for p in page])
+                if not cursor:
+                    break
+            record(("list", sorted(filters.items()), descending, pages))
+
+    storage.put_session("t1", {"user_id": "u1", "expires_at": 123.0})
+    record(("session", storage.get_session("t1"), storage.delete_session("t1"),
+            storage.delete_session("t1"), storage.get_session("t1")))
+    storage.put_session("s1", {"user_id": "u1", "expires_at": 200})
+    version = storage.revocation_version()
+    record(("revoke", storage.revoke_session("s1", 200), storage.revoke_session("s1", 200),
+            storage.revoke_session("s2", 100), storage.get_session("s1"),
+            storage.revocation_version() - version, storage.revoked_sessions(150)))
+    record(("purge-revocations", storage.purge_revocations(150), storage.revoked_sessions(0),
+            storage.revocation_version() - version))
+    return transcript
+
+
+def check_storage_parity():
+    """Run check_storage on every backend and compare the transcripts"""
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": MemoryStorage(),
+            "sqlite": SQLiteStorage(os.path.join(tmp, "parity.db")),
+        }
+        transcripts = {}
+        for name, storage in backends.items():
+            try:
+                transcripts[name] = check_storage(storage)
+            finally:
+                storage.close()
+    reference = transcripts["memory"]
+    mismatches = [
+        (name, expected, got)
+        for name, transcript in transcripts.items()
+        for expected, got in zip(reference, transcript)
+        if expected != got
+    ]
+    return mismatches, len(reference)
+
+
+if __name__ == "__main__":
+    mismatches, steps = check_storage_parity()
+    for name, expected, got in mismatches:
+        print(f"❌ {name}: esperado {expected!r}, obtido {got!r}")
+    if mismatches:
+        raise SystemExit(1)
+    print(f"✅ Backends memory e sqlite iguais em {steps} verificações")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Book2Video Stub AI Server
+Imita as APIs de texto e imagem da OpenAI e de voz da ElevenLabs para testes offline
+Latência simulada, falhas 503 e limite de taxa com 429 + Retry-After configuráveis
+"""
+
+import argparse
+import hashlib
+import http.server
+import json
+import random
+import threading
+import time
+
+from router import Router, RoutingMixin
+
+DEFAULT_PORT = 8090
+# Cabeçalho mínimo de um quadro MP3 seguido de silêncio; o tamanho acompanha o texto
+FAKE_MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+# PNG 1x1 transparente
+FAKE_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c63000100000500010d0a2db40000000049454e44ae426082"
+)
+
+
+class StubAIServer(http.server.ThreadingHTTPServer):
+    # Todas as cenas conectam ao mesmo tempo; o backlog padrão (5) atrasaria o SYN em 1 s
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class StubAIHandler(RoutingMixin, http.server.BaseHTTPRequestHandler):
+    """Canned answers for the provider endpoints the fan-out client calls"""
+
+    protocol_version = "HTTP/1.1"
+    router = Router([
+        ("GET", "/health", "serve_health"),
+        ("POST", "/v1/chat/completions", "serve_chat"),
+        ("POST", "/v1/images/generations", "serve_image_generation"),
+        ("POST", "/v1/text-to-speech/{voice_id}", "serve_speech"),
+        ("GET", "/images/{name}", "serve_image"),
+    ])
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def serve_health(self):
+        self.send_json({"status": "healthy", "requests": dict(self.server.counts)})
+
+    def serve_chat(self):
+        request = self.read_json()
+        if request is None or not self.simulate("text"):
+            return
+        text = request["messages"][-1]["content"]
+        description = ("Ilustração de " + " ".join(text.split()[:12])).rstrip(".,;:!?") + "."
+        self.send_json({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "model": request.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": description},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(text.split()), "completion_tokens": len(description.split())},
+        })
+
+    def serve_image_generation(self):
+        request = self.read_json()
+        if request is None or not self.simulate("image"):
+            return
+        name = hashlib.sha256(request.get("prompt", "").encode("utf-8")).hexdigest()[:16]
+        host = self.headers.get("Host", "localhost")
+        self.send_json({"created": int(time.time()), "data": [{"url": f"http://{host}/images/{name}.png"}]})
+
+    def serve_speech(self, voice_id):
+        request = self.read_json()
+        if request is None or not self.simulate("voice"):
+            return
+        # ~1 quadro por palavra, só para o tamanho variar com a narração
+        audio = FAKE_MP3_FRAME * max(1, len(request.get("text", "").split()))
+        self.send_bytes(audio, "audio/mpeg")
+
+    def serve_image(self, name):
+        self.send_bytes(FAKE_PNG, "image/png")
+
+    def serve_404(self):
+        self.send_json({"error": {"message": "Not found"}}, 404)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_json({"error": {"message": "Invalid JSON"}}, 400)
+            return None
+
+    def simulate(self, kind):
+        """Sleep like the real API would; False when a 429/503 was sent instead"""
+        server = self.server
+        with server.lock:
+            server.counts[kind] = server.counts.get(kind, 0) + 1
+            now = time.monotonic()
+            window = server.windows.setdefault(kind, [])
+            while window and window[0] <= now - 1:
+                window.pop(0)
+            limited = server.rate_limit and len(window) >= server.rate_limit
+            if not limited:
+                window.append(now)
+            failed = not limited and server.rng.random() < server.fail_rate
+            latency = server.latency * server.rng.uniform(0.5, 1.5)
+        if limited:
+            self.send_json({"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}}, 429,
+                           {"Retry-After": "1"})
+            return False
+        time.sleep(latency)
+        if failed:
+            self.send_json({"error": {"message": "The server is overloaded", "type": "server_error"}}, 503)
+            return False
+        return True
+
+    def send_json(self, data, status=200, headers=None):
+        self.send_bytes(json.dumps(data).encode("utf-8"), "application/json", status, headers)
+
+    def send_bytes(self, body, content_type, status=200, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def create_stub_server(address=("", DEFAULT_PORT), latency=0.5, fail_rate=0.0, rate_limit=0,
+                       seed=None, verbose=False):
+    """A threaded stub server, bound and listening; call serve_forever() on it"""
+    httpd = StubAIServer(address, StubAIHandler)
+    httpd.latency = latency
+    httpd.fail_rate = fail_rate
+    httpd.rate_limit = rate_limit
+    httpd.verbose = verbose
+    httpd.rng = random.Random(seed)
+    httpd.lock = threading.Lock()
+    httpd.counts = {}
+    httpd.windows = {}
+    return httpd
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Book2Video stub AI server")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"porta HTTP (padrão: {DEFAULT_PORT})")
+    parser.add_argument("--latency", type=float, default=0.5,
+                        help="latência média por chamada em s, ±50%% (padrão: 0.5)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fração de respostas 503 (padrão: 0)")
+    parser.add_argument("--rate-limit", type=int, default=0,
+                        help="chamadas por segundo por API antes de responder 429 (padrão: sem limite)")
+    parser.add_argument("--seed", type=int, default=None, help="semente das falhas e latências")
+    parser.add_argument("--verbose", action="store_true", help="loga cada requisição")
+    args = parser.parse_args(argv)
+
+    httpd = create_stub_server(("", args.port), args.latency, args.fail_rate, args.rate_limit,
+                               args.seed, args.verbose)
+    print(f"🧪 Stub de IA em http://localhost:{args.port} (latência ~{args.latency}s, "
+          f"{args.fail_rate:.0%} de 503, limite {args.rate_limit or '∞'}/s)")
+    print(f"💡 Use: python demo_server.py --ai-url http://localhost:{args.port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  Stub parado")
+    finally:
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
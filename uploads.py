@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Book2Video Streaming Uploads
+Recebe livros em blocos direto para disco, sem carregar tudo na memória
+"""
+
+import hashlib
+import os
+import tempfile
+from email.parser import HeaderParser
+
+READ_CHUNK_SIZE = 64 * 1024
+MAX_LINE_BYTES = 8 * 1024
+MAX_PART_HEADER_BYTES = 16 * 1024
+MAX_FIELD_BYTES = 64 * 1024
+# Limite padrão de upload do sistema real
+DEFAULT_MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+DEFAULT_SPOOL_DIR = os.path.join(tempfile.gettempdir(), "book2video-spool")
+
+
+class UploadError(Exception):
+    """Raised when an upload body is malformed"""
+
+
+class UploadTooLarge(UploadError):
+    """Raised when an upload exceeds the configured size limit"""
+
+
+class LimitedReader:
+    """Reads at most `length` bytes from a file object"""
+
+    def __init__(self, rfile, length):
+        self._rfile = rfile
+        self._remaining = length
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._rfile.read(size)
+        if not data:
+            raise UploadError("Unexpected end of request body")
+        self._remaining -= len(data)
+        return data
+
+
+class ChunkedReader:
+    """Decodes a Transfer-Encoding: chunked body on the fly"""
+
+    def __init__(self, rfile):
+        self._rfile = rfile
+        self._remaining = 0
+        self._done = False
+
+    def read(self, size=-1):
+        if self._done:
+            return b""
+        if self._remaining == 0:
+            self._remaining = self._read_chunk_size()
+            if self._remaining == 0:
+                self._skip_trailers()
+                self._done = True
+                return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._rfile.read(size)
+        if not data:
+            raise UploadError("Unexpected end of chunked body")
+        self._remaining -= len(data)
+        if self._remaining == 0 and self._rfile.readline(MAX_LINE_BYTES) not in (b"\r\n", b"\n"):
+            raise UploadError("Malformed chunked body")
+        return data
+
+    def _read_chunk_size(self):
+        line = self._rfile.readline(MAX_LINE_BYTES)
+        try:
+            return int(line.split(b";", 1)[0].strip(), 16)
+        except ValueError:
+            raise UploadError("Malformed chunked body")
+
+    def _skip_trailers(self):
+        while True:
+            line = self._rfile.readline(MAX_LINE_BYTES)
+            if line in (b"\r\n", b"\n", b""):
+                return
+
+
+class MultipartReader:
+    """Incremental multipart/form-data parser that never holds a whole part in memory"""
+
+    def __init__(self, reader, boundary, chunk_size=READ_CHUNK_SIZE):
+        self._reader = reader
+        self._delimiter = b"\r\n--" + boundary
+        self._chunk_size = chunk_size
+        # CRLF inicial para o primeiro delimitador casar como os demais
+        self._buffer = bytearray(b"\r\n")
+        self._eof = False
+
+    def parts(self):
+        """Yield (headers, body_chunks) per part; unread bodies are drained automatically"""
+        for _ in self._read_until_delimiter():
+            pass  # preâmbulo
+        while True:
+            self._ensure(2)
+            marker = bytes(self._buffer[:2])
+            if marker == b"--":
+                return
+            if marker != b"\r\n":
+                raise UploadError("Malformed multipart body")
+            del self._buffer[:2]
+            headers = self._read_headers()
+            body = self._read_until_delimiter()
+            yield headers, body
+            for _ in body:
+                pass
+
+    def _fill(self):
+        if self._eof:
+            return False
+        data = self._reader.read(self._chunk_size)
+        if not data:
+            self._eof = True
+            return False
+        self._buffer += data
+        return True
+
+    def _ensure(self, size):
+        while len(self._buffer) < size:
+            if not self._fill():
+                raise UploadError("Unexpected end of multipart body")
+
+    def _read_headers(self):
+        while True:
+            end = self._buffer.find(b"\r\n\r\n")
+            if end >= 0:
+                break
+            if len(self._buffer) > MAX_PART_HEADER_BYTES:
+                raise UploadError("Multipart part headers too large")
+            if not self._fill():
+                raise UploadError("Unexpected end of multipart body")
+        raw = bytes(self._buffer[:end]).decode("utf-8", "replace")
+        del self._buffer[:end + 4]
+        return HeaderParser().parsestr(raw)
+
+    def _read_until_delimiter(self):
+        keep = len(self._delimiter) - 1
+        while True:
+            index = self._buffer.find(self._delimiter)
+            if index >= 0:
+                if index:
+                    yield bytes(self._buffer[:index])
+                del self._buffer[:index + len(self._delimiter)]
+                return
+            if len(self._buffer) > keep:
+                yield bytes(self._buffer[:-keep])
+                del self._buffer[:-keep]
+            if not self._fill():
+                raise UploadError("Unexpected end of multipart body")
+
+
+class SpoolWriter:
+    """Writes chunks to a spool file while hashing and enforcing the size limit"""
+
+    def __init__(self, spool_dir, max_bytes):
+        os.makedirs(spool_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hash = hashlib.sha256()
+        fd, self.path = tempfile.mkstemp(dir=spool_dir, suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+        self._hash.update(chunk)
+        self._file.write(chunk)
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    def commit(self, final_path):
+        """Close the spool file and move it to its final name
+
+        Returns False when identical content was already stored there.
+        """
+        self._file.close()
+        if os.path.exists(final_path):
+            os.unlink(self.path)
+            self.path = final_path
+            return False
+        os.replace(self.path, final_path)
+        self.path = final_path
+        return True
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def open_body(headers, rfile, max_bytes):
+    """Return a reader for the request body, honouring chunked transfer encoding"""
+    if "chunked" in headers.get("Transfer-Encoding", "").lower():
+        return ChunkedReader(rfile)
+    try:
+        content_length = int(headers.get("Content-Length", 0))
+    except ValueError:
+        raise UploadError("Invalid Content-Length")
+    if content_length > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+    return LimitedReader(rfile, content_length)
+
+
+def book_path(spool_dir, sha256):
+    """Content-addressed location of an uploaded book"""
+    return os.path.join(spool_dir, f"{sha256}.book")
+
+
+def receive_upload(headers, rfile, spool_dir, max_bytes=DEFAULT_MAX_UPLOAD_BYTES):
+    """Stream a raw or multipart upload into the spool, stored by content hash
+
+    Returns a dict with path, size, sha256, filename, content_type, the text
+    form fields and whether these exact bytes had been uploaded before.
+    """
+    reader = open_body(headers, rfile, max_bytes)
+    content_type = headers.get("Content-Type", "application/octet-stream")
+    spool = SpoolWriter(spool_dir, max_bytes)
+    result = {
+        "filename": headers.get("X-Filename"),
+        "content_type": content_type,
+        "fields": {},
+    }
+    try:
+        if content_type.lower().startswith("multipart/form-data"):
+            _receive_multipart(reader, content_type, spool, result)
+        else:
+            while True:
+                chunk = reader.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                spool.write(chunk)
+        if spool.size == 0:
+            raise UploadError("No file data")
+        result["duplicate"] = not spool.commit(book_path(spool_dir, spool.sha256))
+    except BaseException:
+        spool.discard()
+        raise
+    result["path"] = spool.path
+    result["size"] = spool.size
+    result["sha256"] = spool.sha256
+    return result
+
+
+def _receive_multipart(reader, content_type, spool, result):
+    params = HeaderParser().parsestr(f"Content-Type: {content_type}\r\n\r\n")
+    boundary = params.get_param("boundary")
+    if not boundary:
+        raise UploadError("Missing multipart boundary")
+
+    found_file = False
+    for part_headers, body in MultipartReader(reader, boundary.encode("latin-1")).parts():
+        name = part_headers.get_param("name", header="content-disposition")
+        filename = part_headers.get_filename()
+        if filename is not None and not found_file:
+            found_file = True
+            result["filename"] = os.path.basename(filename)
+            result["content_type"] = part_headers.get("Content-Type", "application/octet-stream")
+            for chunk in body:
+                spool.write(chunk)
+        elif filename is None and name:
+            value = bytearray()
+            for chunk in body:
+                value += chunk
+                if len(value) > MAX_FIELD_BYTES:
+                    raise UploadError(f"Form field '{name}' too large")
+            result["fields"][name] = value.decode("utf-8", "replace")
+    if not found_file:
+        raise UploadError("No file part in multipart body")
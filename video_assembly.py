@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Book2Video Video Assembly
+Cada cena (imagem + narração) vira um segmento próprio, renderizado em paralelo
+O vídeo final junta os segmentos com o concat demuxer do FFmpeg, sem reencodar
+Segmentos são endereçados pelo conteúdo: no reprocessamento só cenas alteradas renderizam
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Todos os segmentos com os mesmos parâmetros: é o que permite o "-c copy" no concat
+VIDEO_WIDTH = 1280
+VIDEO_HEIGHT = 720
+VIDEO_FPS = 25
+VIDEO_CRF = 23
+VIDEO_PRESET = "veryfast"
+AUDIO_RATE = 44100
+AUDIO_BITRATE = "128k"
+# Cor de fundo das cenas sem imagem (modo simulado)
+PLACEHOLDER_COLOR = "0x1e3a5f"
+DOWNLOAD_TIMEOUT = 30
+RENDER_SETTINGS_VERSION = 1
+
+
+def ffmpeg_available(ffmpeg="ffmpeg"):
+    return shutil.which(ffmpeg) is not None
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def segment_key(scene, image_path=None):
+    """Content hash of everything that changes a scene's segment"""
+    audio_path = scene.get("audio_path")
+    raw = json.dumps({
+        "image": _file_sha256(image_path) if image_path else None,
+        "audio": scene.get("audio_sha256") or (_file_sha256(audio_path) if audio_path else None),
+        "duration": scene["duration_seconds"],
+        "settings": [RENDER_SETTINGS_VERSION, VIDEO_WIDTH, VIDEO_HEIGHT, VIDEO_FPS, VIDEO_CRF,
+                     VIDEO_PRESET, AUDIO_RATE, AUDIO_BITRATE],
+    }, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def fetch_image(scene, image_dir):
+    """Local path of the scene's image (downloaded once per URL), or None"""
+    if scene.get("image_path"):
+        return scene["image_path"]
+    url = scene.get("image_url")
+    if not url:
+        return None
+    if url.startswith("file://"):
+        return urllib.request.url2pathname(url[len("file://"):])
+    name = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+    path = os.path.join(image_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(image_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=image_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f, urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response:
+                shutil.copyfileobj(response, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return path
+
+
+def segment_command(scene, image_path, output_path, ffmpeg="ffmpeg"):
+    """FFmpeg arguments rendering one scene to an H.264/AAC segment"""
+    duration = f"{scene['duration_seconds']:.3f}"
+    command = [ffmpeg, "-hide_banner", "-loglevel", "error", "-y"]
+    if image_path:
+        command += ["-loop", "1", "-framerate", str(VIDEO_FPS), "-i", image_path]
+    else:
+        command += ["-f", "lavfi", "-i",
+                    f"color=c={PLACEHOLDER_COLOR}:s={VIDEO_WIDTH}x{VIDEO_HEIGHT}:r={VIDEO_FPS}"]
+    if scene.get("audio_path"):
+        command += ["-i", scene["audio_path"]]
+    else:
+        command += ["-f", "lavfi", "-i", f"anullsrc=r={AUDIO_RATE}:cl=stereo"]
+    scale = (f"scale={VIDEO_WIDTH}:{VIDEO_HEIGHT}:force_original_aspect_ratio=decrease,"
+             f"pad={VIDEO_WIDTH}:{VIDEO_HEIGHT}:(ow-iw)/2:(oh-ih)/2,setsar=1,format=yuv420p")
+    command += [
+        "-map", "0:v", "-map", "1:a",
+        "-vf", scale, "-r", str(VIDEO_FPS),
+        "-c:v", "libx264", "-preset", VIDEO_PRESET, "-tune", "stillimage", "-crf", str(VIDEO_CRF),
+        # Uma thread por segmento: o paralelismo vem de vários segmentos ao mesmo tempo
+        "-threads", "1",
+        "-af", "apad", "-c:a", "aac", "-b:a", AUDIO_BITRATE, "-ar", str(AUDIO_RATE), "-ac", "2",
+        "-t", duration, "-movflags", "+faststart",
+        output_path,
+    ]
+    return command
+
+
+def render_segment(scene, image_path, output_path, ffmpeg="ffmpeg"):
+    """Render one segment to a temp file and move it into place; returns seconds spent"""
+    started = time.monotonic()
+    tmp_path = output_path + ".part.mp4"
+    try:
+        subprocess.run(segment_command(scene, image_path, tmp_path, ffmpeg),
+                       check=True, stdin=subprocess.DEVNULL, capture_output=True)
+        os.replace(tmp_path, output_path)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"ffmpeg falhou na cena {scene.get('scene_number')}: "
+                           f"{e.stderr.decode('utf-8', 'replace').strip()[-500:]}") from e
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return time.monotonic() - started
+
+
+def concat_segments(segment_paths, output_path, ffmpeg="ffmpeg"):
+    """Join same-format segments with the concat demuxer and stream copy"""
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, list_path = tempfile.mkstemp(dir=directory, suffix=".txt")
+    tmp_output = output_path + ".part.mp4"
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for path in segment_paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        subprocess.run([ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+                        "-f", "concat", "-safe", "0", "-i", list_path,
+                        "-c", "copy", "-movflags", "+faststart", tmp_output],
+                       check=True, stdin=subprocess.DEVNULL, capture_output=True)
+        os.replace(tmp_output, output_path)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"ffmpeg falhou ao juntar os segmentos: "
+                           f"{e.stderr.decode('utf-8', 'replace').strip()[-500:]}") from e
+    finally:
+        os.unlink(list_path)
+        if os.path.exists(tmp_output):
+            os.unlink(tmp_output)
+
+
+def assemble_video(scenes, render_dir, workers=None, ffmpeg="ffmpeg", on_segment=None):
+    """Render the missing segments in parallel and concat them into render_dir/video.mp4
+
+    Segments are named by segment_key(), so a reprocess only renders scenes
+    whose image, narration or duration changed; segments no longer used by
+    this render are removed afterwards. `on_segment(done, total)` is called
+    as segments become ready. Returns a summary dict.
+    """
+    started = time.monotonic()
+    segment_dir = os.path.join(render_dir, "segments")
+    image_dir = os.path.join(render_dir, "images")
+    os.makedirs(segment_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Downloads em paralelo também; cada um entra no hash do segmento
+        images = list(pool.map(lambda scene: fetch_image(scene, image_dir), scenes))
+        paths = []
+        pending = []
+        queued = set()
+        for scene, image_path in zip(scenes, images):
+            path = os.path.join(segment_dir, segment_key(scene, image_path) + ".mp4")
+            paths.append(path)
+            # Cenas idênticas (mesma imagem, áudio e duração) renderizam uma vez só
+            if not os.path.exists(path) and path not in queued:
+                queued.add(path)
+                pending.append((scene, image_path, path))
+
+        total = len(scenes)
+        ready = total - len(pending)
+        if on_segment:
+            on_segment(ready, total)
+        render_seconds = 0.0
+        futures = [pool.submit(render_segment, scene, image_path, path, ffmpeg)
+                   for scene, image_path, path in pending]
+        for future in futures:
+            render_seconds += future.result()
+            ready += 1
+            if on_segment:
+                on_segment(ready, total)
+
+    concat_started = time.monotonic()
+    video_path = os.path.join(render_dir, "video.mp4")
+    concat_segments(paths, video_path, ffmpeg)
+    concat_seconds = time.monotonic() - concat_started
+
+    keep = {os.path.basename(path) for path in paths}
+    for name in os.listdir(segment_dir):
+        if name not in keep:
+            os.unlink(os.path.join(segment_dir, name))
+
+    return {
+        "video_path": video_path,
+        "segments": total,
+        "rendered": len(pending),
+        "reused": total - len(pending),
+        "workers": workers,
+        "render_cpu_seconds": round(render_seconds, 3),
+        "concat_seconds": round(concat_seconds, 3),
+        "wall_seconds": round(time.monotonic() - started, 3),
+        "video_bytes": os.path.getsize(video_path),
+    }
+
+
+def write_test_image(path, seed, width=16, height=9):
+    """Tiny solid-color PPM so every synthetic scene has a distinct image"""
+    color = bytes(((seed * 67) % 256, (seed * 139) % 256, (seed * 211) % 256))
+    with open(path, "wb") as f:
+        f.write(f"P6 {width} {height} 255\n".encode("ascii") + color * (width * height))
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Book2Video video assembly benchmark")
+    parser.add_argument("--scenes", type=int, default=16, help="cenas sintéticas (padrão: 16)")
+    parser.add_argument("--seconds", type=float, default=4.0, help="duração de cada cena (padrão: 4)")
+    parser.add_argument("--workers", default="1,auto",
+                        help="tamanhos do pool a comparar, separados por vírgula (padrão: 1,auto)")
+    parser.add_argument("--ffmpeg", default="ffmpeg", help="executável do FFmpeg (padrão: ffmpeg)")
+    args = parser.parse_args(argv)
+
+    if not ffmpeg_available(args.ffmpeg):
+        print(f"❌ FFmpeg não encontrado ({args.ffmpeg}); instale-o para montar vídeos")
+        return 1
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        scenes = [{"scene_number": n, "duration_seconds": args.seconds,
+                   "image_path": write_test_image(os.path.join(tmp, f"scene{n}.ppm"), n)}
+                  for n in range(1, args.scenes + 1)]
+        for value in args.workers.split(","):
+            workers = os.cpu_count() if value == "auto" else int(value)
+            render_dir = os.path.join(tmp, f"w{workers}")
+            summary = assemble_video(scenes, render_dir, workers, args.ffmpeg)
+            baseline = baseline or summary["wall_seconds"]
+            print(f"🎬 {workers:>3} processos: {summary['wall_seconds']:.2f}s "
+                  f"(speedup {baseline / summary['wall_seconds']:.2f}x, concat {summary['concat_seconds']:.2f}s)")
+            # Reprocessamento sem mudanças: nada a renderizar, só o concat
+            again = assemble_video(scenes, render_dir, workers, args.ffmpeg)
+            print(f"   ♻️  reprocesso: {again['rendered']} renderizados, {again['reused']} reaproveitados, "
+                  f"{again['wall_seconds']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())